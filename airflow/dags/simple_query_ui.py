@@ -5,7 +5,10 @@ from airflow.decorators import task
 from airflow.models.param import ParamsDict
 from weather_catalog.catalog.catalog_selector import CatalogSelectorSingleton
 from weather_catalog.query.point_daterange_query import PointDateRangeQuery
+from weather_catalog.query.query_batch import QueryBatch
 from weather_catalog.query_resolution.query_resolver import QueryResolver
+from weather_catalog.query_resolution.result_cache import ResultCacheSingleton
+from weather_catalog.query_resolution.result_store import ResultStoreSingleton
 
 ##
 with DAG(
@@ -19,24 +22,29 @@ with DAG(
     params=PointDateRangeQuery.create_params(),
 ) as dag:
 
+    # the query is validated once, in create_query_object, and passes between
+    # tasks as a one row QueryBatch that is restored without validating it again
+
     @task(task_id="create_query_object", task_display_name="Create query object")
     def create_query_object(params: ParamsDict) -> dict:
         query = PointDateRangeQuery.from_params(params)
-        return query.model_dump(mode="json")
+        return QueryBatch.from_queries([query]).to_dict()
 
     @task(task_id="determine_catalog", task_display_name="Determine catalog")
     def determine_catalog(query: dict) -> str:
-        query = PointDateRangeQuery(**query)
+        query = QueryBatch.from_dict(query).query(0)
         catalog = CatalogSelectorSingleton.select_catalog(query)
         return catalog.catalog_id
 
     @task(task_id="get_data_source", task_display_name="Get data source")
-    def get_data_source_and_resolve(catalog_id: str, query: dict) -> str:
-        query = PointDateRangeQuery(**query)
+    def get_data_source_and_resolve(catalog_id: str, query: dict) -> dict:
+        query = QueryBatch.from_dict(query).query(0)
         catalog = CatalogSelectorSingleton.get_catalog_by_id(catalog_id)
         data = catalog.get_data(query)
-        resolved = QueryResolver().resolve(query, data)
-        return resolved
+        resolved = QueryResolver(result_cache=ResultCacheSingleton).resolve(query, data)
+        # only a reference goes through XCom, downstream tasks memory map the
+        # result with weather_catalog.query_resolution.result_store.read_result
+        return ResultStoreSingleton.write(resolved).model_dump(mode="json")
 
     query = create_query_object()  # type: ignore
 
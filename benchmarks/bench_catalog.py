@@ -0,0 +1,85 @@
+"""Store opening and catalog selection benchmarks"""
+
+import os
+
+from weather_catalog.catalog.catalog_selector import CatalogSelectorClass
+from weather_catalog.catalog.local_catalog.local_catalog import LocalCatalog
+from weather_catalog.catalog.local_catalog.local_data_downloader import (
+    LocalDataDownloader,
+)
+from weather_catalog.catalog.local_catalog.store_handle_pool import (
+    StoreHandlePoolSingleton,
+)
+
+from .common import point_query
+from .synthetic_store import make_catalog_tree
+
+SMALL_STORE = {
+    "n_times": 48,
+    "n_latitudes": 19,
+    "n_longitudes": 36,
+    "chunks": (24, 8, 8),
+}
+
+
+class LocalDataDownloaderSuite:
+    """Opening a store per query, cold (metadata parsed) and warm (pooled handle)"""
+
+    def setup_cache(self) -> str:
+        base_path = os.path.abspath("downloader_catalog")
+        make_catalog_tree(base_path, [("synthetic", "model_0")], **SMALL_STORE)
+        return base_path
+
+    def setup(self, base_path: str) -> None:
+        self.downloader = LocalDataDownloader(base_path=base_path)
+        self.query = point_query()
+        self.downloader.download_data(self.query)
+
+    def time_open_cold(self, base_path: str) -> None:
+        StoreHandlePoolSingleton.invalidate()
+        self.downloader.download_data(self.query)
+
+    def time_open_warm(self, base_path: str) -> None:
+        self.downloader.download_data(self.query)
+
+
+class CatalogSelectorSuite:
+    """Selecting a catalog among many, with a built and a fresh coverage index"""
+
+    params = ([1, 10, 50],)
+    param_names = ("n_catalogs",)
+    timeout = 600
+
+    def setup_cache(self) -> dict[int, list[str]]:
+        base_paths = {}
+        for n_catalogs in self.params[0]:
+            base_paths[n_catalogs] = []
+            for index in range(n_catalogs):
+                base_path = os.path.abspath(f"selector_{n_catalogs}_{index}")
+                make_catalog_tree(
+                    base_path, [("synthetic", f"model_{index}")], **SMALL_STORE
+                )
+                base_paths[n_catalogs].append(base_path)
+        return base_paths
+
+    def setup(self, base_paths: dict[int, list[str]], n_catalogs: int) -> None:
+        catalogs = []
+        for index, base_path in enumerate(base_paths[n_catalogs]):
+            catalog = LocalCatalog(base_path=base_path)
+            catalog.catalog_id = f"local_{index}"
+            catalogs.append(catalog)
+        self.selector = CatalogSelectorClass(catalogs=catalogs)
+        # the last catalog serves the query, so every catalog is looked at
+        self.query = point_query(weather_model_id=f"model_{n_catalogs - 1}")
+        self.selector.select_catalog(self.query)
+
+    def time_select_warm(
+        self, base_paths: dict[int, list[str]], n_catalogs: int
+    ) -> None:
+        self.selector.select_catalog(self.query)
+
+    def time_select_cold(
+        self, base_paths: dict[int, list[str]], n_catalogs: int
+    ) -> None:
+        self.selector.invalidate()
+        self.selector.select_catalog(self.query)
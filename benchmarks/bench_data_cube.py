@@ -0,0 +1,238 @@
+"""Read path benchmarks of ZarrayDataCube on synthetic stores"""
+
+import numpy as np
+import zarr
+
+from weather_catalog.data.memmap_data_cube import MemmapDataCube
+from weather_catalog.data.memmap_store import write_memmap_store
+from weather_catalog.data.rechunk import layout_path, rechunk_store
+from weather_catalog.data.zarray_data_cube import ZarrayDataCube
+from weather_catalog.enums import Frequency, WeatherVariable
+
+from .common import START_DATE, point_query
+from .synthetic_store import make_synthetic_store
+
+VARIABLE_RENAME_MAP = {
+    WeatherVariable.TEMPERATURE: "t2m",
+    WeatherVariable.WIND_U: "u10m",
+    WeatherVariable.WIND_V: "v10m",
+}
+
+CHUNKS = {
+    "time-major": (24, 64, 64),
+    "point-major": (24 * 60, 8, 8),
+}
+COMPRESSORS = ("blosc-lz4", "none")
+
+
+def _store_name(chunking: str, compressor: str) -> str:
+    return f"cube_{chunking}_{compressor}.zarr"
+
+
+class ZarrayDataCubeSuite:
+    """Point lookups and time range reads, uncached so every read hits the store"""
+
+    params = (list(CHUNKS), list(COMPRESSORS))
+    param_names = ("chunking", "compressor")
+    timeout = 600
+
+    def setup_cache(self) -> None:
+        for chunking, chunks in CHUNKS.items():
+            for compressor in COMPRESSORS:
+                make_synthetic_store(
+                    _store_name(chunking, compressor),
+                    n_times=24 * 60,
+                    chunks=chunks,
+                    compressor=compressor,
+                )
+
+    def setup(self, chunking: str, compressor: str) -> None:
+        self.cube = ZarrayDataCube(
+            dataset=zarr.open_consolidated(_store_name(chunking, compressor), mode="r"),
+            variable_rename_map=VARIABLE_RENAME_MAP,
+            use_chunk_cache=False,
+        )
+        self.day = point_query(hours=24)
+        self.all_times = point_query(hours=24 * 60)
+        self.multi_variable = point_query(
+            hours=24 * 60, variables=tuple(VARIABLE_RENAME_MAP)
+        )
+        rng = np.random.default_rng(0)
+        self.latitudes = rng.uniform(-80, 80, 100)
+        self.longitudes = rng.uniform(-170, 170, 100)
+        # build the coordinate indices outside of the timed region
+        self.cube.grid_index
+        self.cube.time_index
+
+    def _get_data(self, query, **kwargs):  # type: ignore
+        return self.cube.get_data(
+            latitude=query.location.latitude,
+            longitude=query.location.longitude,
+            start_date=query.start_date,
+            end_date=query.end_date,
+            variables=query.variables,
+            **kwargs,
+        )
+
+    def time_point_lookup(self, chunking: str, compressor: str) -> None:
+        self._get_data(self.day)
+
+    def time_time_range_read(self, chunking: str, compressor: str) -> None:
+        self._get_data(self.all_times)
+
+    def time_multi_variable_read(self, chunking: str, compressor: str) -> None:
+        self._get_data(self.multi_variable)
+
+    def time_daily_resampled_read(self, chunking: str, compressor: str) -> None:
+        self._get_data(self.all_times, frequency=Frequency.DAILY)
+
+    def time_batch_of_100_points(self, chunking: str, compressor: str) -> None:
+        self.cube.get_data_batch(
+            self.latitudes,
+            self.longitudes,
+            self.day.start_date,
+            self.day.end_date,
+            self.day.variables,
+        )
+
+    def peakmem_time_range_read(self, chunking: str, compressor: str) -> None:
+        self._get_data(self.all_times)
+
+
+class CoordinateIndexSuite:
+    """Nearest grid cell and time range lookups, without reading any values"""
+
+    def setup_cache(self) -> None:
+        make_synthetic_store("index.zarr", n_times=24 * 365, chunks=(24, 64, 64))
+
+    def setup(self) -> None:
+        self.cube = ZarrayDataCube(
+            dataset=zarr.open_consolidated("index.zarr", mode="r"),
+            variable_rename_map=VARIABLE_RENAME_MAP,
+        )
+        # named so that asv does not mistake them for time_ benchmarks
+        self.grid = self.cube.grid_index
+        self.times = self.cube.time_index
+        rng = np.random.default_rng(0)
+        self.latitudes = rng.uniform(-90, 90, 10_000)
+        self.longitudes = rng.uniform(-180, 180, 10_000)
+
+    def time_nearest_point(self) -> None:
+        self.grid.nearest_point(40.0, -100.0)
+
+    def time_nearest_10k_points(self) -> None:
+        self.grid.nearest(self.latitudes, self.longitudes)
+
+    def time_slice_between(self) -> None:
+        self.times.slice_between(START_DATE, START_DATE.replace(month=6))
+
+
+class StoreLayoutSuite:
+    """Point time series reads against a store and its time series copy"""
+
+    params = [["primary", "timeseries"]]
+    param_names = ["layout"]
+    timeout = 600
+
+    def setup_cache(self) -> None:
+        make_synthetic_store("layout.zarr", n_times=24 * 60, chunks=(24, 64, 64))
+        rechunk_store("layout.zarr")
+
+    def setup(self, layout: str) -> None:
+        path = "layout.zarr"
+        if layout != "primary":
+            path = layout_path(path, layout)
+        self.cube = ZarrayDataCube(
+            dataset=zarr.open_consolidated(path, mode="r"),
+            variable_rename_map=VARIABLE_RENAME_MAP,
+            use_chunk_cache=False,
+        )
+        self.all_times = point_query(hours=24 * 60)
+        self.cube.grid_index
+        self.cube.time_index
+
+    def time_time_range_read(self, layout: str) -> None:
+        self.cube.get_data(
+            latitude=self.all_times.location.latitude,
+            longitude=self.all_times.location.longitude,
+            start_date=self.all_times.start_date,
+            end_date=self.all_times.end_date,
+            variables=self.all_times.variables,
+        )
+
+
+class RechunkSuite:
+    """Building a time series copy of a time-major store within a memory budget"""
+
+    timeout = 600
+
+    def setup_cache(self) -> None:
+        make_synthetic_store("rechunk.zarr", n_times=24 * 60, chunks=(24, 64, 64))
+
+    def time_rechunk(self) -> None:
+        rechunk_store("rechunk.zarr", "rechunked.zarr", max_memory_bytes=64 << 20)
+
+    def peakmem_rechunk(self) -> None:
+        rechunk_store("rechunk.zarr", "rechunked.zarr", max_memory_bytes=64 << 20)
+
+
+class MemmapSuite:
+    """Reads through numpy.memmap against the compressed, cached zarr path"""
+
+    params = [["zarr", "zarr-cached", "memmap", "memmap-time-last"]]
+    param_names = ["backend"]
+    timeout = 600
+
+    def setup_cache(self) -> None:
+        make_synthetic_store("memmap_source.zarr", n_times=24 * 60, chunks=(24, 64, 64))
+        write_memmap_store("memmap_source.zarr", "memmap.zarr")
+        write_memmap_store(
+            "memmap_source.zarr",
+            "memmap_time_last.zarr",
+            dimension_order=("latitude", "longitude", "time"),
+        )
+
+    def setup(self, backend: str) -> None:
+        if backend.startswith("zarr"):
+            self.cube = ZarrayDataCube(
+                dataset=zarr.open_consolidated("memmap_source.zarr", mode="r"),
+                variable_rename_map=VARIABLE_RENAME_MAP,
+                use_chunk_cache=backend == "zarr-cached",
+            )
+        else:
+            path = "memmap.zarr" if backend == "memmap" else "memmap_time_last.zarr"
+            self.cube = MemmapDataCube(
+                dataset=zarr.open_consolidated(path, mode="r"),
+                variable_rename_map=VARIABLE_RENAME_MAP,
+            )
+        self.day = point_query(hours=24)
+        self.all_times = point_query(hours=24 * 60)
+        rng = np.random.default_rng(0)
+        self.latitudes = rng.uniform(-80, 80, 100)
+        self.longitudes = rng.uniform(-170, 170, 100)
+        # build the coordinate indices and warm the caches outside of the timed region
+        self._get_data(self.all_times)
+
+    def _get_data(self, query):  # type: ignore
+        return self.cube.get_data(
+            latitude=query.location.latitude,
+            longitude=query.location.longitude,
+            start_date=query.start_date,
+            end_date=query.end_date,
+            variables=query.variables,
+        )
+
+    def time_point_lookup(self, backend: str) -> None:
+        self._get_data(self.day)
+
+    def time_time_range_read(self, backend: str) -> None:
+        self._get_data(self.all_times)
+
+    def time_batch_of_100_points(self, backend: str) -> None:
+        self.cube.get_data_batch(
+            self.latitudes,
+            self.longitudes,
+            self.all_times.start_date,
+            self.all_times.end_date,
+            self.all_times.variables,
+        )
@@ -0,0 +1,56 @@
+"""Construction and validation cost of query models"""
+
+import numpy as np
+
+from weather_catalog.query import PointDateRangeQuery, QueryBatch
+
+from .common import point_query
+
+
+class QuerySuite:
+    def setup(self) -> None:
+        self.query = point_query()
+        self.query_dict = self.query.model_dump(mode="json")
+        self.query_json = self.query.model_dump_json()
+        self.query_dicts = [
+            {**self.query_dict, "location": {"latitude": i % 90, "longitude": i % 180}}
+            for i in range(1000)
+        ]
+        self.latitudes = np.arange(100_000) % 90
+        self.longitudes = np.arange(100_000) % 180
+        self.batch = self.batch_100k()
+        self.batch_dict = self.batch.take(slice(0, 1000)).to_dict()
+
+    def time_construct_from_dict(self) -> None:
+        PointDateRangeQuery(**self.query_dict)
+
+    def time_validate_json(self) -> None:
+        PointDateRangeQuery.model_validate_json(self.query_json)
+
+    def time_construct_1000(self) -> None:
+        for query_dict in self.query_dicts:
+            PointDateRangeQuery(**query_dict)
+
+    def time_dump_json(self) -> None:
+        self.query.model_dump(mode="json")
+
+    def batch_100k(self) -> QueryBatch:
+        return QueryBatch(
+            latitudes=self.latitudes,
+            longitudes=self.longitudes,
+            start_dates=self.query.start_date,
+            end_dates=self.query.end_date,
+            variables=self.query.variables,
+            weather_model_group=self.query.weather_model_group,
+            weather_model_id=self.query.weather_model_id,
+            resolution=self.query.resolution,
+        )
+
+    def time_construct_batch_100k(self) -> None:
+        self.batch_100k()
+
+    def time_group_batch_100k(self) -> None:
+        self.batch.groups()
+
+    def time_batch_from_dict_1000(self) -> None:
+        QueryBatch.from_dict(self.batch_dict)
@@ -0,0 +1,121 @@
+"""S3 read path benchmarks against a local S3 stand-in (a moto server)
+
+skipped when moto is not installed (pip install "moto[server]")
+"""
+
+import os
+import socket
+
+from zarr.hierarchy import Group
+
+from weather_catalog.catalog.s3.s3_downloader import S3Downloader
+from weather_catalog.data import DataCube
+from weather_catalog.data.chunk_cache import ChunkCacheSingleton
+from weather_catalog.data.read_policy import ReadPolicy
+from weather_catalog.data.zarray_data_cube import ZarrayDataCube
+from weather_catalog.query import Query
+
+from .bench_data_cube import VARIABLE_RENAME_MAP
+from .common import point_query
+from .synthetic_store import make_synthetic_store
+
+BUCKET = "weather-catalog-benchmarks"
+
+
+class _BenchmarkS3Downloader(S3Downloader):
+    def _convert_query_to_relative_path(self, query: Query) -> str:
+        return (
+            f"{self.bucket_base_path}/{query.weather_model_group}/"
+            f"{query.weather_model_id}.zarr"
+        )
+
+    def read_in_data(self, dataset: Group) -> DataCube:
+        return ZarrayDataCube(
+            dataset=dataset,
+            variable_rename_map=VARIABLE_RENAME_MAP,
+            read_policy=self.read_policy,
+        )
+
+
+class S3ReadSuite:
+    """Opening a store and reading a point over S3, sequential and concurrent
+
+    reads go through the chunk cache, whose concurrent fetches max_concurrency
+    bounds. It is cleared before every timed call, so every call fetches
+    its chunks from S3.
+    """
+
+    params = ([1, 16],)
+    param_names = ("max_concurrency",)
+    timeout = 600
+    # one call per setup, and no warmup call filling the cache beforehand
+    number = 1
+    warmup_time = 0.0
+
+    def setup_cache(self) -> str:
+        path = os.path.abspath("s3_source.zarr")
+        make_synthetic_store(
+            path, n_times=24 * 30, n_latitudes=91, n_longitudes=180, chunks=(24, 32, 32)
+        )
+        return path
+
+    def setup(self, source_path: str, max_concurrency: int) -> None:
+        try:
+            import s3fs
+            from moto.server import ThreadedMotoServer
+        except ImportError:
+            raise NotImplementedError("moto is not installed")
+
+        port = _free_port()
+        self.server = ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+        self.server.start()
+        filesystem = s3fs.S3FileSystem(
+            key="benchmark",
+            secret="benchmark",
+            client_kwargs={
+                "endpoint_url": f"http://127.0.0.1:{port}",
+                "region_name": "us-west-2",
+            },
+            skip_instance_cache=True,
+        )
+        if not filesystem.exists(BUCKET):
+            # moto keeps its state per process, not per server
+            filesystem.mkdir(BUCKET)
+        filesystem.put(source_path, f"{BUCKET}/synthetic/model_0.zarr", recursive=True)
+
+        self.downloader = _BenchmarkS3Downloader(
+            bucket_base_path=BUCKET,
+            filesystem=filesystem,
+            read_policy=ReadPolicy(max_concurrency=max_concurrency, max_retries=3),
+        )
+        self.day = point_query(hours=24)
+        self.month = point_query(hours=24 * 30, variables=tuple(VARIABLE_RENAME_MAP))
+        self.cube = self.downloader.download_data(self.day)
+        ChunkCacheSingleton.clear()
+
+    def teardown(self, source_path: str, max_concurrency: int) -> None:
+        self.server.stop()
+
+    def _get_data(self, query) -> None:  # type: ignore
+        self.cube.get_data(
+            latitude=query.location.latitude,
+            longitude=query.location.longitude,
+            start_date=query.start_date,
+            end_date=query.end_date,
+            variables=query.variables,
+        )
+
+    def time_open_store(self, source_path: str, max_concurrency: int) -> None:
+        self.downloader.download_data(self.day)
+
+    def time_point_lookup(self, source_path: str, max_concurrency: int) -> None:
+        self._get_data(self.day)
+
+    def time_month_all_variables(self, source_path: str, max_concurrency: int) -> None:
+        self._get_data(self.month)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
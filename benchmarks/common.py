@@ -0,0 +1,29 @@
+"""Helpers shared by the asv benchmark modules"""
+
+from datetime import datetime, timedelta
+
+from weather_catalog.enums import Frequency, Resolution, WeatherVariable
+from weather_catalog.query import PointDateRangeQuery
+
+START_DATE = datetime(2020, 1, 1)
+
+
+def point_query(
+    latitude: float = 40.0,
+    longitude: float = -100.0,
+    hours: int = 24,
+    variables: tuple[WeatherVariable, ...] = (WeatherVariable.TEMPERATURE,),
+    weather_model_group: str = "synthetic",
+    weather_model_id: str = "model_0",
+) -> PointDateRangeQuery:
+    """A point query over the first `hours` hours of a synthetic store"""
+    return PointDateRangeQuery(
+        start_date=START_DATE,
+        end_date=START_DATE + timedelta(hours=hours - 1),
+        frequency=Frequency.HOURLY,
+        location={"latitude": latitude, "longitude": longitude},
+        weather_model_group=weather_model_group,
+        weather_model_id=weather_model_id,
+        resolution=Resolution._25km,
+        variables=list(variables),
+    )
@@ -0,0 +1,102 @@
+"""Cold import benchmark for the core query / resolve path
+
+every module listed in import_time_budget.json is imported in a fresh
+interpreter, after its unavoidable third party dependencies (pydantic,
+numpy, pandas) have been imported, so only the time spent in
+weather_catalog itself is measured. The script exits with a non zero status
+if the median time exceeds the module's budget or if the import pulled in
+a forbidden module (e.g. airflow).
+
+usage:
+    python benchmarks/import_time.py [--budget PATH] [--repeats N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_BUDGET_PATH = os.path.join(os.path.dirname(__file__), "import_time_budget.json")
+
+_CHILD_SCRIPT = """
+import json, sys, time
+for dependency in {dependencies!r}:
+    __import__(dependency)
+before = set(sys.modules)
+start = time.perf_counter()
+__import__({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": sorted(set(sys.modules) - before)}}))
+"""
+
+
+def measure_import(module: str, dependencies: list[str]) -> tuple[float, list[str]]:
+    """Import a module in a fresh interpreter
+
+    Args:
+        module (str): The module to import
+        dependencies (list[str]): Modules imported before the timer starts
+
+    Returns:
+        tuple[float, list[str]]: The import time in seconds and the newly loaded modules
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            _CHILD_SCRIPT.format(module=module, dependencies=dependencies),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    measurement = json.loads(result.stdout.strip().splitlines()[-1])
+    return measurement["seconds"], measurement["loaded"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", default=DEFAULT_BUDGET_PATH)
+    parser.add_argument("--repeats", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.budget, "r") as f:
+        budget = json.load(f)
+    repeats = args.repeats or budget.get("repeats", 5)
+    dependencies = budget.get("preloaded_dependencies", [])
+
+    failures = []
+    for module, module_budget in budget["modules"].items():
+        timings = []
+        loaded: set[str] = set()
+        for _ in range(repeats):
+            seconds, loaded_modules = measure_import(module, dependencies)
+            timings.append(seconds)
+            loaded.update(loaded_modules)
+
+        median = statistics.median(timings)
+        forbidden_roots = sorted(
+            {name.split(".")[0] for name in loaded}
+            & set(module_budget.get("forbidden_modules", []))
+        )
+        print(
+            f"{module:<45} median {median * 1000:7.1f} ms "
+            f"(budget {module_budget['max_seconds'] * 1000:.0f} ms)"
+        )
+
+        if median > module_budget["max_seconds"]:
+            failures.append(
+                f"{module} took {median:.3f}s, budget is {module_budget['max_seconds']}s"
+            )
+        if forbidden_roots:
+            failures.append(f"{module} imported {', '.join(forbidden_roots)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Synthetic zarr store generator for benchmarks and local development
+
+writes stores laid out like the ones LocalCatalog and the S3 catalogs serve:
+(time, latitude, longitude) variables with `_ARRAY_DIMENSIONS` attributes,
+a CF encoded time coordinate and consolidated metadata. Values are
+deterministic for a given seed, data is generated one time chunk at a time
+so stores larger than memory can be written.
+
+usage:
+    python benchmarks/synthetic_store.py PATH [--times N] [--latitudes N]
+        [--longitudes N] [--chunks T Y X] [--compressor NAME]
+"""
+
+import argparse
+import os
+from typing import Optional
+
+import numpy as np
+import zarr
+
+# the store names of LocalDataDownloader.variable_rename_map
+DEFAULT_VARIABLES = ("t2m", "u10m", "v10m")
+
+COMPRESSORS = ("none", "blosc-lz4", "blosc-zstd", "zstd")
+
+
+def make_compressor(name: str) -> Optional[object]:
+    """Create a numcodecs compressor from a short name
+
+    Args:
+        name (str): One of COMPRESSORS
+
+    Returns:
+        Optional[object]: The codec, None for uncompressed stores
+    """
+    import numcodecs
+
+    if name == "none":
+        return None
+    if name == "blosc-lz4":
+        return numcodecs.Blosc(cname="lz4", clevel=5, shuffle=numcodecs.Blosc.SHUFFLE)
+    if name == "blosc-zstd":
+        return numcodecs.Blosc(
+            cname="zstd", clevel=3, shuffle=numcodecs.Blosc.SHUFFLE
+        )
+    if name == "zstd":
+        return numcodecs.Zstd(level=3)
+    raise ValueError(f"Unknown compressor {name!r}, expected one of {COMPRESSORS}")
+
+
+def make_synthetic_store(
+    path: str,
+    n_times: int = 24 * 30,
+    n_latitudes: int = 181,
+    n_longitudes: int = 360,
+    chunks: tuple[int, int, int] = (24, 64, 64),
+    compressor: str = "blosc-lz4",
+    variables: tuple[str, ...] = DEFAULT_VARIABLES,
+    dtype: str = "float32",
+    start: str = "2020-01-01T00:00:00",
+    step_hours: int = 1,
+    bounds: tuple[float, float, float, float] = (-90.0, 90.0, -180.0, 179.0),
+    seed: int = 0,
+) -> zarr.hierarchy.Group:
+    """Write a synthetic weather model store
+
+    Args:
+        path (str): Where to write the zarr directory store, replaced if it exists
+        n_times (int): The length of the time axis
+        n_latitudes (int): The length of the latitude axis
+        n_longitudes (int): The length of the longitude axis
+        chunks (tuple[int, int, int]): The (time, latitude, longitude) chunk shape
+        compressor (str): One of COMPRESSORS
+        variables (tuple[str, ...]): The names of the variables to write
+        dtype (str): The dtype of the variables
+        start (str): The first time of the store
+        step_hours (int): The hours between two times
+        bounds (tuple[float, float, float, float]): The (min latitude,
+            max latitude, min longitude, max longitude) of the grid,
+            latitudes are written north to south
+        seed (int): Seed of the generated values
+
+    Returns:
+        zarr.hierarchy.Group: The written group
+    """
+    group = zarr.open_group(path, mode="w")
+    group.attrs.update({"resolution": "25km", "frequency": "hourly"})
+
+    min_latitude, max_latitude, min_longitude, max_longitude = bounds
+    latitude = group.array(
+        "latitude", np.linspace(max_latitude, min_latitude, n_latitudes)
+    )
+    latitude.attrs.update(
+        {"units": "degrees_north", "_ARRAY_DIMENSIONS": ["latitude"]}
+    )
+    longitude = group.array(
+        "longitude", np.linspace(min_longitude, max_longitude, n_longitudes)
+    )
+    longitude.attrs.update(
+        {"units": "degrees_east", "_ARRAY_DIMENSIONS": ["longitude"]}
+    )
+
+    time = group.array(
+        "time",
+        np.arange(n_times, dtype=np.int64) * step_hours,
+        chunks=(max(n_times, 1),),
+    )
+    time.attrs.update(
+        {
+            "units": f"hours since {start.replace('T', ' ')}",
+            "calendar": "standard",
+            "_ARRAY_DIMENSIONS": ["time"],
+        }
+    )
+
+    rng = np.random.default_rng(seed)
+    codec = make_compressor(compressor)
+    time_chunk = chunks[0]
+    for name in variables:
+        array = group.create(
+            name,
+            shape=(n_times, n_latitudes, n_longitudes),
+            chunks=chunks,
+            dtype=dtype,
+            compressor=codec,
+            fill_value=np.nan,
+        )
+        array.attrs["_ARRAY_DIMENSIONS"] = ["time", "latitude", "longitude"]
+        for time_start in range(0, n_times, time_chunk):
+            time_stop = min(time_start + time_chunk, n_times)
+            array[time_start:time_stop] = _synthetic_values(
+                rng, time_start, time_stop, n_latitudes, n_longitudes, dtype
+            )
+
+    zarr.consolidate_metadata(path)
+    return group
+
+
+def make_catalog_tree(
+    base_path: str, models: list[tuple[str, str]], **store_kwargs: object
+) -> list[str]:
+    """Write one synthetic store per weather model in the LocalCatalog layout
+
+    Args:
+        base_path (str): The catalog base path
+        models (list[tuple[str, str]]): (weather model group, weather model id) pairs
+        **store_kwargs: Passed on to make_synthetic_store
+
+    Returns:
+        list[str]: The paths of the written stores
+    """
+    paths = []
+    for weather_model_group, weather_model_id in models:
+        path = os.path.join(base_path, weather_model_group, f"{weather_model_id}.zarr")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        make_synthetic_store(path, **store_kwargs)  # type: ignore
+        paths.append(path)
+    return paths
+
+
+def _synthetic_values(
+    rng: np.random.Generator,
+    time_start: int,
+    time_stop: int,
+    n_latitudes: int,
+    n_longitudes: int,
+    dtype: str,
+) -> np.ndarray:
+    # a smooth field with a diurnal cycle plus noise, so compressors see
+    # realistic rather than best or worst case data
+    hours = np.arange(time_start, time_stop)[:, None, None]
+    latitudes = np.linspace(-1.0, 1.0, n_latitudes)[None, :, None]
+    longitudes = np.linspace(-1.0, 1.0, n_longitudes)[None, None, :]
+    field = (
+        288.0
+        - 30.0 * latitudes**2
+        + 5.0 * np.sin(2 * np.pi * (hours / 24.0 + longitudes / 2.0))
+    )
+    noise = rng.standard_normal((time_stop - time_start, n_latitudes, n_longitudes))
+    return (field + noise).astype(dtype)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--times", type=int, default=24 * 30)
+    parser.add_argument("--latitudes", type=int, default=181)
+    parser.add_argument("--longitudes", type=int, default=360)
+    parser.add_argument("--chunks", type=int, nargs=3, default=(24, 64, 64))
+    parser.add_argument("--compressor", choices=COMPRESSORS, default="blosc-lz4")
+    parser.add_argument("--dtype", default="float32")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    make_synthetic_store(
+        args.path,
+        n_times=args.times,
+        n_latitudes=args.latitudes,
+        n_longitudes=args.longitudes,
+        chunks=tuple(args.chunks),
+        compressor=args.compressor,
+        dtype=args.dtype,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,19 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 from weather_catalog.basemodel import BaseModel
 from weather_catalog.data import DataCube
+from weather_catalog.instrumentation import InstrumentationSingleton
 from weather_catalog.query import Query
+from weather_catalog.query_resolution.concurrency_limiter import (
+    DEFAULT_MAX_CONCURRENCY,
+    ConcurrencyLimiterSingleton,
+)
+from weather_catalog.query_resolution.result_cache import ResultCacheSingleton
 
 from .abstract_data_downloader import AbstractDataDownloader
 from .abstract_data_uploader import AbstractDataUploader
+from .catalog_coverage import CatalogCoverage
 
 
 class AbstractCatalog(ABC, BaseModel):
@@ -15,12 +23,56 @@ class AbstractCatalog(ABC, BaseModel):
     downloader: AbstractDataDownloader
     uploader: AbstractDataUploader
 
+    # how many aget_data / QueryResolver.aresolve calls on this catalog run
+    # at once on an event loop
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+
     @abstractmethod
     def can_source(self, query: Query) -> bool:
         pass
 
+    def coverage(self) -> Optional[list[CatalogCoverage]]:
+        """Describe the weather models, variables, extents, ... this catalog serves
+
+        used by the catalog selector to index catalogs, catalogs that can not
+        describe their coverage return None and are only asked through can_source
+
+        Returns:
+            Optional[list[CatalogCoverage]]: One entry per store, None if unknown
+        """
+        return None
+
     def get_data(self, query: Query) -> DataCube:
-        return self.downloader.download_data(query)
+        with InstrumentationSingleton.span("catalog.open", catalog_id=self.catalog_id):
+            data = self.downloader.download_data(query)
+        data.catalog_id = self.catalog_id
+        return data
+
+    async def aget_data(self, query: Query) -> DataCube:
+        """Open the data cube of a query without blocking the event loop
+
+        Args:
+            query (Query): The query to open the data of
+
+        Returns:
+            DataCube: As returned by get_data
+        """
+        async with ConcurrencyLimiterSingleton.limit(
+            self.catalog_id, self.max_concurrency
+        ):
+            with InstrumentationSingleton.span(
+                "catalog.open", catalog_id=self.catalog_id
+            ):
+                data = await self.downloader.adownload_data(query)
+        data.catalog_id = self.catalog_id
+        return data
 
     def upload_data(self, data: DataCube, query: Query) -> bool:
-        return self.uploader.upload_data(data, query)
+        uploaded = self.uploader.upload_data(data, query)
+        # cached results of the overwritten store are stale now
+        ResultCacheSingleton.invalidate(
+            catalog_id=self.catalog_id,
+            weather_model_group=query.weather_model_group,
+            weather_model_id=query.weather_model_id,
+        )
+        return uploaded
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 from weather_catalog.basemodel import BaseModel
@@ -10,3 +11,17 @@ class AbstractDataDownloader(ABC, BaseModel):
     @abstractmethod
     def download_data(self, query: Query) -> DataCube:
         pass
+
+    async def adownload_data(self, query: Query) -> DataCube:
+        """Open the data cube of a query without blocking the event loop
+
+        download_data runs in a thread unless a downloader overrides this
+        with a natively async implementation
+
+        Args:
+            query (Query): The query to open the data of
+
+        Returns:
+            DataCube: As returned by download_data
+        """
+        return await asyncio.to_thread(self.download_data, query)
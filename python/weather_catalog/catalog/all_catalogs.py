@@ -1,10 +1,63 @@
 import os
+from functools import lru_cache
+from importlib.metadata import entry_points
+from typing import Any
+
+from loguru import logger
 
 from .abstract_catalog import AbstractCatalog
-from .local_catalog.local_catalog import LocalCatalog
 
-all_catalogs: list[AbstractCatalog] = [
-    LocalCatalog(
-        base_path=os.path.join(os.path.dirname(__file__), "local_catalog_data")
-    )
-]
+CATALOG_ENTRY_POINT_GROUP = "weather_catalog.catalogs"
+
+
+def _builtin_catalogs() -> list[AbstractCatalog]:
+    from .local_catalog.local_catalog import LocalCatalog
+
+    return [
+        LocalCatalog(
+            base_path=os.path.join(os.path.dirname(__file__), "local_catalog_data")
+        )
+    ]
+
+
+def _entry_point_catalogs() -> list[AbstractCatalog]:
+    """Load catalogs registered by other packages
+
+    a package registers catalogs under the "weather_catalog.catalogs"
+    entry point group, pointing at a catalog instance, a list of catalogs,
+    or a callable returning either:
+
+    ```toml
+    [project.entry-points."weather_catalog.catalogs"]
+    my_s3 = "my_package.catalogs:build_catalogs"
+    ```
+    """
+    catalogs: list[AbstractCatalog] = []
+    for entry_point in entry_points(group=CATALOG_ENTRY_POINT_GROUP):
+        try:
+            loaded: Any = entry_point.load()
+            if callable(loaded) and not isinstance(loaded, AbstractCatalog):
+                loaded = loaded()
+        except Exception as e:
+            logger.error(f"Could not load catalog entry point {entry_point.name}: {e}")
+            continue
+        catalogs.extend(loaded if isinstance(loaded, (list, tuple)) else [loaded])
+    return catalogs
+
+
+@lru_cache(maxsize=None)
+def get_all_catalogs() -> tuple[AbstractCatalog, ...]:
+    """Build every known catalog, on first use rather than at import
+
+    Returns:
+        tuple[AbstractCatalog, ...]: The built-in catalogs followed by the
+            ones registered through entry points
+    """
+    return tuple(_builtin_catalogs() + _entry_point_catalogs())
+
+
+def __getattr__(name: str) -> Any:
+    # kept for code importing the former module level list
+    if name == "all_catalogs":
+        return list(get_all_catalogs())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
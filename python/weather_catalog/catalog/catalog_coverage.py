@@ -0,0 +1,116 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from weather_catalog.basemodel import BaseModel
+from weather_catalog.enums import Frequency, Resolution, WeatherVariable
+from weather_catalog.query import Query
+
+# a store of one frequency can be resampled to any coarser one
+_FREQUENCY_RANK = {Frequency.HOURLY: 0, Frequency.DAILY: 1, Frequency.MONTHLY: 2}
+
+
+class CatalogCoverage(BaseModel):
+    """Describes what a single weather model store of a catalog can serve
+
+    published by catalogs so that the catalog selector can pick one without
+    touching the stores, fields left as None are not restricted. frequency
+    is the native frequency of the store, queries at it or any coarser one
+    are covered. Queries only need to overlap the dates, the rows outside
+    are dropped.
+    """
+
+    weather_model_group: str
+    weather_model_id: str
+    variables: Optional[list[WeatherVariable]] = None
+
+    min_latitude: Optional[float] = None
+    max_latitude: Optional[float] = None
+    min_longitude: Optional[float] = None
+    max_longitude: Optional[float] = None
+
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+    resolution: Optional[Resolution] = None
+    frequency: Optional[Frequency] = None
+
+    def covers(self, query: Query) -> bool:
+        """Check whether a query falls within this coverage
+
+        Args:
+            query (Query): The query to check
+
+        Returns:
+            bool: True if the store can serve the query
+        """
+        if (
+            query.weather_model_group != self.weather_model_group
+            or query.weather_model_id != self.weather_model_id
+        ):
+            return False
+        if self.variables is not None and not all(
+            variable in self.variables for variable in query.variables
+        ):
+            return False
+        if self.resolution is not None and query.resolution != self.resolution:
+            return False
+        if (
+            self.frequency is not None
+            and _FREQUENCY_RANK[query.frequency] < _FREQUENCY_RANK[self.frequency]
+        ):
+            return False
+        if self.start_date is not None and _naive_utc(query.end_date) < _naive_utc(
+            self.start_date
+        ):
+            return False
+        if self.end_date is not None and _naive_utc(query.start_date) > _naive_utc(
+            self.end_date
+        ):
+            return False
+        return self._covers_location(query)
+
+    def _covers_location(self, query: Query) -> bool:
+        bounds = getattr(query.location, "bounds", None)
+        if bounds is not None:
+            return self._overlaps(*bounds())
+
+        latitude = getattr(query.location, "latitude", None)
+        longitude = getattr(query.location, "longitude", None)
+        if latitude is not None:
+            if self.min_latitude is not None and latitude < self.min_latitude:
+                return False
+            if self.max_latitude is not None and latitude > self.max_latitude:
+                return False
+        if longitude is not None:
+            if self.min_longitude is not None and longitude < self.min_longitude:
+                return False
+            if self.max_longitude is not None and longitude > self.max_longitude:
+                return False
+        return True
+
+    def _overlaps(
+        self,
+        min_latitude: float,
+        max_latitude: float,
+        min_longitude: float,
+        max_longitude: float,
+    ) -> bool:
+        # regions only need to overlap the coverage, the cells outside are dropped
+        if self.max_latitude is not None and min_latitude > self.max_latitude:
+            return False
+        if self.min_latitude is not None and max_latitude < self.min_latitude:
+            return False
+        if min_longitude > max_longitude:
+            # crosses the antimeridian, leave it to the data cube
+            return True
+        if self.max_longitude is not None and min_longitude > self.max_longitude:
+            return False
+        if self.min_longitude is not None and max_longitude < self.min_longitude:
+            return False
+        return True
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
@@ -1,25 +1,237 @@
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Optional
+
+from loguru import logger
+
+from weather_catalog.instrumentation import InstrumentationSingleton
 from weather_catalog.query import Query
 
 from .abstract_catalog import AbstractCatalog
-from .all_catalogs import all_catalogs
+from .all_catalogs import get_all_catalogs
+from .catalog_coverage import CatalogCoverage
+
+MANIFEST_VERSION = 1
 
 
 class CatalogSelectorClass:
     """
     Class to select a catalog based on a query
+
+    every catalog publishes its coverage (see AbstractCatalog.coverage), which
+    is indexed by weather model so that selection only looks at the handful of
+    stores serving the queried model. Coverage can be loaded from a manifest
+    written by `write_manifest`, so no store is touched at startup.
+
+    can_source results, positive and negative, are cached per
+    (catalog, weather model group, weather model id) for a limited time.
     """
 
-    def __init__(self, catalogs: list[AbstractCatalog]):
+    def __init__(
+        self,
+        catalogs: list[AbstractCatalog],
+        manifest_path: Optional[str] = None,
+        positive_ttl_seconds: float = 300.0,
+        negative_ttl_seconds: float = 60.0,
+    ):
         self.catalogs = catalogs
+        self.manifest_path = manifest_path
+        self.positive_ttl_seconds = positive_ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+        self._catalogs_by_id = {catalog.catalog_id: catalog for catalog in catalogs}
+        self._coverage_index: Optional[
+            dict[tuple[str, str], list[tuple[AbstractCatalog, CatalogCoverage]]]
+        ] = None
+        self._uncovered_catalogs: list[AbstractCatalog] = []
+        self._can_source_cache: dict[tuple[str, str, str], tuple[bool, float]] = {}
+        self._lock = threading.Lock()
 
     def select_catalog(self, query: Query) -> AbstractCatalog:
-        return self.catalogs[0]  # for testing
+        """Select the first catalog whose coverage includes the query
+
+        catalogs that do not publish a coverage are tried afterwards,
+        in order, through can_source
+
+        Args:
+            query (Query): The query to find a catalog for
+
+        Returns:
+            AbstractCatalog: The selected catalog
+        """
+        with InstrumentationSingleton.span("catalog.select") as span:
+            coverage_index, uncovered_catalogs = self._get_coverage_index()
+
+            for catalog, coverage in coverage_index.get(
+                (query.weather_model_group, query.weather_model_id), []
+            ):
+                if coverage.covers(query) and self.can_source(catalog, query):
+                    span.set(catalog_id=catalog.catalog_id)
+                    return catalog
+
+            for catalog in uncovered_catalogs:
+                if self.can_source(catalog, query):
+                    span.set(catalog_id=catalog.catalog_id)
+                    return catalog
+
+        raise ValueError(
+            f"No catalog can source weather model "
+            f"{query.weather_model_group}/{query.weather_model_id} for query {query}"
+        )
 
     def get_catalog_by_id(self, catalog_id: str) -> AbstractCatalog:
+        try:
+            return self._catalogs_by_id[catalog_id]
+        except KeyError:
+            raise ValueError(f"Catalog with id {catalog_id} not found")
+
+    def can_source(self, catalog: AbstractCatalog, query: Query) -> bool:
+        """Ask a catalog whether it can source a query, caching the answer
+
+        Args:
+            catalog (AbstractCatalog): The catalog to ask
+            query (Query): The query to source
+
+        Returns:
+            bool: the (possibly cached) answer of catalog.can_source
+        """
+        key = (catalog.catalog_id, query.weather_model_group, query.weather_model_id)
+        now = time.monotonic()
+        cached = self._can_source_cache.get(key)
+        if cached is not None and cached[1] > now:
+            InstrumentationSingleton.count("can_source_cache_hits")
+            return cached[0]
+        InstrumentationSingleton.count("can_source_cache_misses")
+
+        result = catalog.can_source(query)
+        ttl = self.positive_ttl_seconds if result else self.negative_ttl_seconds
+        self._can_source_cache[key] = (result, now + ttl)
+        return result
+
+    def invalidate(self) -> None:
+        """Forget cached can_source results and rebuild the coverage index on next use"""
+        with self._lock:
+            self._coverage_index = None
+            self._uncovered_catalogs = []
+            self._can_source_cache.clear()
+
+    def write_manifest(self, path: Optional[str] = None) -> str:
+        """Collect the coverage of every catalog and save it as a JSON manifest
+
+        Args:
+            path (Optional[str]): Where to write the manifest, defaults to manifest_path
+
+        Returns:
+            str: The path of the written manifest
+        """
+        path = path or self.manifest_path
+        if path is None:
+            raise ValueError("No manifest path given")
+
+        manifest: dict[str, Any] = {"version": MANIFEST_VERSION, "catalogs": {}}
+        for catalog in self.catalogs:
+            coverages = self._catalog_coverage(catalog)
+            if coverages is not None:
+                manifest["catalogs"][catalog.catalog_id] = [
+                    coverage.model_dump(mode="json") for coverage in coverages
+                ]
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporary_path, path)
+        return path
+
+    def _get_coverage_index(
+        self,
+    ) -> tuple[
+        dict[tuple[str, str], list[tuple[AbstractCatalog, CatalogCoverage]]],
+        list[AbstractCatalog],
+    ]:
+        coverage_index = self._coverage_index
+        if coverage_index is not None:
+            return coverage_index, self._uncovered_catalogs
+
+        with self._lock:
+            if self._coverage_index is None:
+                with InstrumentationSingleton.span(
+                    "catalog.build_coverage_index", catalogs=len(self.catalogs)
+                ):
+                    self._build_coverage_index()
+            return self._coverage_index, self._uncovered_catalogs  # type: ignore
+
+    def _build_coverage_index(self) -> None:
+        manifest = self._read_manifest()
+        coverage_index: dict[
+            tuple[str, str], list[tuple[AbstractCatalog, CatalogCoverage]]
+        ] = {}
+        uncovered_catalogs = []
+
         for catalog in self.catalogs:
-            if catalog.catalog_id == catalog_id:
-                return catalog
-        raise ValueError(f"Catalog with id {catalog_id} not found")
+            if catalog.catalog_id in manifest:
+                coverages: Optional[list[CatalogCoverage]] = manifest[catalog.catalog_id]
+            else:
+                coverages = self._catalog_coverage(catalog)
+
+            if coverages is None:
+                uncovered_catalogs.append(catalog)
+                continue
+            for coverage in coverages:
+                coverage_index.setdefault(
+                    (coverage.weather_model_group, coverage.weather_model_id), []
+                ).append((catalog, coverage))
+
+        self._uncovered_catalogs = uncovered_catalogs
+        self._coverage_index = coverage_index
+
+    def _read_manifest(self) -> dict[str, list[CatalogCoverage]]:
+        if self.manifest_path is None or not os.path.exists(self.manifest_path):
+            return {}
+
+        with open(self.manifest_path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            logger.warning(
+                f"Ignoring catalog manifest {self.manifest_path} "
+                f"with unsupported version {manifest.get('version')}"
+            )
+            return {}
+        return {
+            catalog_id: [CatalogCoverage(**coverage) for coverage in coverages]
+            for catalog_id, coverages in manifest["catalogs"].items()
+        }
+
+    @staticmethod
+    def _catalog_coverage(catalog: AbstractCatalog) -> Optional[list[CatalogCoverage]]:
+        try:
+            return catalog.coverage()
+        except Exception as e:
+            logger.warning(
+                f"Could not describe the coverage of catalog {catalog.catalog_id}, "
+                f"falling back to can_source: {e}"
+            )
+            return None
+
+
+@lru_cache(maxsize=None)
+def get_catalog_selector() -> CatalogSelectorClass:
+    """The process wide catalog selector, built on first use
+
+    reads its coverage from the manifest at $WEATHER_CATALOG_MANIFEST if set
+    """
+    return CatalogSelectorClass(
+        catalogs=list(get_all_catalogs()),
+        manifest_path=os.environ.get("WEATHER_CATALOG_MANIFEST"),
+    )
 
 
-CatalogSelectorSingleton = CatalogSelectorClass(catalogs=all_catalogs)
+def __getattr__(name: str) -> Any:
+    # CatalogSelectorSingleton is created lazily so that importing this module
+    # does not construct (and possibly connect to) every catalog
+    if name == "CatalogSelectorSingleton":
+        return get_catalog_selector()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
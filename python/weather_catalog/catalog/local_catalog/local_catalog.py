@@ -1,4 +1,12 @@
+import os
+from typing import Optional
+
+import numpy as np
+
 from weather_catalog.catalog.abstract_catalog import AbstractCatalog
+from weather_catalog.catalog.catalog_coverage import CatalogCoverage
+from weather_catalog.data.reference_index import REFERENCE_INDEX_SUFFIXES
+from weather_catalog.enums import Coordinate, Frequency, Resolution
 from weather_catalog.query import Query
 
 from .local_data_downloader import LocalDataDownloader
@@ -10,6 +18,10 @@ class LocalCatalog(AbstractCatalog):
 
     Used mainly for testing and development
 
+    Args:
+        base_path (str): The directory holding <model group>/<model id>.zarr
+        memory_map (bool): Serve stores converted with
+            weather_catalog.data.memmap_store through numpy.memmap
     """
 
     catalog_id: str = "local"
@@ -17,10 +29,82 @@ class LocalCatalog(AbstractCatalog):
     downloader: LocalDataDownloader
     uploader: LocalDataUploader
 
-    def __init__(self, base_path: str):
-        downloader = LocalDataDownloader(base_path=base_path)
+    def __init__(self, base_path: str, memory_map: bool = True):
+        downloader = LocalDataDownloader(base_path=base_path, memory_map=memory_map)
         uploader = LocalDataUploader(base_path=base_path)
         super().__init__(downloader=downloader, uploader=uploader)  # type: ignore
 
     def can_source(self, query: Query) -> bool:
-        return True
+        return os.path.exists(self.downloader._convert_query_to_relative_path(query))
+
+    def coverage(self) -> Optional[list[CatalogCoverage]]:
+        """Scan <base_path>/<model group>/<model id>.zarr and describe every store
+
+        NetCDF archives indexed into <model id>.refs.json or .refs.parquet
+        (see weather_catalog.data.reference_index) are described as well
+
+        Returns:
+            Optional[list[CatalogCoverage]]: One entry per store found
+        """
+        base_path = self.downloader.base_path
+        if not os.path.isdir(base_path):
+            return []
+
+        coverages = []
+        for weather_model_group in sorted(os.listdir(base_path)):
+            group_path = os.path.join(base_path, weather_model_group)
+            if not os.path.isdir(group_path):
+                continue
+            for store_name in sorted(os.listdir(group_path)):
+                for suffix in (".zarr",) + REFERENCE_INDEX_SUFFIXES:
+                    if store_name.endswith(suffix):
+                        weather_model_id = store_name[: -len(suffix)]
+                        if suffix != ".zarr" and os.path.isdir(
+                            os.path.join(group_path, f"{weather_model_id}.zarr")
+                        ):
+                            # the downloader opens the converted store instead
+                            break
+                        coverages.append(
+                            self._store_coverage(
+                                weather_model_group,
+                                weather_model_id,
+                                os.path.join(group_path, store_name),
+                            )
+                        )
+                        break
+        return coverages
+
+    def _store_coverage(
+        self, weather_model_group: str, weather_model_id: str, path: str
+    ) -> CatalogCoverage:
+        cube = self.downloader.open_store(path)
+        dataset = cube.dataset
+        latitudes = dataset[cube._coordinate_rename_map[Coordinate.LATITUDE]][...]
+        longitudes = dataset[cube._coordinate_rename_map[Coordinate.LONGITUDE]][...]
+        times = cube.time_index.times
+        attributes = dict(dataset.attrs)
+
+        return CatalogCoverage(
+            weather_model_group=weather_model_group,
+            weather_model_id=weather_model_id,
+            variables=[
+                variable
+                for variable, variable_name in self.downloader.variable_rename_map.items()
+                if variable_name in dataset
+            ],
+            min_latitude=float(np.nanmin(latitudes)),
+            max_latitude=float(np.nanmax(latitudes)),
+            min_longitude=float(np.nanmin(longitudes)),
+            max_longitude=float(np.nanmax(longitudes)),
+            start_date=times[0].astype("datetime64[us]").item() if times.size else None,
+            end_date=times[-1].astype("datetime64[us]").item() if times.size else None,
+            resolution=_enum_or_none(Resolution, attributes.get("resolution")),
+            frequency=_enum_or_none(Frequency, attributes.get("frequency")),
+        )
+
+
+def _enum_or_none(enum_class, value):  # type: ignore
+    try:
+        return enum_class(value) if value is not None else None
+    except ValueError:
+        return None
@@ -1,31 +1,116 @@
 import os
 
-import zarr
+from loguru import logger
 
 from weather_catalog.catalog.abstract_data_downloader import AbstractDataDownloader
 from weather_catalog.data import DataCube
+from weather_catalog.data.index_cache import IndexCacheSingleton
+from weather_catalog.data.memmap_data_cube import MemmapDataCube
+from weather_catalog.data.memmap_store import MEMMAP_LAYOUT, is_memmap_store
 from weather_catalog.data.zarray_data_cube import ZarrayDataCube
 from weather_catalog.enums import WeatherVariable
+from weather_catalog.instrumentation import InstrumentationSingleton
 from weather_catalog.query import Query
+from weather_catalog.query.location import PointLocation
+
+from .store_handle_pool import StoreHandlePoolSingleton
 
 
 class LocalDataDownloader(AbstractDataDownloader):
+    """Downloader for zarr stores kept under a local directory
+
+    Args:
+        base_path (str): The directory holding <model group>/<model id>.zarr
+        memory_map (bool): Serve uncompressed single chunk stores (see
+            weather_catalog.data.memmap_store) through MemmapDataCube
+    """
 
     base_path: str
 
+    memory_map: bool = True
+
+    variable_rename_map: dict[WeatherVariable, str] = {
+        WeatherVariable.TEMPERATURE: "t2m",
+        WeatherVariable.WIND_U: "u10m",
+        WeatherVariable.WIND_V: "v10m",
+    }
+
     def download_data(self, query: Query) -> DataCube:
-        path = self._convert_query_to_relative_path(query)
-        data_group = zarr.open(path, mode="r")
-        return ZarrayDataCube(
+        """Open the store of a query's weather model
+
+        when copies of the store with other chunk layouts exist (see
+        weather_catalog.data.rechunk), the one the query reads the fewest
+        chunks from is opened, the store itself on a tie
+
+        Args:
+            query (Query): The query to open the store for
+
+        Returns:
+            DataCube: The opened store or copy
+        """
+        path, copy_paths = StoreHandlePoolSingleton.locate(self._store_path(query))
+        cube = self.open_store(path)
+        copies = self._layout_copies(path, cube, copy_paths)
+        if not copies:
+            return cube
+
+        with InstrumentationSingleton.span("catalog.route_layout") as span:
+            location = query.location
+            region = None if isinstance(location, PointLocation) else location
+            candidates = [("primary", cube)] + copies
+            chunks_touched = [
+                candidate.chunks_touched(
+                    query.start_date, query.end_date, query.variables, region
+                )
+                for _, candidate in candidates
+            ]
+            best = chunks_touched.index(min(chunks_touched))
+            span.set(layout=candidates[best][0], chunks_touched=chunks_touched[best])
+            return candidates[best][1]
+
+    def open_store(self, path: str) -> ZarrayDataCube:
+        data_group = StoreHandlePoolSingleton.get(path)
+        cube_class = ZarrayDataCube
+        if self.memory_map and IndexCacheSingleton.get(
+            data_group, "memmap_store", is_memmap_store
+        ):
+            cube_class = MemmapDataCube
+        return cube_class(
             dataset=data_group,
-            variable_rename_map={
-                WeatherVariable.TEMPERATURE: "t2m",
-                WeatherVariable.WIND_U: "u10m",
-                WeatherVariable.WIND_V: "v10m",
-            },
+            variable_rename_map=self.variable_rename_map,
+            store_version=str(StoreHandlePoolSingleton.pooled_version(path)),
         )
 
+    def _layout_copies(
+        self, path: str, cube: ZarrayDataCube, copy_paths: dict[str, str]
+    ) -> list[tuple[str, ZarrayDataCube]]:
+        """The copies of a store holding the same times as the store itself"""
+        copies = []
+        times = cube.time_index.times
+        for layout, copy_path in copy_paths.items():
+            if layout == MEMMAP_LAYOUT and not self.memory_map:
+                continue
+            copy = self.open_store(copy_path)
+            copy_times = copy.time_index.times
+            if copy_times.size != times.size or (
+                times.size and copy_times[-1] != times[-1]
+            ):
+                logger.debug(f"Skipping {copy_path}, its times differ from {path}")
+                continue
+            copies.append((layout, copy))
+        return copies
+
     def _convert_query_to_relative_path(self, query: Query) -> str:
+        """The zarr store of the query's weather model, or its NetCDF reference index
+
+        Returns:
+            str: <base_path>/<model group>/<model id>.zarr if it exists, else
+                the first of <model id>.refs.json and .refs.parquet found
+        """
+        path, _ = StoreHandlePoolSingleton.locate(self._store_path(query))
+        return path
+
+    def _store_path(self, query: Query) -> str:
         return os.path.join(
             self.base_path, query.weather_model_group, f"{query.weather_model_id}.zarr"
         )
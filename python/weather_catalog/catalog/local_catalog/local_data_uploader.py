@@ -1,24 +1,116 @@
-import io
 import os
+import shutil
+
+from loguru import logger
+from zarr.hierarchy import Group
 
 from weather_catalog.catalog.abstract_data_uploader import AbstractDataUploader
 from weather_catalog.data import DataCube
+from weather_catalog.data.memmap_store import (
+    MEMMAP_LAYOUT,
+    stored_dimension_order,
+    write_memmap_store,
+)
+from weather_catalog.data.rechunk import layout_paths
+from weather_catalog.data.zarr_store_writer import ZarrStoreWriter, ZarrWriteOptions
 from weather_catalog.query import Query
 
+from .store_handle_pool import StoreHandlePoolSingleton
+
 
 class LocalDataUploader(AbstractDataUploader):
 
     base_path: str
 
+    write_options: ZarrWriteOptions = ZarrWriteOptions()
+
     def upload_data(self, data: DataCube, query: Query) -> bool:
+        """Write a data cube into the zarr store of the query's weather model
+
+        a new store is created if none exists yet, otherwise the data is
+        appended along the time axis of the existing store
+
+        Args:
+            data (DataCube): The data to write, backed by a zarr group
+            query (Query): The query identifying the weather model
+
+        Returns:
+            bool: True once the data is written
+        """
         path = self._convert_query_to_relative_path(query)
-        with open(path, "wb") as f:
-            return self.write_data(f, data)  # type: ignore
+        if os.path.isdir(path):
+            self.append_data(path, data)
+            return True
+        return self.write_data(path, data)
 
     def _convert_query_to_relative_path(self, query: Query) -> str:
         return os.path.join(
             self.base_path, query.weather_model_group, f"{query.weather_model_id}.zarr"
         )
 
-    def write_data(self, file: io.BytesIO, data: DataCube) -> bool:
-        raise NotImplementedError
+    def write_data(self, path: str, data: DataCube) -> bool:
+        """Write a data cube into a new store, replacing anything at path
+
+        copies of a replaced store with other chunk layouts are removed,
+        they would serve the replaced data
+
+        Args:
+            path (str): The path of the zarr store
+            data (DataCube): The data to write, backed by a zarr group
+
+        Returns:
+            bool: True once the data is written
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        for copy_path in layout_paths(path).values():
+            logger.info(f"Removing {copy_path}, a copy of the replaced store {path}")
+            shutil.rmtree(copy_path)
+            StoreHandlePoolSingleton.invalidate(copy_path)
+        try:
+            ZarrStoreWriter(self.write_options).write(self._source_group(data), path)
+        finally:
+            StoreHandlePoolSingleton.invalidate(path)
+        return True
+
+    def append_data(self, path: str, data: DataCube) -> int:
+        """Append the times of a data cube to the end of an existing store
+
+        only the chunks holding new times are written. Copies of the store
+        with other chunk layouts (see weather_catalog.data.rechunk) get the
+        new times too, keeping their chunking. The single chunk arrays of a
+        memmap copy can not grow, the copy is rewritten instead
+
+        Args:
+            path (str): The path of the zarr store
+            data (DataCube): The data to append, backed by a zarr group with
+                the same variables and grid as the store
+
+        Returns:
+            int: The number of appended times
+        """
+        source = self._source_group(data)
+        try:
+            appended = ZarrStoreWriter(self.write_options).append(source, path)
+        finally:
+            StoreHandlePoolSingleton.invalidate(path)
+
+        for layout, copy_path in layout_paths(path).items():
+            try:
+                if layout == MEMMAP_LAYOUT:
+                    write_memmap_store(
+                        path, copy_path, stored_dimension_order(copy_path)
+                    )
+                else:
+                    ZarrStoreWriter(self.write_options).append(source, copy_path)
+            finally:
+                StoreHandlePoolSingleton.invalidate(copy_path)
+        return appended
+
+    @staticmethod
+    def _source_group(data: DataCube) -> Group:
+        dataset = getattr(data, "dataset", None)
+        if not isinstance(dataset, Group):
+            raise TypeError(
+                f"LocalDataUploader can only write zarr backed data cubes, got {type(data)}"
+            )
+        return dataset
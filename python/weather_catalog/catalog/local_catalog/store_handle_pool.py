@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import zarr
+from loguru import logger
+from zarr.hierarchy import Group
+
+from weather_catalog.data.chunk_cache import ChunkCacheSingleton
+from weather_catalog.data.index_cache import IndexCacheSingleton
+from weather_catalog.data.rechunk import layout_paths
+from weather_catalog.data.reference_index import (
+    REFERENCE_INDEX_SUFFIXES,
+    open_reference_store,
+)
+from weather_catalog.data.region_mask import RegionMaskCacheSingleton
+from weather_catalog.data.store_key import store_key
+from weather_catalog.instrumentation import InstrumentationSingleton
+
+CONSOLIDATED_METADATA_KEY = ".zmetadata"
+
+
+class _StoreHandle(NamedTuple):
+    group: Group
+    version: int
+    checked_at: float
+
+
+class _StoreLocation(NamedTuple):
+    path: str
+    layout_paths: dict[str, str]
+    checked_at: float
+
+
+class StoreHandlePool:
+    """Pool of opened zarr groups, keyed by store path
+
+    opening a directory store walks the directory and parses the
+    .zarray/.zattrs JSON of every variable, so groups are opened once
+    (through consolidated metadata when it is up to date) and reused until
+    the mtime of the store's metadata changes.
+
+    Args:
+        revalidate_after_seconds (float): How long a handle is trusted before
+            the store's mtime is checked again, so warm queries do no I/O at all
+    """
+
+    def __init__(self, revalidate_after_seconds: float = 1.0):
+        self.revalidate_after_seconds = revalidate_after_seconds
+        self._handles: dict[str, _StoreHandle] = {}
+        self._locations: dict[str, _StoreLocation] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Group:
+        """Get an opened, read only group for a zarr directory store
+
+        Args:
+            path (str): The path of the zarr store
+
+        Returns:
+            Group: The opened zarr group
+        """
+        path = os.path.abspath(path)
+        handle = self._handles.get(path)
+        now = time.monotonic()
+        if handle is not None and now - handle.checked_at < self.revalidate_after_seconds:
+            InstrumentationSingleton.count("store_pool_hits")
+            return handle.group
+
+        with self._lock:
+            handle = self._handles.get(path)
+            version = self.version(path)
+            if handle is not None and handle.version == version:
+                self._handles[path] = handle._replace(checked_at=now)
+                InstrumentationSingleton.count("store_pool_hits")
+                return handle.group
+            InstrumentationSingleton.count("store_pool_misses")
+
+            if handle is not None:
+                logger.debug(f"Store {path} changed on disk, reopening it")
+                self._invalidate_caches(handle.group)
+
+            with InstrumentationSingleton.span("store.open", path=path):
+                group = self._open(path)
+            self._handles[path] = _StoreHandle(
+                group=group, version=self.version(path), checked_at=now
+            )
+            return group
+
+    def locate(self, path: str) -> tuple[str, dict[str, str]]:
+        """Find what serves a zarr store path and the copies of that store
+
+        the lookup is trusted for revalidate_after_seconds like the pooled
+        handles, so warm queries make no filesystem calls to find their store
+
+        Args:
+            path (str): The path of the zarr store
+
+        Returns:
+            tuple[str, dict[str, str]]: The path of the zarr store if it exists,
+                else of the first NetCDF reference index found next to it
+                (<model id>.refs.json or .refs.parquet), else path. Then the
+                copies of it with other layouts (see weather_catalog.data.rechunk),
+                by layout name
+        """
+        path = os.path.abspath(path)
+        location = self._locations.get(path)
+        now = time.monotonic()
+        if (
+            location is not None
+            and now - location.checked_at < self.revalidate_after_seconds
+        ):
+            return location.path, location.layout_paths
+
+        store_path = _located_store_path(path)
+        location = _StoreLocation(
+            path=store_path, layout_paths=layout_paths(store_path), checked_at=now
+        )
+        self._locations[path] = location
+        return location.path, location.layout_paths
+
+    def pooled_version(self, path: str) -> Optional[int]:
+        """The version a pooled handle was opened at, without touching the disk
+
+        Args:
+            path (str): The path of the zarr store
+
+        Returns:
+            Optional[int]: The version of the pooled handle, None if not pooled
+        """
+        handle = self._handles.get(os.path.abspath(path))
+        return handle.version if handle is not None else None
+
+    def version(self, path: str) -> int:
+        """The latest modification time of a store's metadata, used as its version
+
+        every .zarray/.zattrs is looked at, not only the consolidated
+        metadata, so writes by tools that do not consolidate are seen too
+
+        Args:
+            path (str): The path of the zarr store
+
+        Returns:
+            int: The latest mtime in nanoseconds of the store's metadata files,
+                of the store directory if it has none (or of the reference
+                index file)
+        """
+        if os.path.isfile(path):
+            return os.stat(path).st_mtime_ns
+        consolidated, latest = _metadata_mtimes(path)
+        versions = [mtime for mtime in (consolidated, latest) if mtime is not None]
+        return max(versions) if versions else os.stat(path).st_mtime_ns
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Close pooled handles so that they are reopened on next use
+
+        Args:
+            path (Optional[str]): The store to invalidate, all stores if None
+        """
+        with self._lock:
+            paths = list(self._handles) if path is None else [os.path.abspath(path)]
+            if path is None:
+                self._locations.clear()
+            else:
+                self._locations.pop(paths[0], None)
+            for pooled_path in paths:
+                handle = self._handles.pop(pooled_path, None)
+                if handle is not None:
+                    self._invalidate_caches(handle.group)
+
+    def _open(self, path: str) -> Group:
+        if os.path.isfile(path):
+            # a reference index of NetCDF files (weather_catalog.data.reference_index)
+            return open_reference_store(path)
+        # the read path never writes into the store: consolidated metadata is
+        # only used when it exists and no metadata was written after it
+        consolidated, latest = _metadata_mtimes(path)
+        if consolidated is not None and (latest is None or consolidated >= latest):
+            return zarr.open_consolidated(path, mode="r")
+        if consolidated is not None:
+            logger.debug(f"Consolidated metadata of {path} is stale, ignoring it")
+        return zarr.open_group(path, mode="r")
+
+    @staticmethod
+    def _invalidate_caches(group: Group) -> None:
+        key = store_key(group)
+        IndexCacheSingleton.invalidate(key)
+        ChunkCacheSingleton.invalidate(key)
+        RegionMaskCacheSingleton.invalidate(key)
+
+
+def _located_store_path(path: str) -> str:
+    if os.path.isdir(path):
+        return path
+    for suffix in REFERENCE_INDEX_SUFFIXES:
+        reference_path = f"{path[: -len('.zarr')]}{suffix}"
+        if os.path.isfile(reference_path):
+            return reference_path
+    return path
+
+
+def _metadata_mtimes(path: str) -> tuple[Optional[int], Optional[int]]:
+    """The mtime of a store's consolidated metadata and the latest of the rest
+
+    Returns:
+        tuple[Optional[int], Optional[int]]: The mtime in nanoseconds of
+            .zmetadata and the latest one of the .zgroup/.zattrs/.zarray
+            files of the group and its arrays, None for missing files
+    """
+    consolidated = _mtime(os.path.join(path, CONSOLIDATED_METADATA_KEY))
+    candidates = [os.path.join(path, key) for key in (".zgroup", ".zattrs")]
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir() and not entry.name.startswith("."):
+                    candidates.append(os.path.join(entry.path, ".zarray"))
+                    candidates.append(os.path.join(entry.path, ".zattrs"))
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    mtimes = [mtime for mtime in map(_mtime, candidates) if mtime is not None]
+    return consolidated, max(mtimes) if mtimes else None
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+StoreHandlePoolSingleton = StoreHandlePool()
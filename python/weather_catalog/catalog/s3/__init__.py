@@ -1,2 +1,2 @@
-from s3_downloader import S3DataDownloader  # noqa
-from session.s3_session import S3Session  # noqa
+from .s3_downloader import S3Downloader  # noqa
+from .session.s3_session import S3Session  # noqa
@@ -1,26 +1,150 @@
-import io
+import asyncio
 from abc import abstractmethod
+from typing import Any, Optional
+
+import zarr
+from pydantic import Field
+from zarr.hierarchy import Group
+from zarr.storage import ConsolidatedMetadataStore
 
 from weather_catalog.catalog.abstract_data_downloader import AbstractDataDownloader
 from weather_catalog.data import DataCube
+from weather_catalog.data.chunk_cache import _on_filesystem_loop
+from weather_catalog.data.read_policy import ReadPolicy
+from weather_catalog.instrumentation import InstrumentationSingleton
 from weather_catalog.query import Query
 
 from .session.s3_session import S3Session
 
+CONSOLIDATED_KEY = ".zmetadata"
+
+# fields of fsspec file info that change whenever a file is rewritten
+_VERSION_FIELDS = ("ETag", "LastModified", "mtime", "created")
+
 
 class S3Downloader(AbstractDataDownloader):
+    """Downloader for zarr stores kept in an S3 bucket
+
+    stores are opened over an fsspec mapper rather than downloaded,
+    so a query only fetches the consolidated metadata and the chunks it needs.
+    Missing chunks are fetched concurrently and retried according to
+    `read_policy`.
+
+    `filesystem` defaults to the shared S3 session and can be replaced by any
+    fsspec filesystem, e.g. an in-memory one or one pointed at a moto server.
+
+    cubes carry the ETag (or last modified time) of the consolidated metadata
+    as their store_version, writers re-consolidate after every write, which
+    keys cached results to the data they were resolved on. Stores without
+    consolidated metadata have no version.
+    """
 
     bucket_base_path: str
 
+    read_policy: ReadPolicy = ReadPolicy(max_concurrency=16, max_retries=3)
+
+    filesystem: Optional[Any] = Field(default=None, exclude=True)
+
     def download_data(self, query: Query) -> DataCube:
         path = self._convert_query_to_relative_path(query)
-        with S3Session.s3_fs.open(path, "rb") as f:
-            return self.read_in_data(f)
+        data = self.read_in_data(self._open_group(path))
+        data.store_version = self._store_version(path)
+        return data
+
+    async def adownload_data(self, query: Query) -> DataCube:
+        """Open the store of a query without blocking the event loop
+
+        the consolidated metadata is fetched on the event loop of the async
+        filesystem (s3fs), QueryResolver.aresolve then fetches chunks the
+        same way. Stores without consolidated metadata, and filesystems
+        without async support, are opened in a thread.
+
+        Args:
+            query (Query): The query to open the store of
+
+        Returns:
+            DataCube: As returned by download_data
+        """
+        filesystem = self.get_filesystem()
+        if not getattr(filesystem, "async_impl", False):
+            return await super().adownload_data(query)
+
+        path = self._convert_query_to_relative_path(query)
+        mapper = filesystem.get_mapper(path)
+        key = mapper._key_to_str(CONSOLIDATED_KEY)
+        with InstrumentationSingleton.span("store.open", path=path):
+            try:
+                metadata, info = await asyncio.gather(
+                    self.read_policy.acall(
+                        lambda: _on_filesystem_loop(
+                            filesystem, filesystem._cat_file(key)
+                        )
+                    ),
+                    self.read_policy.acall(
+                        lambda: _on_filesystem_loop(
+                            filesystem, filesystem._info(key, refresh=True)
+                        )
+                    ),
+                )
+            except FileNotFoundError:
+                return await super().adownload_data(query)
+            group = zarr.open_group(
+                ConsolidatedMetadataStore({CONSOLIDATED_KEY: metadata}),
+                mode="r",
+                chunk_store=mapper,
+            )
+        data = self.read_in_data(group)
+        data.store_version = _info_version(info)
+        return data
+
+    def _open_group(self, path: str) -> Group:
+        mapper = self.get_filesystem().get_mapper(path)
+        with InstrumentationSingleton.span("store.open", path=path):
+            try:
+                return self.read_policy.call(
+                    lambda: zarr.open_consolidated(mapper, mode="r")
+                )
+            except KeyError:
+                # store was written without consolidated metadata
+                return self.read_policy.call(lambda: zarr.open_group(mapper, mode="r"))
+
+    def _store_version(self, path: str) -> Optional[str]:
+        filesystem = self.get_filesystem()
+        key = filesystem.get_mapper(path)._key_to_str(CONSOLIDATED_KEY)
+        try:
+            # refresh, a listing cached by the filesystem may predate a write
+            info = self.read_policy.call(lambda: filesystem.info(key, refresh=True))
+        except FileNotFoundError:
+            return None
+        return _info_version(info)
+
+    def get_filesystem(self) -> Any:
+        if self.filesystem is not None:
+            return self.filesystem
+        return S3Session.s3_fs
 
     @abstractmethod
     def _convert_query_to_relative_path(self, query: Query) -> str:
         pass
 
     @abstractmethod
-    def read_in_data(self, file: io.BytesIO) -> DataCube:
+    def read_in_data(self, dataset: Group) -> DataCube:
+        """Wrap an opened zarr group into a DataCube
+
+        implementations should pass `self.read_policy` on to the cube
+        so that chunk reads use the downloader's concurrency and retries.
+
+        Args:
+            dataset (Group): The zarr group opened over the S3 mapper
+
+        Returns:
+            DataCube: The data cube for the query
+        """
         pass
+
+
+def _info_version(info: dict[str, Any]) -> Optional[str]:
+    for field in _VERSION_FIELDS:
+        if info.get(field) is not None:
+            return str(info[field])
+    return None
@@ -1,38 +1,159 @@
 import os
+import threading
+from typing import TYPE_CHECKING, Any, Optional
 
-import boto3
-import s3fs
 import yaml
 
+if TYPE_CHECKING:
+    import boto3
+    import s3fs
+
 
 class S3SessionObject:
+    """Lazily constructed, per process S3 client and filesystem
+
+    nothing is read or built on import: credentials are resolved and the
+    boto3 client / S3FileSystem are created on first use of `s3_client` or
+    `s3_fs`. A forked child (e.g. an Airflow task) builds its own session
+    the first time it needs one instead of reusing the parent's sockets.
+
+    credentials are taken from the secrets.yaml next to this file when it
+    exists, otherwise from the standard AWS chain (environment variables,
+    the `profile_name` / AWS_PROFILE profile, instance roles, ...).
+
+    Args:
+        region (str): The AWS region of the buckets
+        max_pool_connections (int): The size of the HTTP connection pool
+        keep_alive_seconds (float): How long idle connections are kept open
+        profile_name (Optional[str]): The AWS profile to resolve credentials from
+        secrets_path (Optional[str]): The secrets file to read credentials from
+    """
+
+    def __init__(
+        self,
+        region: Optional[str] = None,
+        max_pool_connections: Optional[int] = None,
+        keep_alive_seconds: Optional[float] = None,
+        profile_name: Optional[str] = None,
+        secrets_path: Optional[str] = None,
+    ):
+        self.region = region or os.environ.get("AWS_DEFAULT_REGION", "us-west-2")
+        self.max_pool_connections = max_pool_connections or int(
+            os.environ.get("WEATHER_CATALOG_S3_MAX_POOL_CONNECTIONS", 64)
+        )
+        self.keep_alive_seconds = keep_alive_seconds or float(
+            os.environ.get("WEATHER_CATALOG_S3_KEEPALIVE_SECONDS", 60)
+        )
+        self.profile_name = profile_name or os.environ.get("AWS_PROFILE")
+        self.secrets_path = secrets_path or os.path.join(
+            os.path.dirname(__file__), "secrets.yaml"
+        )
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._s3_client: Optional["boto3.client"] = None
+        self._s3_fs: Optional["s3fs.S3FileSystem"] = None
 
-    region: str = "us-west-2"
+    @property
+    def s3_client(self) -> "boto3.client":
+        self._ensure_process_session()
+        if self._s3_client is None:
+            with self._lock:
+                if self._s3_client is None:
+                    self._s3_client = self._create_client()
+        return self._s3_client
 
-    s3_client: boto3.client
-    s3_fs: s3fs.S3FileSystem
+    @property
+    def s3_fs(self) -> "s3fs.S3FileSystem":
+        self._ensure_process_session()
+        if self._s3_fs is None:
+            with self._lock:
+                if self._s3_fs is None:
+                    self._s3_fs = self._create_filesystem()
+        return self._s3_fs
 
-    def __init__(self):
-        secrets = self._read_secrets()
-        self.s3_client = boto3.client(
-            "s3", aws_access_key_id=secrets["aws_access_key_id"], aws_secret_access_key=secrets["aws_secret_access_key"]
+    def configure(self, **settings: Any) -> None:
+        """Change session settings, the client and filesystem are rebuilt on next use
+
+        Args:
+            **settings: Any of the constructor arguments
+        """
+        for name, value in settings.items():
+            if name not in (
+                "region",
+                "max_pool_connections",
+                "keep_alive_seconds",
+                "profile_name",
+                "secrets_path",
+            ):
+                raise ValueError(f"Unknown S3 session setting: {name}")
+            setattr(self, name, value)
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop the client and filesystem, they are rebuilt on next use"""
+        self._s3_client = None
+        self._s3_fs = None
+        self._pid = None
+
+    def _ensure_process_session(self) -> None:
+        pid = os.getpid()
+        if self._pid != pid:
+            # sessions and their connection pools must not be shared across a fork
+            self._s3_client = None
+            self._s3_fs = None
+            self._pid = pid
+
+    def _create_client(self) -> "boto3.client":
+        import boto3
+        from botocore.config import Config
+
+        credentials = self._read_secrets()
+        session = boto3.session.Session(
+            aws_access_key_id=credentials.get("aws_access_key_id"),
+            aws_secret_access_key=credentials.get("aws_secret_access_key"),
+            profile_name=None if credentials else self.profile_name,
+            region_name=self.region,
         )
+        return session.client(
+            "s3",
+            config=Config(
+                max_pool_connections=self.max_pool_connections,
+                tcp_keepalive=True,
+            ),
+        )
+
+    def _create_filesystem(self) -> "s3fs.S3FileSystem":
+        import s3fs
 
-        self.fs = s3fs.S3FileSystem(
-            key=secrets["aws_access_key_id"],
-            secret=secrets["aws_secret_access_key"],
-            region_name="us-west-2",
+        credentials = self._read_secrets()
+        return s3fs.S3FileSystem(
+            key=credentials.get("aws_access_key_id"),
+            secret=credentials.get("aws_secret_access_key"),
+            profile=None if credentials else self.profile_name,
+            client_kwargs={"region_name": self.region},
+            config_kwargs={
+                "max_pool_connections": self.max_pool_connections,
+                "connector_args": {"keepalive_timeout": self.keep_alive_seconds},
+            },
+            skip_instance_cache=True,
         )
 
     def _read_secrets(self) -> dict:
-        secrets_path = os.path.join(os.path.dirname(__file__), "secrets.yaml")
+        """Read credentials from the secrets file, empty if there is none"""
+        if not os.path.exists(self.secrets_path):
+            return {}
+
         # TODO: this is bad practice, should fix to avoid using a secrets file
-        with open(secrets_path, "r") as f:
-            secrets = yaml.safe_load(f)
+        with open(self.secrets_path, "r") as f:
+            secrets = yaml.safe_load(f) or {}
 
         if not all(x in secrets for x in ["aws_access_key_id", "aws_secret_access_key"]):
-            raise ValueError(f"Missing AWS credentials in secrets.yaml, please add them to {secrets_path}")
+            raise ValueError(f"Missing AWS credentials in secrets.yaml, please add them to {self.secrets_path}")
         return secrets
 
 
 S3Session = S3SessionObject()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=S3Session.reset)
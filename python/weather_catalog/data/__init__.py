@@ -1,7 +1,23 @@
+from typing import Any
+
 from .data_cube import DataCube
-from .zarray_data_cube import ZarrayDataCube
 
 __all__ = [
     "DataCube",
+    "MemmapDataCube",
     "ZarrayDataCube",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # zarr backed cubes are imported on first use, keeping zarr off the
+    # import path of code that only handles queries and results
+    if name == "ZarrayDataCube":
+        from .zarray_data_cube import ZarrayDataCube
+
+        return ZarrayDataCube
+    if name == "MemmapDataCube":
+        from .memmap_data_cube import MemmapDataCube
+
+        return MemmapDataCube
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,126 @@
+from typing import NamedTuple, Union
+
+import numpy as np
+from zarr.core import Array
+
+from weather_catalog.enums import Coordinate
+
+DIMENSIONS_ATTRIBUTE = "_ARRAY_DIMENSIONS"
+
+# layout assumed for variables written without dimension attributes
+DEFAULT_DIMENSIONS = (
+    Coordinate.TIME.value,
+    Coordinate.LATITUDE.value,
+    Coordinate.LONGITUDE.value,
+)
+
+Selection = tuple[Union[int, slice], ...]
+
+
+def array_dimensions(array: Array) -> tuple[str, ...]:
+    """The dimension names of an array, from its `_ARRAY_DIMENSIONS` attribute
+
+    arrays without the attribute are taken to be coordinates when 1-D and
+    (time, latitude, longitude) variables when 3-D
+
+    Args:
+        array (Array): A zarr array
+
+    Returns:
+        tuple[str, ...]: One name per dimension, in storage order
+    """
+    dimensions = array.attrs.get(DIMENSIONS_ATTRIBUTE)
+    if dimensions is not None:
+        return tuple(dimensions)
+    name = array.basename
+    if array.ndim == 0:
+        return ()
+    if array.ndim == 1:
+        return (name,)
+    if array.ndim == len(DEFAULT_DIMENSIONS):
+        return DEFAULT_DIMENSIONS
+    raise ValueError(f"Array {name} has no {DIMENSIONS_ATTRIBUTE} attribute")
+
+
+class ArrayLayout(NamedTuple):
+    """Where the time, y and x dimensions of a variable sit in its stored array
+
+    the read path works in (time, y, x) order whatever order a store was
+    written in, selections are permuted into storage order before reading
+    and values back into (time, y, x) order after.
+
+    Args:
+        axes (tuple[int, int, int]): The storage axis of time, y and x
+        shape (tuple[int, int, int]): The (time, y, x) shape
+        chunks (tuple[int, int, int]): The (time, y, x) chunk shape
+    """
+
+    axes: tuple[int, int, int]
+    shape: tuple[int, int, int]
+    chunks: tuple[int, int, int]
+
+    @property
+    def is_time_first(self) -> bool:
+        return self.axes == (0, 1, 2)
+
+    def to_storage(self, selection: Selection) -> Selection:
+        """Permute a (time, y, x) selection into storage order"""
+        storage_selection: list[Union[int, slice]] = [slice(None)] * 3
+        for item, axis in zip(selection, self.axes):
+            storage_selection[axis] = item
+        return tuple(storage_selection)
+
+    def to_logical(self, values: np.ndarray, selection: Selection) -> np.ndarray:
+        """Transpose values read with to_storage(selection) into (time, y, x) order
+
+        dimensions selected with an integer are dropped, like in numpy
+        """
+        kept = [
+            logical
+            for logical, axis in sorted(enumerate(self.axes), key=lambda item: item[1])
+            if isinstance(selection[logical], slice)
+        ]
+        order = np.argsort(kept)
+        if (order == np.arange(order.size)).all():
+            return values
+        return values.transpose(order)
+
+    def time_chunks(self, time_slice: slice) -> int:
+        """How many chunks along time hold the range of time_slice"""
+        start, stop, _ = time_slice.indices(self.shape[0])
+        if stop <= start:
+            return 0
+        return (stop - 1) // self.chunks[0] - start // self.chunks[0] + 1
+
+
+def build_array_layout(
+    array: Array, time_dimension: str, y_dimension: str, x_dimension: str
+) -> ArrayLayout:
+    """Locate the time, y and x dimensions of a variable
+
+    Args:
+        array (Array): A 3-D zarr variable
+        time_dimension (str): The name of the time dimension
+        y_dimension (str): The name of the latitude (or y) dimension
+        x_dimension (str): The name of the longitude (or x) dimension
+
+    Returns:
+        ArrayLayout: The layout of the variable
+    """
+    dimensions = array.attrs.get(DIMENSIONS_ATTRIBUTE)
+    if dimensions is None and array.ndim == 3:
+        # written without dimension attributes, taken to be (time, y, x)
+        dimensions = [time_dimension, y_dimension, x_dimension]
+    expected = (time_dimension, y_dimension, x_dimension)
+    if dimensions is None or sorted(dimensions) != sorted(expected):
+        raise ValueError(
+            f"Array {array.basename} has dimensions {dimensions}, "
+            f"expected a permutation of {list(expected)}"
+        )
+
+    axes = tuple(list(dimensions).index(dimension) for dimension in expected)
+    return ArrayLayout(
+        axes=axes,  # type: ignore
+        shape=tuple(array.shape[axis] for axis in axes),  # type: ignore
+        chunks=tuple(array.chunks[axis] for axis in axes),  # type: ignore
+    )
@@ -0,0 +1,77 @@
+import json
+from typing import TYPE_CHECKING, Any, Union
+
+import numpy as np
+import pandas as pd
+
+from weather_catalog.enums import OutputFormat
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+DataOutput = Union[pd.DataFrame, "pa.Table", "pa.RecordBatch"]
+
+METADATA_KEY = b"weather_catalog"
+
+
+def build_record_batch(
+    times: np.ndarray, columns: dict[str, np.ndarray], metadata: dict[str, Any]
+) -> "pa.RecordBatch":
+    """Wrap numpy arrays into an Arrow record batch without copying them
+
+    numeric and datetime64 arrays without nulls are handed to Arrow
+    as they are, the batch shares their buffers.
+
+    Args:
+        times (np.ndarray): The datetime64[ns] time coordinate of the rows
+        columns (dict[str, np.ndarray]): One 1-D array per output column
+        metadata (dict[str, Any]): JSON serializable metadata (requested and
+            grid coordinates, time range, ...) stored in the schema
+
+    Returns:
+        pa.RecordBatch: A batch with a "time" column followed by the columns
+    """
+    import pyarrow as pa
+
+    arrays = [pa.array(np.ascontiguousarray(times))] + [
+        pa.array(np.ascontiguousarray(values)) for values in columns.values()
+    ]
+    schema = pa.schema(
+        [pa.field("time", arrays[0].type)]
+        + [
+            pa.field(name, array.type)
+            for name, array in zip(columns.keys(), arrays[1:])
+        ],
+        metadata={METADATA_KEY: json.dumps(metadata, default=str).encode()},
+    )
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def convert_record_batch(
+    batch: "pa.RecordBatch", output_format: OutputFormat
+) -> DataOutput:
+    """Convert a record batch into the requested output format
+
+    Args:
+        batch (pa.RecordBatch): The batch built by build_record_batch
+        output_format (OutputFormat): The requested format
+
+    Returns:
+        DataOutput: The batch itself, a table over the same buffers,
+            or a pandas dataframe indexed by time
+    """
+    if output_format == OutputFormat.ARROW_RECORD_BATCH:
+        return batch
+    if output_format == OutputFormat.ARROW_TABLE:
+        import pyarrow as pa
+
+        return pa.Table.from_batches([batch])
+    if output_format == OutputFormat.PANDAS:
+        return batch.to_pandas().set_index("time")
+    raise ValueError(f"Unsupported output format: {output_format}")
+
+
+def record_batch_metadata(batch: Union["pa.RecordBatch", "pa.Table"]) -> dict[str, Any]:
+    """Read the weather catalog metadata stored in a batch or table schema"""
+    metadata = batch.schema.metadata or {}
+    return json.loads(metadata.get(METADATA_KEY, b"{}"))
@@ -0,0 +1,435 @@
+import asyncio
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Coroutine, Optional, Union
+
+import numpy as np
+from zarr.core import Array
+
+from weather_catalog.basemodel import BaseModel
+from weather_catalog.instrumentation import InstrumentationSingleton
+
+from .read_policy import ReadPolicy
+from .store_key import store_key
+
+Selection = tuple[Union[int, slice], ...]
+
+DEFAULT_MAX_BYTES = int(
+    os.environ.get("WEATHER_CATALOG_CHUNK_CACHE_BYTES", 256 * 1024 * 1024)
+)
+
+
+class ChunkCacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    current_bytes: int = 0
+    max_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+class ChunkCache:
+    """Process wide cache of decoded zarr chunks with a byte-bounded LRU
+
+    sits between the DataCube layer and the zarr store: reads are split
+    along the chunk grid and every chunk is decompressed at most once while
+    it stays in the cache, whichever store (local directory, S3, ...) it
+    came from. Entries are keyed by (store, array, chunk coordinates).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self._chunks: OrderedDict[tuple[str, tuple[int, ...]], np.ndarray] = (
+            OrderedDict()
+        )
+        # chunks being fetched by aget_chunks, resolved once they are cached
+        self._fetching: dict[tuple[str, tuple[int, ...]], Future] = {}
+        self._lock = threading.Lock()
+        self._max_bytes = max_bytes
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def read(
+        self,
+        array: Array,
+        selection: Selection,
+        read_policy: Optional[ReadPolicy] = None,
+    ) -> np.ndarray:
+        """Read a region of a zarr array, going through the cache chunk by chunk
+
+        Args:
+            array (Array): The zarr array to read from
+            selection (Selection): One int or step-less slice per dimension,
+                int dimensions are dropped from the output like in numpy
+            read_policy (Optional[ReadPolicy]): How chunks missing from the
+                cache are fetched, one at a time without retries by default
+
+        Returns:
+            np.ndarray: The selected region
+        """
+        bounds = _normalize_selection(selection, array.shape)
+        output = np.empty(
+            tuple(stop - start for start, stop, _ in bounds), dtype=array.dtype
+        )
+        if output.size == 0:
+            return output[_drop_integer_dimensions(bounds)]
+
+        all_chunk_coords = _chunk_coords(bounds, array.chunks)
+        all_chunk_data = self.get_chunks(array, all_chunk_coords, read_policy)
+        for chunk_coords, chunk_data in zip(all_chunk_coords, all_chunk_data):
+            source, target = [], []
+            for (start, stop, _), chunk_index, chunk in zip(
+                bounds, chunk_coords, array.chunks
+            ):
+                chunk_start = chunk_index * chunk
+                low = max(start, chunk_start)
+                high = min(stop, chunk_start + chunk)
+                source.append(slice(low - chunk_start, high - chunk_start))
+                target.append(slice(low - start, high - start))
+            output[tuple(target)] = chunk_data[tuple(source)]
+
+        return output[_drop_integer_dimensions(bounds)]
+
+    def get_chunks(
+        self,
+        array: Array,
+        chunk_coords: list[tuple[int, ...]],
+        read_policy: Optional[ReadPolicy] = None,
+    ) -> list[np.ndarray]:
+        """Get decoded chunks, fetching the ones missing from the cache
+
+        missing chunks are fetched concurrently (up to the policy's
+        max_concurrency), so remote stores pay roughly one round trip
+        rather than one per chunk.
+
+        Args:
+            array (Array): The zarr array the chunks belong to
+            chunk_coords (list[tuple[int, ...]]): Positions in the chunk grid
+            read_policy (Optional[ReadPolicy]): How missing chunks are fetched
+
+        Returns:
+            list[np.ndarray]: The decoded, read only chunks in the requested order
+                (edge chunks are truncated to the array shape)
+        """
+        read_policy = read_policy or ReadPolicy()
+        array_key = store_key(array)
+        keys = [(array_key, tuple(int(c) for c in coords)) for coords in chunk_coords]
+
+        found: dict[tuple[str, tuple[int, ...]], np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                chunk_data = self._chunks.get(key)
+                if chunk_data is not None:
+                    self._chunks.move_to_end(key)
+                    found[key] = chunk_data
+            missing = list(dict.fromkeys(key for key in keys if key not in found))
+            self._hits += len(keys) - len(missing)
+            self._misses += len(missing)
+        InstrumentationSingleton.count("chunks_touched", len(keys))
+        InstrumentationSingleton.count("chunk_cache_hits", len(keys) - len(missing))
+        if not missing:
+            return [found[key] for key in keys]
+
+        def fetch(key: tuple[str, tuple[int, ...]]) -> np.ndarray:
+            return read_policy.call(lambda: self._read_chunk(array, key[1]))
+
+        # reading and decompressing the missing chunks
+        with InstrumentationSingleton.span("chunk_cache.fetch", array=array.path):
+            if len(missing) > 1 and read_policy.max_concurrency > 1:
+                with ThreadPoolExecutor(
+                    max_workers=min(read_policy.max_concurrency, len(missing))
+                ) as executor:
+                    fetched = list(executor.map(fetch, missing))
+            else:
+                fetched = [fetch(key) for key in missing]
+            InstrumentationSingleton.count("chunks_read", len(fetched))
+            InstrumentationSingleton.count(
+                "bytes_read", sum(chunk_data.nbytes for chunk_data in fetched)
+            )
+
+        for key, chunk_data in zip(missing, fetched):
+            self._put(key, chunk_data)
+            found[key] = chunk_data
+        return [found[key] for key in keys]
+
+    def chunk_coords(
+        self, array: Array, selection: Selection
+    ) -> list[tuple[int, ...]]:
+        """The positions in the chunk grid of the chunks a read touches
+
+        Args:
+            array (Array): The zarr array read
+            selection (Selection): One int or step-less slice per dimension
+
+        Returns:
+            list[tuple[int, ...]]: The chunk coordinates, in read order
+        """
+        bounds = _normalize_selection(selection, array.shape)
+        if any(stop <= start for start, stop, _ in bounds):
+            return []
+        return _chunk_coords(bounds, array.chunks)
+
+    async def aget_chunks(
+        self,
+        array: Array,
+        chunk_coords: list[tuple[int, ...]],
+        read_policy: Optional[ReadPolicy] = None,
+    ) -> None:
+        """Fetch chunks missing from the cache without blocking the event loop
+
+        only stores over an async fsspec filesystem (s3fs, ...) are fetched
+        here: every missing chunk is requested concurrently (up to the
+        policy's max_concurrency) on the filesystem's own event loop, and
+        decoded in a thread. Chunks of other stores, absent chunks holding
+        the fill value and failed requests are left to the blocking read,
+        which retries according to the read policy.
+
+        Args:
+            array (Array): The zarr array the chunks belong to
+            chunk_coords (list[tuple[int, ...]]): Positions in the chunk grid
+            read_policy (Optional[ReadPolicy]): How many chunks are requested
+                at the same time
+        """
+        store = array.chunk_store
+        filesystem = getattr(store, "fs", None)
+        if not getattr(filesystem, "async_impl", False):
+            return
+
+        array_key = store_key(array)
+        missing: list[tuple[int, ...]] = []
+        in_flight: list[Future] = []
+        with self._lock:
+            for coords in dict.fromkeys(
+                tuple(int(c) for c in coords) for coords in chunk_coords
+            ):
+                key = (array_key, coords)
+                if key in self._chunks:
+                    continue
+                if key in self._fetching:
+                    # another query is fetching the chunk already
+                    in_flight.append(self._fetching[key])
+                    continue
+                self._fetching[key] = Future()
+                missing.append(coords)
+
+        try:
+            if missing:
+                await self._afetch(array, array_key, missing, read_policy)
+        finally:
+            with self._lock:
+                for coords in missing:
+                    self._fetching.pop((array_key, coords)).set_result(None)
+        if in_flight:
+            await asyncio.gather(*(asyncio.wrap_future(f) for f in in_flight))
+
+    async def _afetch(
+        self,
+        array: Array,
+        array_key: str,
+        missing: list[tuple[int, ...]],
+        read_policy: Optional[ReadPolicy],
+    ) -> None:
+        store = array.chunk_store
+        paths = [_chunk_path(store, array._chunk_key(coords)) for coords in missing]
+        max_concurrency = (read_policy or ReadPolicy()).max_concurrency
+        with InstrumentationSingleton.span("chunk_cache.afetch", array=array.path):
+            fetched = await _on_filesystem_loop(
+                store.fs, _cat_files(store.fs, paths, max_concurrency)
+            )
+            encoded = {
+                coords: data
+                for coords, data in zip(missing, fetched)
+                if isinstance(data, bytes)
+            }
+            chunks = await asyncio.to_thread(self._decode_chunks, array, encoded)
+            InstrumentationSingleton.count("chunks_read", len(chunks))
+            InstrumentationSingleton.count(
+                "bytes_read", sum(chunk_data.nbytes for chunk_data in chunks.values())
+            )
+
+        for coords, chunk_data in chunks.items():
+            self._put((array_key, coords), chunk_data)
+
+    def get_chunk(
+        self,
+        array: Array,
+        chunk_coords: tuple[int, ...],
+        read_policy: Optional[ReadPolicy] = None,
+    ) -> np.ndarray:
+        """Get a single decoded chunk, reading it from the store on a miss
+
+        Args:
+            array (Array): The zarr array the chunk belongs to
+            chunk_coords (tuple[int, ...]): The position of the chunk in the chunk grid
+            read_policy (Optional[ReadPolicy]): How the chunk is fetched on a miss
+
+        Returns:
+            np.ndarray: The decoded, read only chunk (edge chunks are truncated)
+        """
+        return self.get_chunks(array, [chunk_coords], read_policy)[0]
+
+    @staticmethod
+    def _read_chunk(array: Array, chunk_coords: tuple[int, ...]) -> np.ndarray:
+        chunk_data = array[
+            tuple(
+                slice(index * chunk, min((index + 1) * chunk, size))
+                for index, chunk, size in zip(chunk_coords, array.chunks, array.shape)
+            )
+        ]
+        chunk_data.setflags(write=False)
+        return chunk_data
+
+    @staticmethod
+    def _decode_chunks(
+        array: Array, encoded: dict[tuple[int, ...], bytes]
+    ) -> dict[tuple[int, ...], np.ndarray]:
+        chunks = {}
+        for chunk_coords, data in encoded.items():
+            chunk_data = array._decode_chunk(data)[
+                tuple(
+                    slice(0, min(chunk, size - index * chunk))
+                    for index, chunk, size in zip(
+                        chunk_coords, array.chunks, array.shape
+                    )
+                )
+            ]
+            chunk_data.setflags(write=False)
+            chunks[chunk_coords] = chunk_data
+        return chunks
+
+    def _put(self, key: tuple[str, tuple[int, ...]], chunk_data: np.ndarray) -> None:
+        if chunk_data.nbytes > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._chunks:
+                return
+            self._chunks[key] = chunk_data
+            self._current_bytes += chunk_data.nbytes
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._current_bytes > self._max_bytes and self._chunks:
+            _, evicted = self._chunks.popitem(last=False)
+            self._current_bytes -= evicted.nbytes
+            self._evictions += 1
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """Change the byte budget, evicting least recently used chunks if needed"""
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def invalidate(self, key_prefix: str) -> None:
+        """Drop every cached chunk belonging to a store or array
+
+        Args:
+            key_prefix (str): The store key (or a prefix of it) to drop
+        """
+        with self._lock:
+            for key in [k for k in self._chunks if k[0].startswith(key_prefix)]:
+                self._current_bytes -= self._chunks.pop(key).nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chunks.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> ChunkCacheStats:
+        with self._lock:
+            return ChunkCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                current_bytes=self._current_bytes,
+                max_bytes=self._max_bytes,
+            )
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._hits = self._misses = self._evictions = 0
+
+
+def _normalize_selection(
+    selection: Selection, shape: tuple[int, ...]
+) -> list[tuple[int, int, bool]]:
+    """Convert a selection into (start, stop, is_integer) bounds per dimension"""
+    if len(selection) != len(shape):
+        raise ValueError(
+            f"Selection {selection} does not match the array dimensions {shape}"
+        )
+
+    bounds = []
+    for item, size in zip(selection, shape):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(size)
+            if step != 1:
+                raise ValueError("ChunkCache only supports contiguous slices")
+            bounds.append((start, max(start, stop), False))
+        else:
+            index = int(item)
+            if index < 0:
+                index += size
+            if not 0 <= index < size:
+                raise IndexError(f"Index {item} out of bounds for dimension of size {size}")
+            bounds.append((index, index + 1, True))
+    return bounds
+
+
+def _chunk_coords(
+    bounds: list[tuple[int, int, bool]], chunks: tuple[int, ...]
+) -> list[tuple[int, ...]]:
+    chunk_ranges = [
+        range(start // chunk, (stop - 1) // chunk + 1)
+        for (start, stop, _), chunk in zip(bounds, chunks)
+    ]
+    return list(itertools.product(*chunk_ranges))
+
+
+def _chunk_path(store: Any, key: str) -> str:
+    """The filesystem path of a chunk key of an fsspec backed store"""
+    if hasattr(store, "map"):
+        # zarr's FSStore wraps the fsspec mapper
+        key, store = store._normalize_key(key), store.map
+    return store._key_to_str(key)
+
+
+async def _cat_files(
+    filesystem: Any, paths: list[str], max_concurrency: int
+) -> list[Union[bytes, BaseException]]:
+    """Fetch whole files concurrently, failures are returned in their place"""
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+    async def cat_file(path: str) -> bytes:
+        async with semaphore:
+            return await filesystem._cat_file(path)
+
+    return await asyncio.gather(
+        *(cat_file(path) for path in paths), return_exceptions=True
+    )
+
+
+async def _on_filesystem_loop(filesystem: Any, coroutine: Coroutine) -> Any:
+    """Await a coroutine of an async fsspec filesystem from any event loop
+
+    filesystems built for blocking use run their coroutines on fsspec's own
+    event loop thread, the caller's loop awaits the result without blocking
+    """
+    loop = getattr(filesystem, "loop", None)
+    if loop is None or loop is asyncio.get_running_loop():
+        return await coroutine
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+
+def _drop_integer_dimensions(bounds: list[tuple[int, int, bool]]) -> tuple:
+    return tuple(0 if is_integer else slice(None) for _, _, is_integer in bounds)
+
+
+ChunkCacheSingleton = ChunkCache()
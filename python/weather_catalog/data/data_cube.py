@@ -1,11 +1,17 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterator, Optional, Sequence, Union
 
+import numpy as np
 import pandas as pd
 
 from weather_catalog.basemodel import BaseModel
-from weather_catalog.enums import WeatherVariable
+from weather_catalog.enums import Aggregation, Frequency, OutputFormat, WeatherVariable
+
+from .arrow_output import DataOutput
+
+if TYPE_CHECKING:
+    from weather_catalog.query.location import BBoxLocation, PolygonLocation
 
 
 class DataCube(BaseModel, ABC):
@@ -18,6 +24,11 @@ class DataCube(BaseModel, ABC):
 
     _dataset: Any
 
+    # set by the catalog / downloader that opened the cube,
+    # they identify the data behind results, e.g. for result caching
+    catalog_id: Optional[str] = None
+    store_version: Optional[str] = None
+
     @abstractmethod
     def get_data(
         self,
@@ -26,7 +37,10 @@ class DataCube(BaseModel, ABC):
         start_date: datetime,
         end_date: datetime,
         variables: list[WeatherVariable],
-    ) -> pd.DataFrame:
+        output_format: OutputFormat = OutputFormat.PANDAS,
+        frequency: Optional[Frequency] = None,
+        aggregation: Aggregation = Aggregation.MEAN,
+    ) -> DataOutput:
         """Pull data for a single geospatial location and time range
 
         Args:
@@ -35,8 +49,191 @@ class DataCube(BaseModel, ABC):
             start_date (datetime): The start date of the time range
             end_date (datetime): The end date of the time range
             variables (list[WeatherVariable]): The variables to pull data for
+            output_format (OutputFormat): Return a pandas dataframe (default),
+                a pyarrow Table or a pyarrow RecordBatch
+            frequency (Optional[Frequency]): Resample the data to this frequency,
+                the native frequency of the store if None
+            aggregation (Aggregation): How values are combined when resampling
 
         Returns:
-            pd.DataFrame: A pandas dataframe of the data
+            DataOutput: The data in the requested output format
         """
         pass
+
+    def iter_data(
+        self,
+        latitude: float,
+        longitude: float,
+        start_date: datetime,
+        end_date: datetime,
+        variables: list[WeatherVariable],
+        batch_chunks: int = 1,
+        read_ahead: bool = True,
+        output_format: OutputFormat = OutputFormat.PANDAS,
+        frequency: Optional[Frequency] = None,
+        aggregation: Aggregation = Aggregation.MEAN,
+    ) -> Iterator[DataOutput]:
+        """Stream data for a single location and time range in bounded batches
+
+        the default implementation yields the result of get_data as one batch,
+        subclasses should override this to read the time range piece by piece.
+
+        Args:
+            latitude (float): The latitude of the location
+            longitude (float): The longitude of the location
+            start_date (datetime): The start date of the time range
+            end_date (datetime): The end date of the time range
+            variables (list[WeatherVariable]): The variables to pull data for
+            batch_chunks (int): How many storage time chunks go into one batch
+            read_ahead (bool): Read the next batch in the background
+                while the current one is being consumed
+            output_format (OutputFormat): The format of the batches
+            frequency (Optional[Frequency]): Resample the data to this frequency,
+                the native frequency of the store if None
+            aggregation (Aggregation): How values are combined when resampling
+
+        Returns:
+            Iterator[DataOutput]: Consecutive batches of the result, a
+                resampling period is never split over two batches
+        """
+        yield self.get_data(
+            latitude=latitude,
+            longitude=longitude,
+            start_date=start_date,
+            end_date=end_date,
+            variables=variables,
+            output_format=output_format,
+            frequency=frequency,
+            aggregation=aggregation,
+        )
+
+    def get_data_batch(
+        self,
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        start_date: datetime,
+        end_date: datetime,
+        variables: list[WeatherVariable],
+        point_ids: Optional[Sequence[Any]] = None,
+        frequency: Optional[Frequency] = None,
+        aggregation: Aggregation = Aggregation.MEAN,
+    ) -> pd.DataFrame:
+        """Pull data for many geospatial locations sharing a time range
+
+        the default implementation loops over get_data,
+        subclasses should override this with a vectorized read.
+
+        Args:
+            latitudes (Sequence[float]): The latitudes of the locations
+            longitudes (Sequence[float]): The longitudes of the locations
+            start_date (datetime): The start date of the time range
+            end_date (datetime): The end date of the time range
+            variables (list[WeatherVariable]): The variables to pull data for
+            point_ids (Optional[Sequence[Any]]): Identifiers of the locations,
+                defaults to their position in the input
+            frequency (Optional[Frequency]): Resample the data to this frequency,
+                the native frequency of the store if None
+            aggregation (Aggregation): How values are combined when resampling
+
+        Returns:
+            pd.DataFrame: A long format dataframe with a "point_id" column
+                followed by one column per variable
+        """
+        latitudes, longitudes, point_ids = self._validate_batch_points(
+            latitudes, longitudes, point_ids
+        )
+        frames = [
+            self.get_data(
+                latitude=float(latitude),
+                longitude=float(longitude),
+                start_date=start_date,
+                end_date=end_date,
+                variables=variables,
+                frequency=frequency,
+                aggregation=aggregation,
+            )
+            for latitude, longitude in zip(latitudes, longitudes)
+        ]
+        for point_id, frame in zip(point_ids, frames):
+            frame.insert(0, "point_id", point_id)
+        if not frames:
+            return pd.DataFrame(columns=["point_id"] + [v.value for v in variables])
+        return pd.concat(frames)
+
+    def get_region_data(
+        self,
+        location: Union["BBoxLocation", "PolygonLocation"],
+        start_date: datetime,
+        end_date: datetime,
+        variables: list[WeatherVariable],
+        spatial_aggregation: Optional[Aggregation] = None,
+        output_format: OutputFormat = OutputFormat.PANDAS,
+        frequency: Optional[Frequency] = None,
+        aggregation: Aggregation = Aggregation.MEAN,
+    ) -> DataOutput:
+        """Pull data for every grid cell within a box or polygon
+
+        Args:
+            location (Union[BBoxLocation, PolygonLocation]): The region
+            start_date (datetime): The start date of the time range
+            end_date (datetime): The end date of the time range
+            variables (list[WeatherVariable]): The variables to pull data for
+            spatial_aggregation (Optional[Aggregation]): Combine the cells into
+                one series per variable (MEAN is weighted by cell area),
+                return every cell if None
+            output_format (OutputFormat): Return a pandas dataframe (default),
+                a pyarrow Table or a pyarrow RecordBatch
+            frequency (Optional[Frequency]): Resample the data to this frequency,
+                the native frequency of the store if None
+            aggregation (Aggregation): How values are combined when resampling
+
+        Returns:
+            DataOutput: The region's data indexed by time, with "latitude"
+                and "longitude" columns when the cells are not aggregated
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support region queries"
+        )
+
+    async def aprefetch(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        variables: list[WeatherVariable],
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        location: Optional[Union["BBoxLocation", "PolygonLocation"]] = None,
+    ) -> None:
+        """Fetch what a read needs ahead of it, without blocking the event loop
+
+        QueryResolver.aresolve awaits this before running the blocking read
+        in a thread, cubes with nothing to fetch ahead do nothing
+
+        Args:
+            start_date (datetime): The start date of the time range
+            end_date (datetime): The end date of the time range
+            variables (list[WeatherVariable]): The variables read
+            latitude (Optional[float]): The latitude of a point read
+            longitude (Optional[float]): The longitude of a point read
+            location (Optional[Union[BBoxLocation, PolygonLocation]]): The
+                region of a region read
+        """
+        return None
+
+    @staticmethod
+    def _validate_batch_points(
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        point_ids: Optional[Sequence[Any]],
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        latitudes = np.asarray(latitudes, dtype=np.float64).ravel()
+        longitudes = np.asarray(longitudes, dtype=np.float64).ravel()
+        point_ids = (
+            np.arange(latitudes.size) if point_ids is None else np.asarray(point_ids)
+        )
+        if not latitudes.size == longitudes.size == point_ids.size:
+            raise ValueError(
+                "latitudes, longitudes and point_ids must have the same length, "
+                f"got {latitudes.size}, {longitudes.size} and {point_ids.size}"
+            )
+        return latitudes, longitudes, point_ids
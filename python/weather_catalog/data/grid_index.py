@@ -0,0 +1,216 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class GridIndex(ABC):
+    """Nearest neighbour lookup from (latitude, longitude) to grid indices
+
+    an index is built once from the coordinate arrays of a store
+    and then answers lookups without touching the store again.
+    """
+
+    @abstractmethod
+    def nearest(
+        self, latitudes: np.ndarray, longitudes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the closest grid cell for each of the given locations
+
+        Args:
+            latitudes (np.ndarray): 1-D array of latitudes
+            longitudes (np.ndarray): 1-D array of longitudes
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: the latitude and longitude indices
+        """
+        pass
+
+    def nearest_point(self, latitude: float, longitude: float) -> tuple[int, int]:
+        """Find the closest grid cell for a single location
+
+        Args:
+            latitude (float): The latitude of the location
+            longitude (float): The longitude of the location
+
+        Returns:
+            tuple[int, int]: the latitude and longitude index
+        """
+        lat_indices, lon_indices = self.nearest(
+            np.array([latitude], dtype=np.float64),
+            np.array([longitude], dtype=np.float64),
+        )
+        return int(lat_indices[0]), int(lon_indices[0])
+
+    @abstractmethod
+    def coordinates(self, lat_index: int, lon_index: int) -> tuple[float, float]:
+        """The latitude and longitude of a grid cell
+
+        Args:
+            lat_index (int): The latitude (or y) index of the cell
+            lon_index (int): The longitude (or x) index of the cell
+
+        Returns:
+            tuple[float, float]: The latitude and longitude of the cell centre
+        """
+        pass
+
+
+class AxisIndex:
+    """Nearest neighbour lookup along a single 1-D coordinate axis
+
+    regular axes are resolved arithmetically in O(1),
+    monotonic axes with a binary search in O(log n),
+    and unsorted axes are sorted once and then binary searched.
+    """
+
+    _relative_tolerance: float = 1e-6
+
+    def __init__(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 1 or values.size == 0:
+            raise ValueError("AxisIndex requires a non-empty 1-D coordinate array")
+
+        self.values = values
+        self.size = values.size
+        self._start = float(values[0])
+        self._step = None
+
+        if values.size > 1:
+            steps = np.diff(values)
+            step = float(steps.mean())
+            if step != 0 and np.allclose(
+                steps, step, rtol=0, atol=abs(step) * self._relative_tolerance
+            ):
+                self._step = step
+
+        if np.all(np.diff(values) > 0):
+            self._sorted_values = values
+            self._sorted_to_original = None
+        elif np.all(np.diff(values) < 0):
+            self._sorted_values = values[::-1]
+            self._sorted_to_original = np.arange(values.size)[::-1]
+        else:
+            order = np.argsort(values, kind="stable")
+            self._sorted_values = values[order]
+            self._sorted_to_original = order
+
+    def nearest(self, values: np.ndarray) -> np.ndarray:
+        """Find the index of the closest coordinate for each value
+
+        Args:
+            values (np.ndarray): The coordinate values to look up
+
+        Returns:
+            np.ndarray: The index along the axis of the closest coordinate
+        """
+        values = np.asarray(values, dtype=np.float64)
+
+        if self._step is not None:
+            indices = np.rint((values - self._start) / self._step)
+            return np.clip(indices, 0, self.size - 1).astype(np.intp)
+
+        if self.size == 1:
+            return np.zeros(values.shape, dtype=np.intp)
+
+        right = np.searchsorted(self._sorted_values, values, side="left")
+        right = np.clip(right, 1, self.size - 1)
+        left = right - 1
+        take_left = np.abs(values - self._sorted_values[left]) <= np.abs(
+            self._sorted_values[right] - values
+        )
+        sorted_indices = np.where(take_left, left, right)
+
+        if self._sorted_to_original is None:
+            return sorted_indices.astype(np.intp)
+        return self._sorted_to_original[sorted_indices].astype(np.intp)
+
+
+class RectilinearGridIndex(GridIndex):
+    """Index for grids with independent 1-D latitude and longitude axes"""
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        self.latitude_axis = AxisIndex(latitudes)
+        self.longitude_axis = AxisIndex(longitudes)
+
+    def nearest(
+        self, latitudes: np.ndarray, longitudes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        return self.latitude_axis.nearest(latitudes), self.longitude_axis.nearest(
+            longitudes
+        )
+
+    def coordinates(self, lat_index: int, lon_index: int) -> tuple[float, float]:
+        return (
+            float(self.latitude_axis.values[lat_index]),
+            float(self.longitude_axis.values[lon_index]),
+        )
+
+
+class CurvilinearGridIndex(GridIndex):
+    """Index for grids whose latitude and longitude are 2-D arrays
+
+    cell centres are projected onto the unit sphere and stored in a KD-tree,
+    so lookups are O(log n) and do not suffer from the longitude seam.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        # scipy is only needed for curvilinear grids, keep it off the import path
+        from scipy.spatial import cKDTree
+
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        if latitudes.ndim != 2 or latitudes.shape != longitudes.shape:
+            raise ValueError(
+                "CurvilinearGridIndex requires 2-D latitude and longitude arrays "
+                f"of equal shape, got {latitudes.shape} and {longitudes.shape}"
+            )
+
+        self.shape = latitudes.shape
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self._tree = cKDTree(_to_unit_vectors(latitudes.ravel(), longitudes.ravel()))
+
+    def nearest(
+        self, latitudes: np.ndarray, longitudes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        _, flat_indices = self._tree.query(_to_unit_vectors(latitudes, longitudes))
+        y_indices, x_indices = np.unravel_index(flat_indices, self.shape)
+        return y_indices.astype(np.intp), x_indices.astype(np.intp)
+
+    def coordinates(self, lat_index: int, lon_index: int) -> tuple[float, float]:
+        return (
+            float(self.latitudes[lat_index, lon_index]),
+            float(self.longitudes[lat_index, lon_index]),
+        )
+
+
+def _to_unit_vectors(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    lat_radians = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon_radians = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat_radians)
+    return np.column_stack(
+        (cos_lat * np.cos(lon_radians), cos_lat * np.sin(lon_radians), np.sin(lat_radians))
+    )
+
+
+def build_grid_index(latitudes: np.ndarray, longitudes: np.ndarray) -> GridIndex:
+    """Build the appropriate grid index for a set of coordinate arrays
+
+    Args:
+        latitudes (np.ndarray): 1-D or 2-D latitude coordinates
+        longitudes (np.ndarray): 1-D or 2-D longitude coordinates
+
+    Returns:
+        GridIndex: A rectilinear index for 1-D axes, a curvilinear one for 2-D
+    """
+    latitudes = np.asarray(latitudes)
+    longitudes = np.asarray(longitudes)
+    if latitudes.ndim == 1 and longitudes.ndim == 1:
+        return RectilinearGridIndex(latitudes, longitudes)
+    if latitudes.ndim == 2 and longitudes.ndim == 2:
+        return CurvilinearGridIndex(latitudes, longitudes)
+    raise ValueError(
+        f"Unsupported coordinate dimensions: latitude {latitudes.ndim}-D, "
+        f"longitude {longitudes.ndim}-D"
+    )
+
@@ -0,0 +1,69 @@
+import threading
+from typing import Any, Callable, TypeVar
+
+from zarr.hierarchy import Group
+
+from weather_catalog.instrumentation import InstrumentationSingleton
+
+from .store_key import store_key
+
+IndexType = TypeVar("IndexType")
+
+
+class IndexCache:
+    """Process wide cache of coordinate indices, keyed by store
+
+    a DataCube is created for every query, so indices built from a store's
+    coordinate arrays have to live outside of it to be reused between queries.
+    """
+
+    def __init__(self):
+        self._indices: dict[tuple[str, Any], Any] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        dataset: Group,
+        index_key: Any,
+        builder: Callable[[Group], IndexType],
+    ) -> IndexType:
+        """Get an index of a store, building it on first use
+
+        Args:
+            dataset (Group): The zarr group the index is built from
+            index_key (Any): Identifies the index within the store
+            builder (Callable[[Group], IndexType]): Builds the index from the group
+
+        Returns:
+            IndexType: The cached index
+        """
+        key = (store_key(dataset), index_key)
+        index = self._indices.get(key)
+        if index is not None:
+            InstrumentationSingleton.count("index_cache_hits")
+            return index
+
+        with self._lock:
+            index = self._indices.get(key)
+            if index is None:
+                with InstrumentationSingleton.span("index.build", key=str(index_key)):
+                    index = builder(dataset)
+                self._indices[key] = index
+        return index
+
+    def invalidate(self, key_prefix: str) -> None:
+        """Drop every cached index belonging to a store
+
+        Args:
+            key_prefix (str): The store key (or a prefix of it) to drop
+        """
+        with self._lock:
+            for key in [k for k in self._indices if k[0].startswith(key_prefix)]:
+                del self._indices[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indices.clear()
+
+
+IndexCacheSingleton = IndexCache()
@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+from zarr.core import Array
+
+from weather_catalog.enums import WeatherVariable
+from weather_catalog.instrumentation import InstrumentationSingleton
+
+from .chunk_cache import Selection
+from .index_cache import IndexCacheSingleton
+from .memmap_store import chunk_file
+from .region_mask import RegionLocation
+from .zarray_data_cube import ZarrayDataCube
+
+
+class MemmapDataCube(ZarrayDataCube):
+    """A data cube over an uncompressed store, read through numpy.memmap
+
+    every variable of the store is one uncompressed chunk (see
+    weather_catalog.data.memmap_store), its chunk file is memory mapped once
+    per store and reads are views of the mapping: nothing is decoded or
+    copied until the output is built, and only the pages holding the
+    selected values are read, from the page cache once warm.
+
+    point, batch, region and resampled reads work as in ZarrayDataCube.
+    """
+
+    use_chunk_cache: bool = False
+
+    def chunks_touched(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        variables: list[WeatherVariable],
+        location: Optional[RegionLocation] = None,
+    ) -> int:
+        """No chunk is decoded, so a memmap copy is preferred over any chunked one"""
+        return 0
+
+    def _read(self, array: Array, selection: Selection) -> np.ndarray:
+        """Read a region of an array as a view of its memory mapped chunk file
+
+        Args:
+            array (Array): A variable of the store, its dimensions in any order
+            selection (Selection): An int or slice per (time, y, x) dimension
+
+        Returns:
+            np.ndarray: A read only view, its dimensions in (time, y, x) order
+        """
+        layout = self._layout(array)
+        values = self._memmap(array)[layout.to_storage(selection)]
+        InstrumentationSingleton.count("bytes_read", values.nbytes)
+        return layout.to_logical(values, selection)
+
+    def _memmap(self, array: Array) -> np.memmap:
+        def build(dataset: object) -> np.memmap:
+            path = chunk_file(array)
+            if path is None:
+                raise ValueError(
+                    f"Array {array.path} is not a single uncompressed chunk, "
+                    "convert the store with weather_catalog.data.memmap_store"
+                )
+            return np.memmap(path, dtype=array.dtype, mode="r", shape=array.shape)
+
+        return IndexCacheSingleton.get(self.dataset, ("memmap", array.path), build)
@@ -0,0 +1,202 @@
+"""Convert zarr stores into uncompressed stores served through numpy.memmap
+
+every array of a memmap store is a single uncompressed chunk, so the chunk
+file holds the raw C-ordered values and can be memory mapped as is. The
+store stays a valid zarr store, MemmapDataCube reads it through views of the
+mapped files, zarr readers through the chunk files.
+
+a store takes as much disk space as its decoded values, it is meant for the
+hottest datasets, where the page cache then holds the values instead of
+compressed chunks decoded on every read.
+
+usage:
+    python -m weather_catalog.data.memmap_store STORE [--target PATH]
+        [--dimension-order DIMENSION ...] [--workers N]
+"""
+
+import argparse
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence
+
+import numpy as np
+import zarr
+from loguru import logger
+from zarr.core import Array
+from zarr.hierarchy import Group
+from zarr.storage import DirectoryStore
+
+from .array_layout import DIMENSIONS_ATTRIBUTE, array_dimensions
+from .rechunk import layout_path
+from .zarr_store_writer import _chunk_regions
+
+MEMMAP_LAYOUT = "memmap"
+
+
+def chunk_file(array: Array) -> Optional[str]:
+    """The file holding the single chunk of an array of a directory store
+
+    Args:
+        array (Array): A zarr array
+
+    Returns:
+        Optional[str]: The path of the chunk file, None if the array is not
+            a single uncompressed chunk of a directory store
+    """
+    store = array.chunk_store
+    if (
+        not isinstance(store, DirectoryStore)
+        or array.compressor is not None
+        or array.filters
+        or array.dtype.hasobject
+        or array.ndim == 0
+        or tuple(array.chunks) != tuple(array.shape)
+    ):
+        return None
+    path = os.path.join(store.path, array._chunk_key((0,) * array.ndim))
+    try:
+        if os.path.getsize(path) != array.nbytes:
+            return None
+    except OSError:
+        return None
+    return path
+
+
+def is_memmap_store(group: Group) -> bool:
+    """Whether every variable of a store can be memory mapped
+
+    Args:
+        group (Group): An opened zarr group
+
+    Returns:
+        bool: True if every array with dimensions is one uncompressed chunk
+    """
+    arrays = [array for _, array in group.arrays() if array.ndim > 0]
+    return bool(arrays) and all(chunk_file(array) is not None for array in arrays)
+
+
+def write_memmap_store(
+    source_path: str,
+    target_path: Optional[str] = None,
+    dimension_order: Optional[Sequence[str]] = None,
+    max_workers: int = min(8, os.cpu_count() or 1),
+) -> str:
+    """Write an uncompressed, memory mappable copy of a zarr store
+
+    values are copied one source chunk at a time into the mapped target
+    files, memory stays bounded by a source chunk per worker. The copy is
+    written next to its final path and moved there once complete.
+
+    Args:
+        source_path (str): The path of the zarr store to convert
+        target_path (Optional[str]): Where to write the copy, next to the
+            store as its "memmap" layout if None, where LocalDataDownloader
+            finds it
+        dimension_order (Optional[Sequence[str]]): Store the variables with
+            their dimensions in this order, e.g. (latitude, longitude, time)
+            makes point time series contiguous. The source order if None
+        max_workers (int): How many source chunks are copied concurrently
+
+    Returns:
+        str: The path of the copy
+    """
+    source = zarr.open_group(source_path, mode="r")
+    target_path = target_path or layout_path(source_path, MEMMAP_LAYOUT)
+    os.makedirs(os.path.dirname(os.path.abspath(target_path)), exist_ok=True)
+    temporary_path = f"{target_path}.tmp"
+    target = zarr.open_group(temporary_path, mode="w")
+    target.attrs.update(dict(source.attrs))
+
+    for name, source_array in source.arrays():
+        dimensions = array_dimensions(source_array)
+        order = _dimension_permutation(dimensions, dimension_order)
+        target_array = target.create(
+            name,
+            shape=tuple(source_array.shape[axis] for axis in order),
+            chunks=tuple(max(source_array.shape[axis], 1) for axis in order),
+            dtype=source_array.dtype,
+            compressor=None,
+            fill_value=source_array.fill_value,
+        )
+        target_array.attrs.update(dict(source_array.attrs))
+        target_array.attrs[DIMENSIONS_ATTRIBUTE] = [dimensions[axis] for axis in order]
+        if source_array.ndim == 0 or source_array.size == 0:
+            target_array[...] = source_array[...]
+            continue
+        _copy_into_memmap(source_array, target_array, order, max_workers)
+
+    zarr.consolidate_metadata(temporary_path)
+    if os.path.exists(target_path):
+        shutil.rmtree(target_path)
+    os.replace(temporary_path, target_path)
+    logger.info(f"Wrote the memory mappable copy of {source_path} to {target_path}")
+    return target_path
+
+
+def stored_dimension_order(path: str) -> tuple[str, ...]:
+    """The dimension order of the variables of a store, to rewrite it alike
+
+    Args:
+        path (str): The path of the zarr store
+
+    Returns:
+        tuple[str, ...]: The dimensions of its array with the most dimensions
+    """
+    arrays = [array for _, array in zarr.open_group(path, mode="r").arrays()]
+    if not arrays:
+        return ()
+    return array_dimensions(max(arrays, key=lambda array: array.ndim))
+
+
+def _copy_into_memmap(
+    source_array: Array, target_array: Array, order: tuple[int, ...], max_workers: int
+) -> None:
+    path = os.path.join(
+        target_array.chunk_store.path, target_array._chunk_key((0,) * target_array.ndim)
+    )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mapped = np.memmap(
+        path, dtype=target_array.dtype, mode="w+", shape=target_array.shape
+    )
+
+    def copy(region: tuple[slice, ...]) -> None:
+        target_region = tuple(region[axis] for axis in order)
+        mapped[target_region] = source_array[region].transpose(order)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in executor.map(copy, _chunk_regions(source_array, None, None)):
+            pass
+    mapped.flush()
+    del mapped
+
+
+def _dimension_permutation(
+    dimensions: tuple[str, ...], dimension_order: Optional[Sequence[str]]
+) -> tuple[int, ...]:
+    """The source axes in the order they are stored in the copy"""
+    axes = tuple(range(len(dimensions)))
+    if dimension_order is None or not set(dimensions) <= set(dimension_order):
+        return axes
+    position = {dimension: index for index, dimension in enumerate(dimension_order)}
+    return tuple(sorted(axes, key=lambda axis: position[dimensions[axis]]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("store")
+    parser.add_argument("--target", default=None)
+    parser.add_argument("--dimension-order", nargs="*", default=None)
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    write_memmap_store(
+        args.store,
+        target_path=args.target,
+        dimension_order=args.dimension_order or None,
+        max_workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
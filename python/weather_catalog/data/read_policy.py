@@ -0,0 +1,94 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from loguru import logger
+
+from weather_catalog.basemodel import BaseModel
+
+ReturnType = TypeVar("ReturnType")
+
+# errors that can not be fixed by asking again
+_NON_RETRYABLE_ERRORS = (FileNotFoundError, PermissionError, IsADirectoryError)
+
+
+class ReadPolicy(BaseModel):
+    """Controls how a DataCube fetches chunks from its store
+
+    local stores are served well by the defaults, remote (e.g. S3) stores
+    should fetch chunks concurrently and retry transient failures.
+
+    Args:
+        max_concurrency (int): How many chunks may be fetched at the same time
+        max_variable_concurrency (int): How many variables of a multi-variable
+            read are read at the same time
+        max_retries (int): How often a failed chunk fetch is retried
+        backoff_seconds (float): The delay before the first retry,
+            doubled (with jitter) on every following retry
+        max_backoff_seconds (float): The upper bound of the retry delay
+    """
+
+    max_concurrency: int = 1
+    max_variable_concurrency: int = 4
+    max_retries: int = 0
+    backoff_seconds: float = 0.25
+    max_backoff_seconds: float = 5.0
+
+    def call(self, function: Callable[[], ReturnType]) -> ReturnType:
+        """Call a function, retrying it with exponential backoff on I/O errors
+
+        Args:
+            function (Callable[[], ReturnType]): The read to perform
+
+        Returns:
+            ReturnType: Whatever the function returns
+        """
+        attempt = 0
+        while True:
+            try:
+                return function()
+            except _NON_RETRYABLE_ERRORS:
+                raise
+            except OSError as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.debug(
+                    f"Chunk read failed ({e}), retry {attempt + 1}/{self.max_retries} "
+                    f"in {delay:.2f}s"
+                )
+                time.sleep(delay)
+                attempt += 1
+
+    async def acall(self, function: Callable[[], Awaitable[ReturnType]]) -> ReturnType:
+        """Await a coroutine function, retrying it like `call` without blocking
+
+        Args:
+            function (Callable[[], Awaitable[ReturnType]]): The read to perform,
+                called again for every attempt
+
+        Returns:
+            ReturnType: Whatever the awaited read returns
+        """
+        attempt = 0
+        while True:
+            try:
+                return await function()
+            except _NON_RETRYABLE_ERRORS:
+                raise
+            except OSError as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.debug(
+                    f"Read failed ({e}), retry {attempt + 1}/{self.max_retries} "
+                    f"in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        return min(
+            self.max_backoff_seconds, self.backoff_seconds * 2**attempt
+        ) * random.uniform(0.5, 1.0)
@@ -0,0 +1,181 @@
+"""Build copies of a zarr store chunked for a different access pattern
+
+stores are usually chunked for writing: a few times by a large spatial tile,
+so a point time series over a month reads one chunk per time chunk. A
+time series copy holds the whole time axis of a small spatial tile in each
+chunk, the same read touches a single chunk per variable.
+
+copies live next to the store they are built from, in
+`<store>.layouts/<layout>.zarr`, where LocalDataDownloader finds them and
+routes every query to the copy it reads the fewest chunks from.
+
+usage:
+    python -m weather_catalog.data.rechunk STORE [--target PATH]
+        [--chunks DIMENSION=LENGTH ...] [--max-memory-mib N] [--workers N]
+"""
+
+import argparse
+import os
+import shutil
+from typing import Optional
+
+import zarr
+from loguru import logger
+from zarr.hierarchy import Group
+
+from weather_catalog.enums import Coordinate
+
+from .array_layout import array_dimensions
+from .zarr_store_writer import ZarrStoreWriter, ZarrWriteOptions
+
+TIME_SERIES_LAYOUT = "timeseries"
+
+LAYOUTS_SUFFIX = ".layouts"
+
+DEFAULT_TARGET_CHUNK_BYTES = 4 * 1024 * 1024
+
+DEFAULT_MAX_MEMORY_BYTES = 512 * 1024 * 1024
+
+
+def layout_path(store_path: str, layout: str) -> str:
+    """Where the copy of a store with a given layout lives
+
+    Args:
+        store_path (str): The path of the store, e.g. ".../gfs.zarr"
+        layout (str): The name of the layout, e.g. "timeseries"
+
+    Returns:
+        str: e.g. ".../gfs.layouts/timeseries.zarr"
+    """
+    base, _ = os.path.splitext(os.path.normpath(store_path))
+    return os.path.join(base + LAYOUTS_SUFFIX, f"{layout}.zarr")
+
+
+def layout_paths(store_path: str) -> dict[str, str]:
+    """The copies of a store with other layouts, found on disk
+
+    Args:
+        store_path (str): The path of the store
+
+    Returns:
+        dict[str, str]: The path of every copy, by layout name
+    """
+    layouts_directory = os.path.dirname(layout_path(store_path, TIME_SERIES_LAYOUT))
+    if not os.path.isdir(layouts_directory):
+        return {}
+    return {
+        name[: -len(".zarr")]: os.path.join(layouts_directory, name)
+        for name in sorted(os.listdir(layouts_directory))
+        if name.endswith(".zarr")
+    }
+
+
+def time_series_chunks(
+    group: Group,
+    target_chunk_bytes: int = DEFAULT_TARGET_CHUNK_BYTES,
+    time_dimension: str = Coordinate.TIME.value,
+) -> dict[str, int]:
+    """Chunks holding the whole time axis of a square spatial tile
+
+    the tile is as large as fits in target_chunk_bytes for every variable
+
+    Args:
+        group (Group): The store to rechunk
+        target_chunk_bytes (int): The decoded size aimed for per chunk
+        time_dimension (str): The name of the time dimension
+
+    Returns:
+        dict[str, int]: The chunk length per dimension name
+    """
+    chunks: dict[str, int] = {}
+    for _, array in group.arrays():
+        dimensions = array_dimensions(array)
+        if time_dimension not in dimensions or len(dimensions) < 2:
+            continue
+        times = max(array.shape[dimensions.index(time_dimension)], 1)
+        cells = max(target_chunk_bytes // (times * array.dtype.itemsize), 1)
+        spatial_dimensions = [d for d in dimensions if d != time_dimension]
+        tile = max(int(cells ** (1 / len(spatial_dimensions))), 1)
+
+        chunks[time_dimension] = max(chunks.get(time_dimension, 0), times)
+        for dimension in spatial_dimensions:
+            chunks[dimension] = min(chunks.get(dimension, tile), tile)
+    return chunks
+
+
+def rechunk_store(
+    source_path: str,
+    target_path: Optional[str] = None,
+    chunks: Optional[dict[str, int]] = None,
+    layout: str = TIME_SERIES_LAYOUT,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    max_workers: int = min(8, os.cpu_count() or 1),
+) -> str:
+    """Write a copy of a store with another chunking, within a memory budget
+
+    the copy is written next to its final path and moved there once complete,
+    so readers never open a partially written copy
+
+    Args:
+        source_path (str): The path of the store to copy
+        target_path (Optional[str]): Where to write the copy, the store's
+            layout_path for the layout if None
+        chunks (Optional[dict[str, int]]): The chunk length per dimension
+            name, time series chunks (see time_series_chunks) if None
+        layout (str): The name of the layout, used to place the copy
+        max_memory_bytes (int): Bound on the decoded values held at once
+        max_workers (int): How many blocks are written concurrently
+
+    Returns:
+        str: The path of the copy
+    """
+    source = zarr.open_group(source_path, mode="r")
+    target_path = target_path or layout_path(source_path, layout)
+    chunks = chunks or time_series_chunks(source)
+
+    os.makedirs(os.path.dirname(os.path.abspath(target_path)), exist_ok=True)
+    temporary_path = f"{target_path}.tmp"
+    options = ZarrWriteOptions(
+        chunks=chunks, max_memory_bytes=max_memory_bytes, max_workers=max_workers
+    )
+    ZarrStoreWriter(options).write(source, temporary_path)
+
+    if os.path.exists(target_path):
+        shutil.rmtree(target_path)
+    os.replace(temporary_path, target_path)
+    logger.info(f"Rechunked {source_path} into {target_path} with chunks {chunks}")
+    return target_path
+
+
+def _parse_chunks(values: list[str]) -> dict[str, int]:
+    chunks = {}
+    for value in values:
+        dimension, _, length = value.partition("=")
+        chunks[dimension] = int(length)
+    return chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("store")
+    parser.add_argument("--target", default=None)
+    parser.add_argument("--chunks", nargs="*", default=[])
+    parser.add_argument("--layout", default=TIME_SERIES_LAYOUT)
+    parser.add_argument(
+        "--max-memory-mib", type=int, default=DEFAULT_MAX_MEMORY_BYTES // 2**20
+    )
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    rechunk_store(
+        args.store,
+        target_path=args.target,
+        chunks=_parse_chunks(args.chunks) or None,
+        layout=args.layout,
+        max_memory_bytes=args.max_memory_mib * 2**20,
+        max_workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,506 @@
+"""Serve NetCDF/HDF5 archives as virtual zarr stores, without converting them
+
+NetCDF4 files are HDF5 files, their variables are stored as chunks at known
+byte offsets, compressed with codecs zarr has as well. Scanning the files
+once records where every chunk is (a kerchunk style reference index), zarr
+then reads the files through an fsspec ReferenceFileSystem, fetching every
+chunk with one ranged read. A point query reads only the chunks it needs.
+
+files covering consecutive times are indexed into one store, concatenated
+along the time dimension.
+
+usage:
+    python -m weather_catalog.data.reference_index OUTPUT FILE [FILE ...]
+
+OUTPUT ends with .json or .parquet, FILE may be local or any fsspec url.
+"""
+
+import argparse
+import base64
+import json
+import os
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+from loguru import logger
+
+from weather_catalog.enums import Coordinate
+
+from .array_layout import DIMENSIONS_ATTRIBUTE
+from .time_index import decode_cf_times, encode_cf_times
+
+if TYPE_CHECKING:
+    from zarr.hierarchy import Group
+
+# the file extensions LocalCatalog serves as reference stores
+REFERENCE_INDEX_SUFFIXES = (".refs.json", ".refs.parquet")
+
+# a reference is inline data (str) or (url, offset, size) of a byte range
+Reference = Union[str, list]
+
+# HDF5 filter ids, see H5Zpublic.h and the registered filter plugins
+_DEFLATE = 1
+_SHUFFLE = 2
+_FLETCHER32 = 3
+_ZSTD = 32015
+
+# bookkeeping attributes of the netCDF4 and HDF5 dimension scale APIs
+_INTERNAL_ATTRIBUTES = {
+    "CLASS",
+    "DIMENSION_LIST",
+    "NAME",
+    "REFERENCE_LIST",
+    "_NCProperties",
+    "_Netcdf4Coordinates",
+    "_Netcdf4Dimid",
+    "_nc3_strict",
+}
+
+_PURE_DIMENSION = "This is a netCDF dimension but not a netCDF variable"
+
+
+class _IndexedVariable(NamedTuple):
+    """A variable of one file: its zarr metadata and where its chunks are"""
+
+    zarray: dict[str, Any]
+    attributes: dict[str, Any]
+    dimensions: tuple[str, ...]
+    chunks: dict[tuple[int, ...], Reference]
+
+
+def build_reference_index(
+    urls: Sequence[str],
+    time_dimension: str = Coordinate.TIME.value,
+    storage_options: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    """Scan NetCDF4/HDF5 files and record where the chunks of their variables are
+
+    files are ordered by their first time and concatenated along
+    time_dimension, they have to share variables, grid and chunking. Every
+    file but the last has to hold a whole number of time chunks. Coordinates
+    are stored inline, the time coordinate re-encoded in the units of the
+    first file.
+
+    Args:
+        urls (Sequence[str]): The files to index, local paths or fsspec urls
+        time_dimension (str): The dimension the files are concatenated along
+        storage_options (Optional[dict[str, Any]]): Passed to fsspec to open
+            remote files
+
+    Returns:
+        dict[str, Any]: A version 1 reference index, with consolidated metadata
+    """
+    if not urls:
+        raise ValueError("No files to index")
+    # local files are referenced by absolute path, the index may be read from anywhere
+    urls = [url if "://" in url else os.path.abspath(url) for url in urls]
+    files = [_index_file(url, storage_options or {}) for url in urls]
+    files.sort(key=lambda file: _first_time(file, time_dimension))
+    attributes, variables = _concatenate(files, time_dimension)
+
+    references: dict[str, Reference] = {}
+    metadata: dict[str, Any] = {
+        ".zgroup": {"zarr_format": 2},
+        ".zattrs": attributes,
+    }
+    for name, variable in variables.items():
+        metadata[f"{name}/.zarray"] = variable.zarray
+        metadata[f"{name}/.zattrs"] = {
+            **variable.attributes,
+            DIMENSIONS_ATTRIBUTE: list(variable.dimensions),
+        }
+        for chunk_index, reference in variable.chunks.items():
+            key = ".".join(str(index) for index in chunk_index) or "0"
+            references[f"{name}/{key}"] = reference
+
+    metadata_references = {key: _to_json(value) for key, value in metadata.items()}
+    metadata_references[".zmetadata"] = _to_json(
+        {"zarr_consolidated_format": 1, "metadata": metadata}
+    )
+    logger.debug(
+        f"Indexed {len(references)} chunks of {len(variables)} variables "
+        f"in {len(files)} files"
+    )
+    return {"version": 1, "refs": {**metadata_references, **references}}
+
+
+def write_reference_index(index: dict[str, Any], path: str) -> None:
+    """Write a reference index as JSON, or as Parquet for large archives
+
+    Args:
+        index (dict[str, Any]): The index built by build_reference_index
+        path (str): Where to write it, Parquet if it ends with .parquet
+    """
+    temporary_path = f"{path}.tmp"
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        keys, urls, offsets, sizes, raw = [], [], [], [], []
+        for key, reference in index["refs"].items():
+            keys.append(key)
+            is_range = isinstance(reference, list)
+            urls.append(reference[0] if is_range else None)
+            offsets.append(reference[1] if is_range else None)
+            sizes.append(reference[2] if is_range else None)
+            raw.append(None if is_range else reference)
+        table = pa.table(
+            {
+                "key": pa.array(keys, pa.string()),
+                "url": pa.array(urls, pa.string()),
+                "offset": pa.array(offsets, pa.int64()),
+                "size": pa.array(sizes, pa.int64()),
+                "raw": pa.array(raw, pa.string()),
+            }
+        )
+        pq.write_table(table, temporary_path, compression="zstd")
+    else:
+        with open(temporary_path, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+    os.replace(temporary_path, path)
+
+
+def read_reference_index(path: str) -> dict[str, Any]:
+    """Read a reference index written by write_reference_index
+
+    Args:
+        path (str): The .json or .parquet file
+
+    Returns:
+        dict[str, Any]: The version 1 reference index
+    """
+    if not path.endswith(".parquet"):
+        with open(path) as f:
+            return json.load(f)
+
+    import pyarrow.parquet as pq
+
+    columns = pq.read_table(path).to_pydict()
+    references: dict[str, Reference] = {}
+    rows = zip(
+        columns["key"],
+        columns["url"],
+        columns["offset"],
+        columns["size"],
+        columns["raw"],
+    )
+    for key, url, offset, size, raw in rows:
+        references[key] = raw if url is None else [url, offset, size]
+    return {"version": 1, "refs": references}
+
+
+def open_reference_store(
+    index: Union[str, dict[str, Any]],
+    storage_options: Optional[dict[str, Any]] = None,
+) -> "Group":
+    """Open the files of a reference index as a read only zarr group
+
+    Args:
+        index (Union[str, dict[str, Any]]): The index or the path of its file
+        storage_options (Optional[dict[str, Any]]): Passed to the filesystem
+            of the referenced files, e.g. credentials for s3:// urls
+
+    Returns:
+        Group: The virtual store, usable as the dataset of a ZarrayDataCube
+    """
+    import fsspec
+    import zarr
+
+    if isinstance(index, str):
+        index = read_reference_index(index)
+    filesystem = fsspec.filesystem(
+        "reference",
+        fo=index,
+        remote_options=storage_options or {},
+        skip_instance_cache=True,
+    )
+    return zarr.open_consolidated(filesystem.get_mapper(""), mode="r")
+
+
+def _index_file(url: str, storage_options: dict[str, Any]) -> dict[str, Any]:
+    """Index the variables of one file
+
+    Returns:
+        dict[str, Any]: The file's "attributes" and indexed "variables"
+    """
+    import fsspec
+    import h5py
+
+    with fsspec.open(url, "rb", **storage_options) as f, h5py.File(f, "r") as file:
+        variables = {}
+        for name, dataset in file.items():
+            if not isinstance(dataset, h5py.Dataset):
+                logger.warning(f"Skipping group {name} of {url}, not indexed")
+                continue
+            if _is_pure_dimension(dataset):
+                continue
+            try:
+                variables[name] = _index_dataset(url, name, dataset)
+            except ValueError as e:
+                logger.warning(f"Skipping variable {name} of {url}: {e}")
+        return {"attributes": _attributes(file.attrs), "variables": variables}
+
+
+def _index_dataset(url: str, name: str, dataset: Any) -> _IndexedVariable:
+    import h5py
+
+    dtype = dataset.dtype
+    if dtype.kind not in "biuf" or dtype.fields is not None:
+        raise ValueError(f"dtype {dtype} has no zarr equivalent")
+
+    dimensions = tuple(
+        _dimension_name(dataset, axis) for axis in range(len(dataset.shape))
+    )
+    attributes = _attributes(dataset.attrs)
+    fill_value = attributes.get("_FillValue", dataset.fillvalue)
+    is_coordinate = dimensions == (name,)
+    layout = dataset.id.get_create_plist().get_layout()
+
+    if is_coordinate or dataset.ndim == 0 or layout == h5py.h5d.COMPACT:
+        # coordinates are small and read whole, they are stored inline
+        values = np.ascontiguousarray(dataset[...])
+        return _IndexedVariable(
+            zarray=_zarray(values.shape, values.shape, dtype, fill_value, []),
+            attributes=attributes,
+            dimensions=dimensions,
+            chunks={(0,) * values.ndim: _inline(values)},
+        )
+
+    filters = _filters(dataset)
+    if layout == h5py.h5d.CONTIGUOUS:
+        chunk_shape = dataset.shape
+        offset = dataset.id.get_offset()
+        chunks: dict[tuple[int, ...], Reference] = {}
+        if offset is not None:
+            chunks[(0,) * dataset.ndim] = [
+                url,
+                int(offset),
+                int(dataset.id.get_storage_size()),
+            ]
+    else:
+        chunk_shape = dataset.chunks
+        chunks = {}
+
+        def add_chunk(info: Any) -> None:
+            chunk_index = tuple(
+                start // length for start, length in zip(info.chunk_offset, chunk_shape)
+            )
+            chunks[chunk_index] = [url, int(info.byte_offset), int(info.size)]
+
+        dataset.id.chunk_iter(add_chunk)
+
+    return _IndexedVariable(
+        zarray=_zarray(dataset.shape, chunk_shape, dtype, fill_value, filters),
+        attributes=attributes,
+        dimensions=dimensions,
+        chunks=chunks,
+    )
+
+
+def _filters(dataset: Any) -> list[dict[str, Any]]:
+    """The HDF5 filter pipeline of a dataset as zarr filters, in encoding order"""
+    plist = dataset.id.get_create_plist()
+    filters = []
+    for position in range(plist.get_nfilters()):
+        filter_id, _, values, _ = plist.get_filter(position)
+        if filter_id == _DEFLATE:
+            filters.append({"id": "zlib", "level": int(values[0]) if values else 1})
+        elif filter_id == _SHUFFLE:
+            filters.append({"id": "shuffle", "elementsize": dataset.dtype.itemsize})
+        elif filter_id == _FLETCHER32:
+            filters.append({"id": "fletcher32"})
+        elif filter_id == _ZSTD:
+            filters.append({"id": "zstd", "level": int(values[0]) if values else 0})
+        else:
+            raise ValueError(f"HDF5 filter {filter_id} is not supported")
+    return filters
+
+
+def _zarray(
+    shape: tuple[int, ...],
+    chunks: tuple[int, ...],
+    dtype: np.dtype,
+    fill_value: Any,
+    filters: list[dict[str, Any]],
+) -> dict[str, Any]:
+    if fill_value is not None:
+        fill_value = np.asarray(fill_value, dtype=dtype).item()
+        if isinstance(fill_value, float) and not np.isfinite(fill_value):
+            # zarr's JSON spelling of the non-finite fill values
+            fill_value = {"nan": "NaN", "inf": "Infinity", "-inf": "-Infinity"}[
+                str(fill_value)
+            ]
+    return {
+        "zarr_format": 2,
+        "shape": list(shape),
+        "chunks": [max(length, 1) for length in chunks],
+        "dtype": dtype.str,
+        "fill_value": fill_value,
+        "order": "C",
+        "compressor": None,
+        "filters": filters or None,
+    }
+
+
+def _concatenate(
+    files: list[dict[str, Any]], time_dimension: str
+) -> tuple[dict[str, Any], dict[str, _IndexedVariable]]:
+    """Combine the variables of consecutive files along the time dimension"""
+    first = files[0]["variables"]
+    variables = {}
+    for name, variable in first.items():
+        if time_dimension not in variable.dimensions:
+            variables[name] = variable
+            continue
+        parts = [file["variables"].get(name) for file in files]
+        if any(part is None for part in parts):
+            raise ValueError(f"Variable {name} is missing from some of the files")
+        if name == time_dimension:
+            variables[name] = _concatenate_times(parts)
+        else:
+            variables[name] = _concatenate_chunks(name, parts, time_dimension)
+    return files[0]["attributes"], variables
+
+
+def _concatenate_chunks(
+    name: str, parts: list[_IndexedVariable], time_dimension: str
+) -> _IndexedVariable:
+    first = parts[0]
+    axis = first.dimensions.index(time_dimension)
+    time_chunk = first.zarray["chunks"][axis]
+    shape = list(first.zarray["shape"])
+    shape[axis] = 0
+    chunks: dict[tuple[int, ...], Reference] = {}
+
+    for position, part in enumerate(parts):
+        if (
+            part.dimensions != first.dimensions
+            or _without(part.zarray["shape"], axis)
+            != _without(first.zarray["shape"], axis)
+            or part.zarray["chunks"] != first.zarray["chunks"]
+            or part.zarray["filters"] != first.zarray["filters"]
+            or part.zarray["dtype"] != first.zarray["dtype"]
+        ):
+            raise ValueError(f"Variable {name} is laid out differently across files")
+        if shape[axis] % time_chunk and position > 0:
+            raise ValueError(
+                f"Variable {name} can not be concatenated, the files before the "
+                f"last must hold a multiple of {time_chunk} times"
+            )
+        chunk_offset = shape[axis] // time_chunk
+        for chunk_index, reference in part.chunks.items():
+            shifted = list(chunk_index)
+            shifted[axis] += chunk_offset
+            chunks[tuple(shifted)] = reference
+        shape[axis] += part.zarray["shape"][axis]
+
+    return first._replace(zarray={**first.zarray, "shape": shape}, chunks=chunks)
+
+
+def _concatenate_times(parts: list[_IndexedVariable]) -> _IndexedVariable:
+    first = parts[0]
+    units = first.attributes.get("units")
+    calendar = first.attributes.get("calendar")
+    dtype = np.dtype(first.zarray["dtype"])
+    times = np.concatenate(
+        [
+            decode_cf_times(
+                _decode_inline(part), part.attributes.get("units"), calendar
+            )
+            for part in parts
+        ]
+    )
+    values = encode_cf_times(times, units, calendar, dtype)
+    return first._replace(
+        zarray=_zarray(values.shape, values.shape, dtype, None, []),
+        chunks={(0,): _inline(values)},
+    )
+
+
+def _first_time(file: dict[str, Any], time_dimension: str) -> np.datetime64:
+    time = file["variables"].get(time_dimension)
+    if time is None:
+        return np.datetime64("NaT")
+    attributes = time.attributes
+    values = decode_cf_times(
+        _decode_inline(time), attributes.get("units"), attributes.get("calendar")
+    )
+    return values[0] if values.size else np.datetime64("NaT")
+
+
+def _is_pure_dimension(dataset: Any) -> bool:
+    """Whether a dataset only holds a netCDF dimension without coordinate values"""
+    name = _to_python(dataset.attrs.get("NAME", ""))
+    return isinstance(name, str) and name.startswith(_PURE_DIMENSION)
+
+
+def _dimension_name(dataset: Any, axis: int) -> str:
+    if dataset.ndim == 1 and dataset.is_scale:
+        # a coordinate variable is the scale of its own dimension
+        return dataset.name.rsplit("/", 1)[-1]
+    scales = dataset.dims[axis]
+    if len(scales):
+        return scales[0].name.rsplit("/", 1)[-1]
+    return f"phony_dim_{axis}"
+
+
+def _attributes(attrs: Any) -> dict[str, Any]:
+    attributes = {}
+    for key in attrs:
+        if key in _INTERNAL_ATTRIBUTES:
+            continue
+        try:
+            value = attrs[key]
+        except (OSError, TypeError):
+            continue
+        attributes[key] = _to_python(value)
+    return attributes
+
+
+def _to_python(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if isinstance(value, np.ndarray):
+        if value.size == 1:
+            return _to_python(value.reshape(-1)[0])
+        return [_to_python(item) for item in value.tolist()]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _inline(values: np.ndarray) -> str:
+    return "base64:" + base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def _decode_inline(variable: _IndexedVariable) -> np.ndarray:
+    (reference,) = variable.chunks.values()
+    data = base64.b64decode(reference[len("base64:") :])
+    return np.frombuffer(data, dtype=variable.zarray["dtype"]).reshape(
+        variable.zarray["shape"]
+    )
+
+
+def _to_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _without(shape: list[int], axis: int) -> list[int]:
+    return shape[:axis] + shape[axis + 1 :]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--time-dimension", default=Coordinate.TIME.value)
+    args = parser.parse_args()
+
+    write_reference_index(
+        build_reference_index(args.files, time_dimension=args.time_dimension),
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
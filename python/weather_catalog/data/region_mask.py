@@ -0,0 +1,256 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, Union
+
+import numpy as np
+from zarr.hierarchy import Group
+
+from weather_catalog.instrumentation import InstrumentationSingleton
+from weather_catalog.query.location import BBoxLocation, PolygonLocation
+
+from .store_key import store_key
+
+RegionLocation = Union[BBoxLocation, PolygonLocation]
+
+
+class RegionBlock(NamedTuple):
+    """The part of a region falling into one spatial chunk of an array"""
+
+    y_slice: slice
+    x_slice: slice
+    mask: np.ndarray
+    weights: np.ndarray
+    cell_ids: np.ndarray
+
+
+class RegionMask:
+    """The grid cells of a store falling within a region
+
+    built once per (grid, region): the cells are described within the
+    smallest window of the grid holding the region, together with their
+    area weights (cosine of latitude, zero outside the region) and their
+    position in the flattened list of region cells.
+
+    Args:
+        y_slice (slice): The window along the latitude (or y) axis
+        x_slice (slice): The window along the longitude (or x) axis
+        mask (np.ndarray): Which cells of the window are within the region
+        latitudes (np.ndarray): The latitude of every cell of the window
+        longitudes (np.ndarray): The longitude of every cell of the window
+    """
+
+    def __init__(
+        self,
+        y_slice: slice,
+        x_slice: slice,
+        mask: np.ndarray,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+    ):
+        self.y_slice = y_slice
+        self.x_slice = x_slice
+        self.mask = mask
+        self.weights = np.where(mask, np.cos(np.deg2rad(latitudes)), 0.0)
+        self.cell_ids = np.where(mask, np.cumsum(mask).reshape(mask.shape) - 1, -1)
+        self.cell_latitudes = latitudes[mask]
+        self.cell_longitudes = longitudes[mask]
+        self.cell_count = int(mask.sum())
+        self._blocks: dict[tuple[int, int], list[RegionBlock]] = {}
+
+    def blocks(self, chunks: tuple[int, int]) -> list[RegionBlock]:
+        """Split the region along a spatial chunk grid
+
+        chunks holding no cell of the region are left out, so they are never read
+
+        Args:
+            chunks (tuple[int, int]): The chunk shape along (y, x)
+
+        Returns:
+            list[RegionBlock]: One block per chunk intersecting the region,
+                with absolute slices and the mask, weights and cell ids of the block
+        """
+        blocks = self._blocks.get(chunks)
+        if blocks is not None:
+            return blocks
+
+        blocks = []
+        for y_slice in _chunk_slices(self.y_slice, chunks[0]):
+            for x_slice in _chunk_slices(self.x_slice, chunks[1]):
+                window = (
+                    _shift(y_slice, -self.y_slice.start),
+                    _shift(x_slice, -self.x_slice.start),
+                )
+                mask = self.mask[window]
+                if mask.any():
+                    blocks.append(
+                        RegionBlock(
+                            y_slice=y_slice,
+                            x_slice=x_slice,
+                            mask=mask,
+                            weights=self.weights[window][mask],
+                            cell_ids=self.cell_ids[window][mask],
+                        )
+                    )
+        self._blocks[chunks] = blocks
+        return blocks
+
+
+def build_region_mask(
+    latitudes: np.ndarray, longitudes: np.ndarray, location: RegionLocation
+) -> RegionMask:
+    """Find the cells of a grid within a box or polygon
+
+    Args:
+        latitudes (np.ndarray): The latitude coordinate, 1-D for rectilinear
+            grids or 2-D (y, x) for curvilinear grids
+        longitudes (np.ndarray): The longitude coordinate, shaped like latitudes
+        location (RegionLocation): The region
+
+    Returns:
+        RegionMask: The cells within the region
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    min_latitude, max_latitude, min_longitude, max_longitude = location.bounds()
+    longitude_width = max_longitude - min_longitude
+    if longitude_width < 0:
+        # a box crossing the antimeridian
+        longitude_width += 360.0
+
+    def in_bounds(lats: np.ndarray, lons: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return (lats >= min_latitude) & (lats <= max_latitude), (
+            _unwrap_longitudes(lons, min_longitude) - min_longitude <= longitude_width
+        )
+
+    if latitudes.ndim == 1:
+        lat_in_bounds, lon_in_bounds = in_bounds(latitudes, longitudes)
+        y_slice = _covering_slice(lat_in_bounds)
+        x_slice = _covering_slice(lon_in_bounds)
+        window_latitudes, window_longitudes = np.meshgrid(
+            latitudes[y_slice], longitudes[x_slice], indexing="ij"
+        )
+        mask = np.logical_and.outer(lat_in_bounds[y_slice], lon_in_bounds[x_slice])
+    else:
+        lat_in_bounds, lon_in_bounds = in_bounds(latitudes, longitudes)
+        in_box = lat_in_bounds & lon_in_bounds
+        y_slice = _covering_slice(in_box.any(axis=1))
+        x_slice = _covering_slice(in_box.any(axis=0))
+        window_latitudes = latitudes[y_slice, x_slice]
+        window_longitudes = longitudes[y_slice, x_slice]
+        mask = in_box[y_slice, x_slice]
+
+    if isinstance(location, PolygonLocation) and mask.any():
+        mask = mask & _in_polygon(
+            window_latitudes,
+            _unwrap_longitudes(window_longitudes, min_longitude),
+            location.vertices,
+        )
+
+    return RegionMask(y_slice, x_slice, mask, window_latitudes, window_longitudes)
+
+
+def _unwrap_longitudes(longitudes: np.ndarray, reference: float) -> np.ndarray:
+    # shift longitudes into [reference, reference + 360)
+    return (longitudes - reference) % 360.0 + reference
+
+
+def _covering_slice(selected: np.ndarray) -> slice:
+    indices = np.flatnonzero(selected)
+    if indices.size == 0:
+        return slice(0, 0)
+    return slice(int(indices[0]), int(indices[-1]) + 1)
+
+
+def _in_polygon(
+    latitudes: np.ndarray, longitudes: np.ndarray, vertices: list[tuple[float, float]]
+) -> np.ndarray:
+    # even-odd rule: count the polygon edges crossed by a ray towards +longitude
+    inside = np.zeros(latitudes.shape, dtype=bool)
+    edges = zip(vertices, vertices[1:] + vertices[:1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for (lat_1, lon_1), (lat_2, lon_2) in edges:
+            crosses = (lat_1 > latitudes) != (lat_2 > latitudes)
+            crossing_longitude = lon_1 + (latitudes - lat_1) * (lon_2 - lon_1) / (
+                lat_2 - lat_1
+            )
+            inside ^= crosses & (longitudes < crossing_longitude)
+    return inside
+
+
+def _shift(window: slice, offset: int) -> slice:
+    return slice(window.start + offset, window.stop + offset)
+
+
+def _chunk_slices(window: slice, chunk: int) -> list[slice]:
+    if window.stop <= window.start:
+        return []
+    starts = range((window.start // chunk) * chunk, window.stop, chunk)
+    return [
+        slice(max(start, window.start), min(start + chunk, window.stop))
+        for start in starts
+    ]
+
+
+class RegionMaskCache:
+    """Process wide LRU of region masks, keyed by (store grid, region)
+
+    basins and boxes are queried over and over, their masks are built once
+    and shared by every cube opened on the same store.
+
+    Args:
+        max_entries (int): How many masks are kept
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._masks: OrderedDict[tuple[str, Any], RegionMask] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        dataset: Group,
+        mask_key: Any,
+        builder: Callable[[Group], RegionMask],
+    ) -> RegionMask:
+        """Get the mask of a region on a store's grid, building it on first use
+
+        Args:
+            dataset (Group): The zarr group holding the grid
+            mask_key (Any): Identifies the grid and region within the store
+            builder (Callable[[Group], RegionMask]): Builds the mask from the group
+
+        Returns:
+            RegionMask: The cached mask
+        """
+        key = (store_key(dataset), mask_key)
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                InstrumentationSingleton.count("region_mask_cache_hits")
+                return mask
+
+        with InstrumentationSingleton.span("region_mask.build"):
+            mask = builder(dataset)
+        with self._lock:
+            self._masks[key] = mask
+            while len(self._masks) > self.max_entries:
+                self._masks.popitem(last=False)
+        return mask
+
+    def invalidate(self, key_prefix: str) -> None:
+        """Drop every cached mask belonging to a store
+
+        Args:
+            key_prefix (str): The store key (or a prefix of it) to drop
+        """
+        with self._lock:
+            for key in [k for k in self._masks if k[0].startswith(key_prefix)]:
+                del self._masks[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._masks.clear()
+
+
+RegionMaskCacheSingleton = RegionMaskCache()
@@ -0,0 +1,131 @@
+from typing import Optional
+
+import numpy as np
+
+from weather_catalog.enums import Aggregation, Frequency
+
+_PERIOD_UNITS = {
+    Frequency.HOURLY: "h",
+    Frequency.DAILY: "D",
+    Frequency.MONTHLY: "M",
+}
+
+
+def period_starts(
+    times: np.ndarray, frequency: Frequency
+) -> tuple[np.ndarray, np.ndarray]:
+    """Split sorted times into the periods of a frequency
+
+    Args:
+        times (np.ndarray): Sorted datetime64 times
+        frequency (Frequency): The period length
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The index of the first time of every
+            period and the period labels (the start of the period) as datetime64[ns]
+    """
+    periods = np.asarray(times).astype(f"datetime64[{_PERIOD_UNITS[frequency]}]")
+    if periods.size == 0:
+        return np.empty(0, dtype=np.intp), periods.astype("datetime64[ns]")
+    starts = np.concatenate(([0], np.flatnonzero(periods[1:] != periods[:-1]) + 1))
+    return starts, periods[starts].astype("datetime64[ns]")
+
+
+def is_native_frequency(times: np.ndarray, frequency: Frequency) -> bool:
+    """Whether every time already falls into its own period, so resampling is a no-op"""
+    starts, _ = period_starts(times, frequency)
+    return starts.size == len(times)
+
+
+class TemporalAggregator:
+    """Resamples a time series window by window, without holding it in memory
+
+    every window (e.g. one storage chunk along time) is reduced on arrival
+    with ufunc.reduceat into one partial aggregate per period, only a period
+    straddling two windows is merged with the partial of the previous window.
+    NaN values are skipped, a period holding only NaN values yields NaN.
+
+    Args:
+        frequency (Frequency): The period to resample to
+        aggregation (Aggregation): How the values of a period are combined
+    """
+
+    def __init__(self, frequency: Frequency, aggregation: Aggregation):
+        self.frequency = frequency
+        self.aggregation = aggregation
+        self._labels: list[np.ndarray] = []
+        self._values: list[np.ndarray] = []
+        self._counts: list[np.ndarray] = []
+        self._dtype: Optional[np.dtype] = None
+
+    def add(self, times: np.ndarray, values: np.ndarray) -> None:
+        """Reduce the next window of the series
+
+        Args:
+            times (np.ndarray): The sorted times of the window, later than
+                every time added before
+            values (np.ndarray): The values, time along the first axis
+        """
+        if len(times) == 0:
+            return
+        values = np.asarray(values)
+        if self._dtype is None:
+            self._dtype = (
+                values.dtype
+                if np.issubdtype(values.dtype, np.floating)
+                else np.dtype("float64")
+            )
+
+        starts, labels = period_starts(times, self.frequency)
+        missing = np.isnan(values) if np.issubdtype(values.dtype, np.floating) else None
+        present = ~missing if missing is not None else np.ones(values.shape, dtype=bool)
+        counts = np.add.reduceat(present, starts, axis=0, dtype=np.int64)
+
+        if self.aggregation in (Aggregation.MEAN, Aggregation.SUM):
+            summed = values.astype(np.float64)
+            if missing is not None:
+                summed[missing] = 0.0
+            reduced = np.add.reduceat(summed, starts, axis=0)
+        elif self.aggregation == Aggregation.MIN:
+            reduced = np.fmin.reduceat(values, starts, axis=0)
+        elif self.aggregation == Aggregation.MAX:
+            reduced = np.fmax.reduceat(values, starts, axis=0)
+        else:
+            raise ValueError(f"Unsupported aggregation: {self.aggregation}")
+
+        if self._labels and self._labels[-1][-1] == labels[0]:
+            self._merge_boundary(reduced[0], counts[0])
+            labels, reduced, counts = labels[1:], reduced[1:], counts[1:]
+        if labels.size:
+            self._labels.append(labels)
+            self._values.append(reduced)
+            self._counts.append(counts)
+
+    def result(self) -> tuple[np.ndarray, np.ndarray]:
+        """The resampled series of everything added so far
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The period labels as datetime64[ns]
+                and the aggregated values, one row per period
+        """
+        if not self._labels:
+            return np.empty(0, dtype="datetime64[ns]"), np.empty(0, dtype=self._dtype)
+
+        labels = np.concatenate(self._labels)
+        values = np.concatenate(self._values)
+        counts = np.concatenate(self._counts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if self.aggregation == Aggregation.MEAN:
+                values = values / counts
+            values = np.where(counts > 0, values, np.nan)
+        return labels, values.astype(self._dtype, copy=False)
+
+    def _merge_boundary(self, reduced: np.ndarray, counts: np.ndarray) -> None:
+        previous = self._values[-1]
+        if self.aggregation in (Aggregation.MEAN, Aggregation.SUM):
+            previous[-1] = previous[-1] + reduced
+        elif self.aggregation == Aggregation.MIN:
+            previous[-1] = np.fmin(previous[-1], reduced)
+        else:
+            previous[-1] = np.fmax(previous[-1], reduced)
+        self._counts[-1][-1] = self._counts[-1][-1] + counts
@@ -0,0 +1,74 @@
+import threading
+import uuid
+import weakref
+from typing import Any, Union
+
+from zarr.core import Array
+from zarr.hierarchy import Group
+
+# tokens of the stores without a location, keyed by id() of the live store:
+# the entry is dropped when the store is collected, before its id can be reused
+_store_tokens: dict[int, tuple[weakref.ref, str]] = {}
+_store_tokens_lock = threading.RLock()
+
+
+def store_key(group: Union[Group, Array]) -> str:
+    """Build a stable identifier for the store backing a zarr group or array
+
+    process-wide caches (coordinate indexes, decoded chunks, ...) are keyed by
+    this value so that every DataCube opened on the same store shares them,
+    even though a new DataCube object is created for every query.
+
+    Args:
+        group (Union[Group, Array]): An opened zarr group or array
+
+    Returns:
+        str: An identifier of the form "<store type>:<location>/<node path>"
+    """
+    store = _unwrap_store(group.chunk_store)
+    location = getattr(store, "path", None)
+    if not location:
+        # in-memory stores and reference filesystems have no location,
+        # their identity is the object itself
+        location = _store_token(store)
+    protocol = getattr(getattr(store, "fs", None), "protocol", None)
+    if isinstance(protocol, (tuple, list)):
+        protocol = protocol[0]
+    prefix = protocol if protocol is not None else type(store).__name__
+    return f"{prefix}:{location}/{group.path}"
+
+
+def _store_token(store: Any) -> str:
+    """A token identifying a store object, never reused by another store
+
+    stores are usually unhashable (they compare by content), so the token is
+    looked up by id() and forgotten through a weak reference callback once the
+    store is collected.
+    """
+    store_id = id(store)
+    with _store_tokens_lock:
+        entry = _store_tokens.get(store_id)
+        if entry is not None and entry[0]() is store:
+            return entry[1]
+        token = uuid.uuid4().hex
+        try:
+            reference = weakref.ref(store, lambda _: _forget_token(store_id, token))
+        except TypeError:
+            # not weakly referenceable: a fresh token per call, the caches miss
+            return token
+        _store_tokens[store_id] = (reference, token)
+        return token
+
+
+def _forget_token(store_id: int, token: str) -> None:
+    with _store_tokens_lock:
+        entry = _store_tokens.get(store_id)
+        if entry is not None and entry[1] == token:
+            del _store_tokens[store_id]
+
+
+def _unwrap_store(store: Any) -> Any:
+    """Strip caching / consolidated-metadata wrappers from a zarr store"""
+    while hasattr(store, "_store") and not hasattr(store, "path"):
+        store = store._store
+    return store
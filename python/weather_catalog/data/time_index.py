@@ -0,0 +1,206 @@
+import re
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+_STANDARD_CALENDARS = {"standard", "gregorian", "proleptic_gregorian"}
+
+_CF_UNITS = {
+    "nanoseconds": "ns",
+    "microseconds": "us",
+    "milliseconds": "ms",
+    "seconds": "s",
+    "minutes": "m",
+    "hours": "h",
+    "days": "D",
+}
+
+_CF_UNITS_PATTERN = re.compile(r"^\s*(\w+)\s+since\s+(.+?)\s*$")
+
+
+class TimeIndex:
+    """Sorted time coordinate of a store, searched with bisection"""
+
+    def __init__(self, times: np.ndarray):
+        times = np.asarray(times, dtype="datetime64[ns]")
+        if times.ndim != 1:
+            raise ValueError("TimeIndex requires a 1-D time coordinate")
+        if times.size > 1 and not np.all(times[1:] >= times[:-1]):
+            raise ValueError("TimeIndex requires a monotonically increasing time coordinate")
+        self.times = times
+
+    def slice_between(
+        self, start_date: Optional[datetime], end_date: Optional[datetime]
+    ) -> slice:
+        """Find the index range of the times within [start_date, end_date]
+
+        Args:
+            start_date (Optional[datetime]): The first time to include, unbounded if None
+            end_date (Optional[datetime]): The last time to include, unbounded if None
+
+        Returns:
+            slice: The slice of the time axis covering the range
+        """
+        start = (
+            0
+            if start_date is None
+            else int(np.searchsorted(self.times, to_datetime64(start_date), "left"))
+        )
+        stop = (
+            self.times.size
+            if end_date is None
+            else int(np.searchsorted(self.times, to_datetime64(end_date), "right"))
+        )
+        return slice(start, max(start, stop))
+
+    def to_index(self, time_slice: slice = slice(None)) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.times[time_slice], name="time")
+
+
+def to_datetime64(value: datetime) -> np.datetime64:
+    """Convert a datetime to a naive UTC datetime64, the convention of the stores"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, "ns")
+
+
+def decode_cf_times(
+    values: np.ndarray, units: Optional[str], calendar: Optional[str] = None
+) -> np.ndarray:
+    """Decode a CF convention time coordinate into datetime64 values
+
+    e.g. values [0, 1, 2] with units "hours since 2020-01-01 00:00:00"
+
+    Args:
+        values (np.ndarray): The raw time coordinate values
+        units (Optional[str]): The CF "units" attribute,
+            may be None when the values already are datetime64
+        calendar (Optional[str]): The CF "calendar" attribute, defaults to standard
+
+    Returns:
+        np.ndarray: The decoded times as datetime64[ns]
+    """
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]")
+    if units is None:
+        raise ValueError("Time coordinate has no units attribute, cannot decode it")
+
+    match = _CF_UNITS_PATTERN.match(units)
+    if match is None or match.group(1).lower() not in _CF_UNITS:
+        raise ValueError(f"Unsupported CF time units: {units!r}")
+    unit, reference = match.group(1).lower(), match.group(2)
+
+    calendar = (calendar or "standard").lower()
+    if calendar not in _STANDARD_CALENDARS:
+        return _decode_non_standard_calendar(values, units, calendar)
+
+    reference_time = pd.Timestamp(reference)
+    if reference_time.tzinfo is not None:
+        reference_time = reference_time.tz_convert("UTC").tz_localize(None)
+
+    nanoseconds_per_unit = pd.Timedelta(1, _CF_UNITS[unit]).value
+    if np.issubdtype(values.dtype, np.integer):
+        offsets = values.astype(np.int64) * nanoseconds_per_unit
+    else:
+        offsets = np.rint(values.astype(np.float64) * nanoseconds_per_unit).astype(
+            np.int64
+        )
+    return np.datetime64(reference_time.to_datetime64(), "ns") + offsets.astype(
+        "timedelta64[ns]"
+    )
+
+
+def encode_cf_times(
+    times: np.ndarray,
+    units: Optional[str],
+    calendar: Optional[str] = None,
+    dtype: np.dtype = np.dtype("float64"),
+) -> np.ndarray:
+    """Encode datetime64 values into a CF convention time coordinate
+
+    the inverse of decode_cf_times, used to append times to an existing store
+
+    Args:
+        times (np.ndarray): The times to encode
+        units (Optional[str]): The CF "units" attribute of the target coordinate,
+            None when the target stores datetime64 values
+        calendar (Optional[str]): The CF "calendar" attribute, defaults to standard
+        dtype (np.dtype): The dtype of the target coordinate
+
+    Returns:
+        np.ndarray: The encoded values
+    """
+    times = np.asarray(times, dtype="datetime64[ns]")
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.datetime64):
+        return times.astype(dtype)
+    if units is None:
+        raise ValueError("Time coordinate has no units attribute, cannot encode it")
+
+    match = _CF_UNITS_PATTERN.match(units)
+    if match is None or match.group(1).lower() not in _CF_UNITS:
+        raise ValueError(f"Unsupported CF time units: {units!r}")
+    unit, reference = match.group(1).lower(), match.group(2)
+
+    calendar = (calendar or "standard").lower()
+    if calendar not in _STANDARD_CALENDARS:
+        import cftime
+
+        values = np.asarray(
+            cftime.date2num(
+                times.astype("datetime64[us]").tolist(), units, calendar=calendar
+            )
+        )
+    else:
+        reference_time = pd.Timestamp(reference)
+        if reference_time.tzinfo is not None:
+            reference_time = reference_time.tz_convert("UTC").tz_localize(None)
+        offsets = (times - np.datetime64(reference_time.to_datetime64(), "ns")).astype(
+            np.int64
+        )
+        nanoseconds_per_unit = pd.Timedelta(1, _CF_UNITS[unit]).value
+        if np.issubdtype(dtype, np.integer):
+            values, remainders = np.divmod(offsets, nanoseconds_per_unit)
+            if np.any(remainders):
+                raise ValueError(f"Times are not whole multiples of {units!r}")
+        else:
+            values = offsets / nanoseconds_per_unit
+
+    if not np.issubdtype(dtype, np.integer):
+        return np.asarray(values).astype(dtype)
+    if not np.all(np.mod(values, 1) == 0):
+        raise ValueError(f"Times are not whole multiples of {units!r}")
+    return np.rint(values).astype(dtype)
+
+
+def _decode_non_standard_calendar(
+    values: np.ndarray, units: str, calendar: str
+) -> np.ndarray:
+    # cftime ships with netcdf4, only needed for model calendars (noleap, 360_day, ...)
+    import cftime
+
+    try:
+        dates = cftime.num2date(
+            values, units, calendar=calendar, only_use_python_datetimes=True
+        )
+    except ValueError as e:
+        raise ValueError(
+            f"Cannot represent {calendar!r} calendar times as datetimes: {e}"
+        ) from e
+    return np.asarray(dates, dtype="datetime64[ns]")
+
+
+def build_time_index(values: np.ndarray, attrs: dict) -> TimeIndex:
+    """Build a time index from a time coordinate array and its attributes
+
+    Args:
+        values (np.ndarray): The raw time coordinate values
+        attrs (dict): The array attributes holding the CF "units" and "calendar"
+
+    Returns:
+        TimeIndex: The decoded, searchable time index
+    """
+    return TimeIndex(decode_cf_times(values, attrs.get("units"), attrs.get("calendar")))
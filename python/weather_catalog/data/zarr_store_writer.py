@@ -0,0 +1,324 @@
+import itertools
+import math
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Iterator, Optional
+
+import zarr
+from loguru import logger
+from zarr.core import Array
+from zarr.hierarchy import Group
+
+from weather_catalog.basemodel import BaseModel
+from weather_catalog.enums import Coordinate
+
+from .array_layout import DIMENSIONS_ATTRIBUTE, array_dimensions
+from .time_index import build_time_index, encode_cf_times
+
+Region = tuple[slice, ...]
+
+# the default compressor of ZarrWriteOptions, keeps the codec of the source arrays
+SOURCE_COMPRESSOR = "source"
+
+
+class ZarrWriteOptions(BaseModel):
+    """How a ZarrStoreWriter lays out the arrays it writes
+
+    Args:
+        chunks (Optional[dict[str, int]]): Chunk length per dimension name,
+            dimensions not listed keep the chunking of the source array
+        compressor (Optional[Any]): A numcodecs codec for the written arrays,
+            None writes uncompressed chunks. The source array's compressor
+            by default (SOURCE_COMPRESSOR)
+        dtype (Optional[str]): The dtype of the data variables, coordinates
+            keep their dtype. The source dtype if None
+        max_workers (int): How many chunks are written concurrently
+        use_processes (bool): Write on a process pool instead of a thread pool,
+            for compressors that hold the GIL
+        max_memory_bytes (Optional[int]): Bound on the decoded values held by
+            all concurrent writes together. Within it, every write covers a
+            block of several target chunks, so that source chunks laid out
+            differently (e.g. when rechunking) are read as few times as
+            possible. One write per target chunk if None
+    """
+
+    chunks: Optional[dict[str, int]] = None
+    compressor: Optional[Any] = SOURCE_COMPRESSOR
+    dtype: Optional[str] = None
+    max_workers: int = min(32, os.cpu_count() or 1)
+    use_processes: bool = False
+    max_memory_bytes: Optional[int] = None
+
+
+class ZarrStoreWriter:
+    """Writes zarr groups into chunked zarr directory stores
+
+    every task writes whole chunks of the target array, so tasks never touch
+    the same chunk and can run concurrently. Appending along the time axis
+    resizes the target arrays and only writes the chunks holding new times,
+    the cost of an ingest is proportional to the new data, not to the archive.
+
+    Args:
+        options (ZarrWriteOptions): The chunking, compression, dtype and
+            parallelism of the writes
+        time_dimension (str): The name of the dimension appended along
+    """
+
+    def __init__(
+        self,
+        options: Optional[ZarrWriteOptions] = None,
+        time_dimension: str = Coordinate.TIME.value,
+    ):
+        self.options = options or ZarrWriteOptions()
+        self.time_dimension = time_dimension
+
+    def write(self, source: Group, path: str) -> Group:
+        """Write a group into a new store, replacing anything at path
+
+        Args:
+            source (Group): The group to write
+            path (str): The path of the zarr directory store
+
+        Returns:
+            Group: The written group
+        """
+        target = zarr.open_group(path, mode="w")
+        target.attrs.update(dict(source.attrs))
+
+        tasks = []
+        for name, source_array in source.arrays():
+            dimensions = array_dimensions(source_array)
+            is_coordinate = dimensions == (name,)
+            target_array = target.create(
+                name,
+                shape=source_array.shape,
+                chunks=self._chunks(source_array, dimensions),
+                dtype=source_array.dtype
+                if is_coordinate or self.options.dtype is None
+                else self.options.dtype,
+                compressor=self._compressor(source_array),
+                fill_value=source_array.fill_value,
+                filters=source_array.filters,
+            )
+            target_array.attrs.update(dict(source_array.attrs))
+            target_array.attrs[DIMENSIONS_ATTRIBUTE] = list(dimensions)
+
+            blocks = self._blocks(source_array, target_array)
+            tasks.extend(
+                (source_array, target_array, region, region)
+                for region in _chunk_regions(target_array, None, None, blocks)
+            )
+
+        self._run(tasks)
+        zarr.consolidate_metadata(path)
+        logger.debug(f"Wrote {len(tasks)} regions to {path}")
+        return target
+
+    def append(self, source: Group, path: str) -> int:
+        """Append the times of a group to the end of an existing store
+
+        Args:
+            source (Group): The group holding the new times, with the same
+                variables and grid as the store
+            path (str): The path of the zarr directory store
+
+        Returns:
+            int: The number of appended times
+        """
+        target = zarr.open_group(path, mode="r+")
+        time_name = self.time_dimension
+        source_times = build_time_index(
+            source[time_name][...], dict(source[time_name].attrs)
+        ).times
+        target_times = build_time_index(
+            target[time_name][...], dict(target[time_name].attrs)
+        ).times
+        if source_times.size == 0:
+            return 0
+        if target_times.size and source_times[0] <= target_times[-1]:
+            raise ValueError(
+                f"Cannot append times starting at {source_times[0]} to {path}, "
+                f"which already holds times up to {target_times[-1]}"
+            )
+
+        appended_arrays = self._appended_arrays(source, target, source_times.size)
+
+        tasks = []
+        for name, (source_array, target_array, axis) in appended_arrays.items():
+            if name == time_name:
+                continue
+            start = target_array.shape[axis]
+            shape = list(target_array.shape)
+            shape[axis] = start + source_times.size
+            target_array.resize(*shape)
+            blocks = self._blocks(source_array, target_array)
+            for region in _chunk_regions(target_array, start, axis, blocks):
+                source_region = list(region)
+                source_region[axis] = slice(
+                    region[axis].start - start, region[axis].stop - start
+                )
+                tasks.append((source_array, target_array, tuple(source_region), region))
+
+        self._run(tasks)
+
+        # the time coordinate is resized and written last, once every variable
+        # holds the new times: until then readers only see the previous times
+        time_array = target[time_name]
+        time_array.resize(target_times.size + source_times.size)
+        time_array[target_times.size :] = encode_cf_times(
+            source_times,
+            time_array.attrs.get("units"),
+            time_array.attrs.get("calendar"),
+            time_array.dtype,
+        )
+
+        zarr.consolidate_metadata(path)
+        logger.debug(
+            f"Appended {source_times.size} times in {len(tasks)} regions to {path}"
+        )
+        return int(source_times.size)
+
+    def _appended_arrays(
+        self, source: Group, target: Group, times: int
+    ) -> dict[str, tuple[Array, Array, int]]:
+        appended_arrays = {}
+        for name, target_array in target.arrays():
+            dimensions = array_dimensions(target_array)
+            if self.time_dimension not in dimensions:
+                continue
+            if name not in source:
+                raise ValueError(f"Variable {name} is missing from the appended data")
+
+            source_array = source[name]
+            axis = dimensions.index(self.time_dimension)
+            if (
+                array_dimensions(source_array) != dimensions
+                or _without(source_array.shape, axis) != _without(target_array.shape, axis)
+                or source_array.shape[axis] != times
+            ):
+                raise ValueError(
+                    f"Variable {name} of the appended data does not match the store, "
+                    f"got {array_dimensions(source_array)} {source_array.shape}, "
+                    f"expected {dimensions} {target_array.shape}"
+                )
+            appended_arrays[name] = (source_array, target_array, axis)
+        return appended_arrays
+
+    def _compressor(self, source_array: Array) -> Optional[Any]:
+        if isinstance(self.options.compressor, str):
+            if self.options.compressor != SOURCE_COMPRESSOR:
+                raise ValueError(
+                    f"Unknown compressor {self.options.compressor}, "
+                    f"expected a numcodecs codec, None or {SOURCE_COMPRESSOR!r}"
+                )
+            return source_array.compressor
+        return self.options.compressor
+
+    def _chunks(self, array: Array, dimensions: tuple[str, ...]) -> tuple[int, ...]:
+        chunks = self.options.chunks or {}
+        return tuple(
+            min(chunks.get(dimension, default), max(size, 1))
+            for dimension, default, size in zip(dimensions, array.chunks, array.shape)
+        )
+
+    def _blocks(self, source_array: Array, target_array: Array) -> tuple[int, ...]:
+        """The shape of the regions written at once, a multiple of the target chunks
+
+        starting from one target chunk, the block is doubled along the dimension
+        cutting the source chunks the most, as long as a block and one decoded
+        source chunk fit in max_memory_bytes / max_workers
+        """
+        block = list(target_array.chunks)
+        if self.options.max_memory_bytes is None:
+            return tuple(block)
+
+        itemsize = max(source_array.dtype.itemsize, target_array.dtype.itemsize)
+        budget = self.options.max_memory_bytes // max(self.options.max_workers, 1)
+        budget -= math.prod(source_array.chunks) * source_array.dtype.itemsize
+
+        def block_bytes(shape: list[int]) -> int:
+            return math.prod(
+                min(length, size) for length, size in zip(shape, target_array.shape)
+            ) * itemsize
+
+        if block_bytes(block) > budget:
+            logger.warning(
+                f"One chunk of {target_array.path} and one of its source take more "
+                f"than the memory budget of a worker, writing chunk by chunk"
+            )
+            return tuple(block)
+
+        while True:
+            # dimensions along which a block still cuts through source chunks
+            growable = sorted(
+                (
+                    dimension
+                    for dimension, (length, size, source_chunk) in enumerate(
+                        zip(block, target_array.shape, source_array.chunks)
+                    )
+                    if length < min(size, source_chunk)
+                ),
+                key=lambda dimension: block[dimension] / source_array.chunks[dimension],
+            )
+            for dimension in growable:
+                grown = list(block)
+                grown[dimension] = block[dimension] * 2
+                if block_bytes(grown) <= budget:
+                    block = grown
+                    break
+            else:
+                return tuple(block)
+
+    def _run(self, tasks: list[tuple[Array, Array, Region, Region]]) -> None:
+        if not tasks:
+            return
+        if self.options.max_workers <= 1 or len(tasks) == 1:
+            for task in tasks:
+                _copy_region(*task)
+            return
+
+        executor: Executor
+        if self.options.use_processes:
+            executor = ProcessPoolExecutor(max_workers=self.options.max_workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=self.options.max_workers)
+        with executor:
+            futures = [executor.submit(_copy_region, *task) for task in tasks]
+            for future in futures:
+                future.result()
+
+
+def _copy_region(
+    source_array: Array, target_array: Array, source_region: Region, target_region: Region
+) -> None:
+    target_array[target_region] = source_array[source_region]
+
+
+def _without(shape: tuple[int, ...], axis: int) -> tuple[int, ...]:
+    return shape[:axis] + shape[axis + 1 :]
+
+
+def _chunk_regions(
+    array: Array,
+    start: Optional[int],
+    axis: Optional[int],
+    chunks: Optional[tuple[int, ...]] = None,
+) -> Iterator[Region]:
+    """The chunk aligned regions of an array, from start along axis if given
+
+    regions span the array's chunks, or blocks of chunks if given
+    """
+    axis_ranges = []
+    for dimension, (size, chunk) in enumerate(
+        zip(array.shape, chunks or array.chunks)
+    ):
+        first = start if dimension == axis and start is not None else 0
+        boundaries = [first] + list(range((first // chunk + 1) * chunk, size, chunk))
+        axis_ranges.append(
+            [
+                slice(lower, upper)
+                for lower, upper in zip(boundaries, boundaries[1:] + [size])
+                if upper > lower
+            ]
+        )
+    return itertools.product(*axis_ranges)
@@ -1,13 +1,40 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional, Sequence
 
 import numpy as np
 import pandas as pd
+from zarr.core import Array
 from zarr.hierarchy import Group
 
-from weather_catalog.enums import Coordinate, WeatherVariable
+from weather_catalog.enums import (
+    Aggregation,
+    Coordinate,
+    Frequency,
+    OutputFormat,
+    WeatherVariable,
+)
+from weather_catalog.instrumentation import InstrumentationSingleton
 
+from .array_layout import ArrayLayout, array_dimensions, build_array_layout
+from .arrow_output import DataOutput, build_record_batch, convert_record_batch
+from .chunk_cache import ChunkCacheSingleton, Selection
 from .data_cube import DataCube
+from .grid_index import GridIndex, build_grid_index
+from .index_cache import IndexCacheSingleton
+from .read_policy import ReadPolicy
+from .region_mask import (
+    RegionLocation,
+    RegionMask,
+    RegionMaskCacheSingleton,
+    build_region_mask,
+)
+from .resampling import TemporalAggregator, is_native_frequency, period_starts
+from .time_index import TimeIndex, build_time_index
+
+if TYPE_CHECKING:
+    import pyarrow as pa
 
 
 class ZarrayDataCube(DataCube):
@@ -15,11 +42,8 @@ class ZarrayDataCube(DataCube):
 
     variable_rename_map: Optional[dict[WeatherVariable, str]] = None
 
-    _coordinate_index_map: dict[Coordinate, int] = {
-        Coordinate.LATITUDE: 0,
-        Coordinate.LONGITUDE: 1,
-        Coordinate.TIME: 2,
-    }
+    use_chunk_cache: bool = True
+    read_policy: ReadPolicy = ReadPolicy()
 
     _coordinate_rename_map: dict[Coordinate, str] = {
         Coordinate.LATITUDE: "latitude",
@@ -31,42 +55,820 @@ class ZarrayDataCube(DataCube):
         self,
         latitude: float,
         longitude: float,
-        start_date: datetime,  # TODO: incorporate end_date & Start date
+        start_date: datetime,
         end_date: datetime,
         variables: list[WeatherVariable],
-    ) -> pd.DataFrame:
+        output_format: OutputFormat = OutputFormat.PANDAS,
+        frequency: Optional[Frequency] = None,
+        aggregation: Aggregation = Aggregation.MEAN,
+    ) -> DataOutput:
         """Pull data for a single geospatial location and time range
 
+        the values are read into numpy buffers which an Arrow record batch
+        wraps without copying, Arrow outputs hand these buffers out directly
+        and the pandas output is converted from the batch.
+
+        resampling is pushed down into the read: the time range is read one
+        storage chunk at a time and every chunk is reduced before the next
+        one is read, so only one chunk of raw values is held at once.
+
         Args:
             latitude (float): The latitude of the location
             longitude (float): The longitude of the location
             start_date (datetime): The start date of the time range
             end_date (datetime): The end date of the time range
             variables (list[WeatherVariable]): The variables to pull data for
+            output_format (OutputFormat): Return a pandas dataframe (default),
+                a pyarrow Table or a pyarrow RecordBatch
+            frequency (Optional[Frequency]): Resample the data to this frequency,
+                the native frequency of the store if None
+            aggregation (Aggregation): How values are combined when resampling
 
         Returns:
-            pd.DataFrame: A pandas dataframe of the data
+            DataOutput: The data indexed by (or with a column of) time,
+                Arrow schemas carry the requested and grid coordinates
         """
 
-        if self.variable_rename_map is not None:
-            variable_strings = [self.variable_rename_map[v] for v in variables]
+        with InstrumentationSingleton.span(
+            "data_cube.get_data", variables=len(variables)
+        ):
+            with InstrumentationSingleton.span("data_cube.coordinate_search"):
+                lat_index, lon_index = self.grid_index.nearest_point(
+                    latitude, longitude
+                )
+                time_slice = self.time_index.slice_between(start_date, end_date)
+
+            with InstrumentationSingleton.span("data_cube.read"):
+                batch = self._read_point_window(
+                    variables,
+                    (latitude, longitude),
+                    lat_index,
+                    lon_index,
+                    time_slice,
+                    frequency,
+                    aggregation,
+                )
+            with InstrumentationSingleton.span(
+                "output.convert", output_format=output_format.value
+            ):
+                return convert_record_batch(batch, output_format)
+
+    def iter_data(
+        self,
+        latitude: float,
+        longitude: float,
+        start_date: datetime,
+        end_date: datetime,
+        variables: list[WeatherVariable],
+        batch_chunks: int = 1,
+        read_ahead: bool = True,
+        output_format: OutputFormat = OutputFormat.PANDAS,
+        frequency: Optional[Frequency] = None,
+        aggregation: Aggregation = Aggregation.MEAN,
+    ) -> Iterator[DataOutput]:
+        """Stream data for a single location and time range in bounded batches
+
+        batches are aligned to the storage time chunks, so every chunk is read
+        exactly once and memory stays flat however long the time range is.
+        When resampling, every batch boundary is moved forward to the start of
+        the next period, so no period is split over two batches.
+
+        Args:
+            latitude (float): The latitude of the location
+            longitude (float): The longitude of the location
+            start_date (datetime): The start date of the time range
+            end_date (datetime): The end date of the time range
+            variables (list[WeatherVariable]): The variables to pull data for
+            batch_chunks (int): How many storage time chunks go into one batch
+            read_ahead (bool): Read the next batch on a background thread
+                while the current one is being consumed
+            output_format (OutputFormat): The format of the batches
+            frequency (Optional[Frequency]): Resample the data to this frequency,
+                the native frequency of the store if None
+            aggregation (Aggregation): How values are combined when resampling
+
+        Returns:
+            Iterator[DataOutput]: Consecutive batches, indexed by time
+        """
+        if batch_chunks < 1:
+            raise ValueError("batch_chunks must be at least 1")
+
+        lat_index, lon_index = self.grid_index.nearest_point(latitude, longitude)
+        time_slice = self.time_index.slice_between(start_date, end_date)
+        windows = self._time_windows(variables, time_slice, batch_chunks, frequency)
+
+        def read_window(window: slice) -> DataOutput:
+            with InstrumentationSingleton.span(
+                "data_cube.read_batch", times=window.stop - window.start
+            ):
+                batch = self._read_point_window(
+                    variables,
+                    (latitude, longitude),
+                    lat_index,
+                    lon_index,
+                    window,
+                    frequency,
+                    aggregation,
+                )
+                return convert_record_batch(batch, output_format)
+
+        if not read_ahead or len(windows) < 2:
+            for window in windows:
+                yield read_window(window)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            pending: Future = executor.submit(
+                InstrumentationSingleton.bind(read_window), windows[0]
+            )
+            for next_window in windows[1:]:
+                batch = pending.result()
+                pending = executor.submit(
+                    InstrumentationSingleton.bind(read_window), next_window
+                )
+                yield batch
+            yield pending.result()
+        finally:
+            # stop reading ahead if the consumer stops early
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _time_windows(
+        self,
+        variables: list[WeatherVariable],
+        time_slice: slice,
+        batch_chunks: int,
+        frequency: Optional[Frequency] = None,
+    ) -> list[slice]:
+        """Split a time range into windows aligned to the storage time chunks
+
+        with a frequency, every boundary is moved forward to the start of the
+        next period, so windows hold whole periods (at least one)
+        """
+        time_chunk = max(
+            (self.layout(variable).chunks[0] for variable in variables), default=1
+        )
+        step = time_chunk * batch_chunks
+        boundaries = list(
+            range((time_slice.start // step + 1) * step, time_slice.stop, step)
+        )
+        if frequency is not None and boundaries:
+            period_boundaries = (
+                time_slice.start
+                + period_starts(self.time_index.times[time_slice], frequency)[0]
+            )
+            positions = np.searchsorted(period_boundaries, boundaries)
+            boundaries = sorted(
+                {
+                    int(period_boundaries[position])
+                    for position in positions
+                    if position < period_boundaries.size
+                }
+            )
+
+        starts = [time_slice.start] + boundaries
+        stops = boundaries + [time_slice.stop]
+        return [
+            slice(start, stop) for start, stop in zip(starts, stops) if start < stop
+        ]
+
+    def _read_point_window(
+        self,
+        variables: list[WeatherVariable],
+        requested_location: tuple[float, float],
+        lat_index: int,
+        lon_index: int,
+        time_slice: slice,
+        frequency: Optional[Frequency] = None,
+        aggregation: Aggregation = Aggregation.MEAN,
+    ) -> "pa.RecordBatch":
+        def read_window(window: slice) -> dict[str, np.ndarray]:
+            return self._read_variables(
+                variables,
+                lambda array: self._read(array, (window, lat_index, lon_index)),
+            )
+
+        times, var_output_dict = self._read_resampled(
+            variables, time_slice, read_window, frequency, aggregation
+        )
+        grid_latitude, grid_longitude = self.grid_index.coordinates(lat_index, lon_index)
+        metadata = {
+            "requested_latitude": requested_location[0],
+            "requested_longitude": requested_location[1],
+            "grid_latitude": grid_latitude,
+            "grid_longitude": grid_longitude,
+            "grid_index": [lat_index, lon_index],
+            "start_time": str(times[0]) if times.size else None,
+            "end_time": str(times[-1]) if times.size else None,
+            "variables": {
+                variable.value: self._variable_name(variable) for variable in variables
+            },
+        }
+        if frequency is not None:
+            metadata["frequency"] = frequency.value
+            metadata["aggregation"] = aggregation.value
+        return build_record_batch(times, var_output_dict, metadata)
+
+    def _read_resampled(
+        self,
+        variables: list[WeatherVariable],
+        time_slice: slice,
+        read_window: Callable[[slice], dict[str, np.ndarray]],
+        frequency: Optional[Frequency],
+        aggregation: Aggregation,
+        windowed: bool = False,
+    ) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Read a time range, resampled chunk by chunk if a frequency is given
+
+        Args:
+            variables (list[WeatherVariable]): The variables read by read_window
+            time_slice (slice): The range of the time axis to read
+            read_window (Callable[[slice], dict[str, np.ndarray]]): Reads the
+                values of every variable for a range of the time axis,
+                time along the first axis
+            frequency (Optional[Frequency]): The frequency to resample to
+            aggregation (Aggregation): How values are combined when resampling
+            windowed (bool): Call read_window once per storage time chunk even
+                when not resampling, for reads too large to make at once
+
+        Returns:
+            tuple[np.ndarray, dict[str, np.ndarray]]: The times (or period
+                starts) and the values of every variable
+        """
+        times = self.time_index.times[time_slice]
+        if frequency is None or is_native_frequency(times, frequency):
+            if not windowed:
+                return times, read_window(time_slice)
+            windows = [
+                read_window(window)
+                for window in self._time_windows(variables, time_slice, batch_chunks=1)
+            ]
+            if not windows:
+                return times, read_window(time_slice)
+            return times, {
+                variable.value: np.concatenate([w[variable.value] for w in windows])
+                for variable in variables
+            }
+
+        aggregators = {
+            variable.value: TemporalAggregator(frequency, aggregation)
+            for variable in variables
+        }
+        for window in self._time_windows(variables, time_slice, batch_chunks=1):
+            window_values = read_window(window)
+            window_times = self.time_index.times[window]
+            for name, aggregator in aggregators.items():
+                aggregator.add(window_times, window_values[name])
+
+        periods = np.empty(0, dtype="datetime64[ns]")
+        var_output_dict = {}
+        for name, aggregator in aggregators.items():
+            periods, var_output_dict[name] = aggregator.result()
+        return periods, var_output_dict
+
+    def get_data_batch(
+        self,
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        start_date: datetime,
+        end_date: datetime,
+        variables: list[WeatherVariable],
+        point_ids: Optional[Sequence[Any]] = None,
+        frequency: Optional[Frequency] = None,
+        aggregation: Aggregation = Aggregation.MEAN,
+    ) -> pd.DataFrame:
+        """Pull data for many geospatial locations sharing a time range
+
+        grid indices for all points are resolved in one vectorized lookup,
+        points are then grouped by the spatial chunk they fall in
+        and every chunk is read once, however many points it holds.
+
+        Args:
+            latitudes (Sequence[float]): The latitudes of the locations
+            longitudes (Sequence[float]): The longitudes of the locations
+            start_date (datetime): The start date of the time range
+            end_date (datetime): The end date of the time range
+            variables (list[WeatherVariable]): The variables to pull data for
+            point_ids (Optional[Sequence[Any]]): Identifiers of the locations,
+                defaults to their position in the input
+            frequency (Optional[Frequency]): Resample the data to this frequency,
+                the native frequency of the store if None
+            aggregation (Aggregation): How values are combined when resampling
+
+        Returns:
+            pd.DataFrame: A long format dataframe with a "point_id" column
+                followed by one column per variable
+        """
+        latitudes, longitudes, point_ids = self._validate_batch_points(
+            latitudes, longitudes, point_ids
+        )
+        with InstrumentationSingleton.span(
+            "data_cube.coordinate_search", points=int(point_ids.size)
+        ):
+            lat_indices, lon_indices = self.grid_index.nearest(latitudes, longitudes)
+            time_slice = self.time_index.slice_between(start_date, end_date)
+
+        def read_window(window: slice) -> dict[str, np.ndarray]:
+            return self._read_variables(
+                variables,
+                lambda array: self._read_points(
+                    array, window, lat_indices, lon_indices
+                ),
+            )
+
+        with InstrumentationSingleton.span("data_cube.read"):
+            times, var_output_dict = self._read_resampled(
+                variables, time_slice, read_window, frequency, aggregation
+            )
+
+        with InstrumentationSingleton.span("output.convert", output_format="pandas"):
+            time_index = pd.DatetimeIndex(times, name="time")
+
+            long_output_dict = {"point_id": np.repeat(point_ids, len(time_index))}
+            for name, values in var_output_dict.items():
+                long_output_dict[name] = values.T.ravel()
+
+            return pd.DataFrame(
+                long_output_dict,
+                index=pd.DatetimeIndex(
+                    np.tile(time_index, point_ids.size), name="time"
+                ),
+            )
+
+    def get_region_data(
+        self,
+        location: RegionLocation,
+        start_date: datetime,
+        end_date: datetime,
+        variables: list[WeatherVariable],
+        spatial_aggregation: Optional[Aggregation] = None,
+        output_format: OutputFormat = OutputFormat.PANDAS,
+        frequency: Optional[Frequency] = None,
+        aggregation: Aggregation = Aggregation.MEAN,
+    ) -> DataOutput:
+        """Pull data for every grid cell within a box or polygon
+
+        the region is read one (time chunk, spatial chunk) block at a time,
+        spatial chunks holding no cell of the region are skipped. With a
+        spatial_aggregation every block is reduced with the precomputed mask
+        and area weights of the region before the next one is read, so only
+        one block of raw values is held at once however large the region is.
+
+        Args:
+            location (RegionLocation): The box or polygon
+            start_date (datetime): The start date of the time range
+            end_date (datetime): The end date of the time range
+            variables (list[WeatherVariable]): The variables to pull data for
+            spatial_aggregation (Optional[Aggregation]): Combine the cells into
+                one series per variable (MEAN is weighted by cell area),
+                return every cell if None
+            output_format (OutputFormat): Return a pandas dataframe (default),
+                a pyarrow Table or a pyarrow RecordBatch
+            frequency (Optional[Frequency]): Resample the data to this frequency,
+                the native frequency of the store if None
+            aggregation (Aggregation): How values are combined when resampling
+
+        Returns:
+            DataOutput: The region's data indexed by time, with "latitude"
+                and "longitude" columns when the cells are not aggregated
+        """
+        with InstrumentationSingleton.span("data_cube.coordinate_search"):
+            region = self.region_mask(location)
+            time_slice = self.time_index.slice_between(start_date, end_date)
+
+        def read_window(window: slice) -> dict[str, np.ndarray]:
+            if spatial_aggregation is None:
+                return self._read_variables(
+                    variables,
+                    lambda array: self._read_region_cells(array, window, region),
+                )
+            return self._read_variables(
+                variables,
+                lambda array: self._reduce_region(
+                    array, window, region, spatial_aggregation
+                ),
+            )
+
+        with InstrumentationSingleton.span(
+            "data_cube.read", cells=region.cell_count
+        ):
+            times, var_output_dict = self._read_resampled(
+                variables,
+                time_slice,
+                read_window,
+                frequency,
+                aggregation,
+                windowed=True,
+            )
+
+        metadata: dict[str, Any] = {
+            "location": location.model_dump(mode="json"),
+            "cell_count": region.cell_count,
+            "grid_window": [
+                [region.y_slice.start, region.y_slice.stop],
+                [region.x_slice.start, region.x_slice.stop],
+            ],
+            "spatial_aggregation": (
+                spatial_aggregation.value if spatial_aggregation is not None else None
+            ),
+            "variables": {
+                variable.value: self._variable_name(variable) for variable in variables
+            },
+        }
+        if frequency is not None:
+            metadata["frequency"] = frequency.value
+            metadata["aggregation"] = aggregation.value
+
+        if spatial_aggregation is None:
+            columns = {
+                "latitude": np.tile(region.cell_latitudes, times.size),
+                "longitude": np.tile(region.cell_longitudes, times.size),
+            }
+            for name, values in var_output_dict.items():
+                columns[name] = values.reshape(-1)
+            times = np.repeat(times, region.cell_count)
         else:
-            variable_strings = [v.value for v in variables]
+            columns = var_output_dict
+
+        with InstrumentationSingleton.span(
+            "output.convert", output_format=output_format.value
+        ):
+            return convert_record_batch(
+                build_record_batch(times, columns, metadata), output_format
+            )
 
-        lat_index = self._closest_coodinate_index(Coordinate.LATITUDE, latitude)
-        lon_index = self._closest_coodinate_index(Coordinate.LONGITUDE, longitude)
+    def region_mask(self, location: RegionLocation) -> RegionMask:
+        """The cells of the store's grid within a box or polygon
 
-        var_output_dict = {
-            variable.value: self.dataset[variable_string][
-                :, lat_index, lon_index
-            ]  # TODO: how to use the coordinate index map here?
-            for variable, variable_string in zip(variables, variable_strings)
+        built on first use and shared by every cube opened on the same store
+        """
+        latitude_name = self._coordinate_rename_map[Coordinate.LATITUDE]
+        longitude_name = self._coordinate_rename_map[Coordinate.LONGITUDE]
+        return RegionMaskCacheSingleton.get(
+            self.dataset,
+            (
+                latitude_name,
+                longitude_name,
+                type(location).__name__,
+                location.model_dump_json(),
+            ),
+            lambda dataset: build_region_mask(
+                dataset[latitude_name][...], dataset[longitude_name][...], location
+            ),
+        )
+
+    def _read_region_cells(
+        self, array: Array, time_slice: slice, region: RegionMask
+    ) -> np.ndarray:
+        """Read the cells of a region, one read per spatial chunk
+
+        Returns:
+            np.ndarray: A (time, cell) array of values
+        """
+        layout = self._layout(array)
+        n_times = len(range(*time_slice.indices(layout.shape[0])))
+        output = np.empty((n_times, region.cell_count), dtype=array.dtype)
+        for block in region.blocks(layout.chunks[1:]):
+            values = self._read(array, (time_slice, block.y_slice, block.x_slice))
+            output[:, block.cell_ids] = values[:, block.mask]
+        return output
+
+    def _reduce_region(
+        self,
+        array: Array,
+        time_slice: slice,
+        region: RegionMask,
+        spatial_aggregation: Aggregation,
+    ) -> np.ndarray:
+        """Combine the cells of a region into one value per time, chunk by chunk
+
+        NaN values are skipped, MEAN is weighted by the cells' area
+
+        Returns:
+            np.ndarray: A (time,) array of values
+        """
+        layout = self._layout(array)
+        n_times = len(range(*time_slice.indices(layout.shape[0])))
+        if spatial_aggregation in (Aggregation.MIN, Aggregation.MAX):
+            reduced = np.full(n_times, np.nan)
+        else:
+            reduced = np.zeros(n_times)
+        weight = np.zeros(n_times)
+
+        for block in region.blocks(layout.chunks[1:]):
+            values = self._read(array, (time_slice, block.y_slice, block.x_slice))[
+                :, block.mask
+            ].astype(np.float64)
+            valid = ~np.isnan(values)
+            if spatial_aggregation == Aggregation.MEAN:
+                reduced += np.where(valid, values, 0.0) @ block.weights
+                weight += valid @ block.weights
+            elif spatial_aggregation == Aggregation.SUM:
+                reduced += np.where(valid, values, 0.0).sum(axis=1)
+                weight += valid.sum(axis=1)
+            elif spatial_aggregation == Aggregation.MIN:
+                reduced = np.fmin(reduced, np.fmin.reduce(values, axis=1))
+            elif spatial_aggregation == Aggregation.MAX:
+                reduced = np.fmax(reduced, np.fmax.reduce(values, axis=1))
+            else:
+                raise ValueError(f"Unsupported aggregation: {spatial_aggregation}")
+
+        if spatial_aggregation == Aggregation.MEAN:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                reduced = np.where(weight > 0, reduced / weight, np.nan)
+        elif spatial_aggregation == Aggregation.SUM:
+            reduced = np.where(weight > 0, reduced, np.nan)
+
+        result_dtype = (
+            array.dtype if np.issubdtype(array.dtype, np.floating) else np.float64
+        )
+        return reduced.astype(result_dtype, copy=False)
+
+    def _read_points(
+        self,
+        array: Array,
+        time_slice: slice,
+        lat_indices: np.ndarray,
+        lon_indices: np.ndarray,
+    ) -> np.ndarray:
+        """Read the time series of many grid cells, one read per chunk
+
+        Args:
+            array (Array): A zarr variable
+            time_slice (slice): The range of the time axis to read
+            lat_indices (np.ndarray): The latitude index of every point
+            lon_indices (np.ndarray): The longitude index of every point
+
+        Returns:
+            np.ndarray: A (time, point) array of values
+        """
+        layout = self._layout(array)
+        _, lat_chunk, lon_chunk = layout.chunks
+        n_times = len(range(*time_slice.indices(layout.shape[0])))
+        output = np.empty((n_times, lat_indices.size), dtype=array.dtype)
+
+        chunk_ids = np.stack((lat_indices // lat_chunk, lon_indices // lon_chunk))
+        unique_chunks, point_chunk, chunk_sizes = np.unique(
+            chunk_ids, axis=1, return_inverse=True, return_counts=True
+        )
+        points_by_chunk = np.split(
+            np.argsort(point_chunk.ravel(), kind="stable"), np.cumsum(chunk_sizes)[:-1]
+        )
+
+        for (lat_chunk_id, lon_chunk_id), members in zip(
+            unique_chunks.T, points_by_chunk
+        ):
+            lat_start = int(lat_chunk_id) * lat_chunk
+            lon_start = int(lon_chunk_id) * lon_chunk
+            block = self._read(
+                array,
+                (
+                    time_slice,
+                    slice(lat_start, lat_start + lat_chunk),
+                    slice(lon_start, lon_start + lon_chunk),
+                ),
+            )
+            output[:, members] = block[
+                :, lat_indices[members] - lat_start, lon_indices[members] - lon_start
+            ]
+        return output
+
+    def _read_variables(
+        self,
+        variables: list[WeatherVariable],
+        read: Callable[[Array], np.ndarray],
+    ) -> dict[str, np.ndarray]:
+        """Apply a read to the array of every variable
+
+        the coordinate lookups are shared, the reads of different variables
+        are issued concurrently (up to read_policy.max_variable_concurrency),
+        so a multi-variable read takes about as long as its slowest variable.
+
+        Args:
+            variables (list[WeatherVariable]): The variables to read
+            read (Callable[[Array], np.ndarray]): Reads the values of one array
+
+        Returns:
+            dict[str, np.ndarray]: The values of every variable, in order
+        """
+        arrays = {
+            variable.value: self.dataset[self._variable_name(variable)]
+            for variable in variables
         }
+        max_workers = min(self.read_policy.max_variable_concurrency, len(arrays))
+        if max_workers <= 1:
+            return {name: read(array) for name, array in arrays.items()}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                name: executor.submit(InstrumentationSingleton.bind(read), array)
+                for name, array in arrays.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
 
-        return pd.DataFrame(var_output_dict)
+    def _read(self, array: Array, selection: Selection) -> np.ndarray:
+        """Read a region of an array through the process wide decoded-chunk cache
 
-    def _closest_coodinate_index(self, coordinate: Coordinate, value: float) -> int:
-        coordinate_values = np.array(
-            self.dataset[self._coordinate_rename_map[coordinate]]
+        Args:
+            array (Array): A zarr variable, its dimensions in any order
+            selection (Selection): An int or slice per (time, y, x) dimension
+
+        Returns:
+            np.ndarray: The values, their dimensions in (time, y, x) order
+        """
+        layout = self._layout(array)
+        storage_selection = layout.to_storage(selection)
+        if self.use_chunk_cache:
+            values = ChunkCacheSingleton.read(
+                array, storage_selection, self.read_policy
+            )
+        else:
+            with InstrumentationSingleton.span("zarr.read", array=array.path):
+                values = self.read_policy.call(lambda: array[storage_selection])
+                InstrumentationSingleton.count("bytes_read", values.nbytes)
+        return layout.to_logical(values, selection)
+
+    def layout(self, variable: WeatherVariable) -> ArrayLayout:
+        """Where the time, y and x dimensions of a variable sit in the store
+
+        read from the `_ARRAY_DIMENSIONS` attribute of the variable, built on
+        first use and shared by every cube opened on the same store
+        """
+        return self._layout(self.dataset[self._variable_name(variable)])
+
+    def _layout(self, array: Array) -> ArrayLayout:
+        def build(dataset: Group) -> ArrayLayout:
+            time_dimension = self._coordinate_rename_map[Coordinate.TIME]
+            y_dimension, x_dimension = self._grid_dimensions
+            return build_array_layout(array, time_dimension, y_dimension, x_dimension)
+
+        return IndexCacheSingleton.get(self.dataset, ("layout", array.path), build)
+
+    @property
+    def _grid_dimensions(self) -> tuple[str, str]:
+        """The names of the (y, x) dimensions, from the latitude/longitude arrays"""
+        latitude_dimensions = array_dimensions(
+            self.dataset[self._coordinate_rename_map[Coordinate.LATITUDE]]
+        )
+        if len(latitude_dimensions) == 2:
+            return latitude_dimensions[0], latitude_dimensions[1]
+        longitude_dimensions = array_dimensions(
+            self.dataset[self._coordinate_rename_map[Coordinate.LONGITUDE]]
+        )
+        return latitude_dimensions[0], longitude_dimensions[0]
+
+    def chunks_touched(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        variables: list[WeatherVariable],
+        location: Optional[RegionLocation] = None,
+    ) -> int:
+        """How many storage chunks a query reads, without reading any
+
+        used to pick between copies of a store chunked for different access
+        patterns (see weather_catalog.data.rechunk)
+
+        Args:
+            start_date (datetime): The start date of the time range
+            end_date (datetime): The end date of the time range
+            variables (list[WeatherVariable]): The variables read
+            location (Optional[RegionLocation]): The box or polygon read,
+                a single point if None
+
+        Returns:
+            int: The number of chunks read across every variable
+        """
+        time_slice = self.time_index.slice_between(start_date, end_date)
+        region = self.region_mask(location) if location is not None else None
+        touched = 0
+        for variable in variables:
+            layout = self.layout(variable)
+            spatial_chunks = len(region.blocks(layout.chunks[1:])) if region else 1
+            touched += layout.time_chunks(time_slice) * spatial_chunks
+        return touched
+
+    def chunks_read(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        variables: list[WeatherVariable],
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        location: Optional[RegionLocation] = None,
+    ) -> list[tuple[Array, list[tuple[int, ...]]]]:
+        """The storage chunks a point or region read touches, per variable
+
+        Args:
+            start_date (datetime): The start date of the time range
+            end_date (datetime): The end date of the time range
+            variables (list[WeatherVariable]): The variables read
+            latitude (Optional[float]): The latitude of a point read
+            longitude (Optional[float]): The longitude of a point read
+            location (Optional[RegionLocation]): The region of a region read
+
+        Returns:
+            list[tuple[Array, list[tuple[int, ...]]]]: Every variable's array
+                with the coordinates of its chunks in the chunk grid
+        """
+        time_slice = self.time_index.slice_between(start_date, end_date)
+        if location is not None:
+            region = self.region_mask(location)
+        else:
+            lat_index, lon_index = self.grid_index.nearest_point(latitude, longitude)
+
+        chunks = []
+        for variable in variables:
+            array = self.dataset[self._variable_name(variable)]
+            layout = self._layout(array)
+            if location is not None:
+                selections = [
+                    (time_slice, block.y_slice, block.x_slice)
+                    for block in region.blocks(layout.chunks[1:])
+                ]
+            else:
+                selections = [(time_slice, lat_index, lon_index)]
+            chunk_coords = [
+                coords
+                for selection in selections
+                for coords in ChunkCacheSingleton.chunk_coords(
+                    array, layout.to_storage(selection)
+                )
+            ]
+            chunks.append((array, chunk_coords))
+        return chunks
+
+    async def aprefetch(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        variables: list[WeatherVariable],
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        location: Optional[RegionLocation] = None,
+    ) -> None:
+        """Fetch the chunks a read touches into the chunk cache
+
+        stores over an async fsspec filesystem are fetched on its event loop
+        (see ChunkCache.aget_chunks), the read that follows then decodes
+        nothing and waits on no request. Nothing is fetched ahead from
+        other stores.
+        """
+        filesystem = getattr(self.dataset.chunk_store, "fs", None)
+        if not self.use_chunk_cache or not getattr(filesystem, "async_impl", False):
+            return
+        with InstrumentationSingleton.span("data_cube.aprefetch"):
+            # the coordinate indexes are read on first use, in a thread
+            chunks = await asyncio.to_thread(
+                self.chunks_read,
+                start_date,
+                end_date,
+                variables,
+                latitude,
+                longitude,
+                location,
+            )
+            await asyncio.gather(
+                *(
+                    ChunkCacheSingleton.aget_chunks(
+                        array, chunk_coords, self.read_policy
+                    )
+                    for array, chunk_coords in chunks
+                )
+            )
+
+    def _variable_name(self, variable: WeatherVariable) -> str:
+        if self.variable_rename_map is not None:
+            return self.variable_rename_map[variable]
+        return variable.value
+
+    @property
+    def grid_index(self) -> GridIndex:
+        """The nearest neighbour index of the store's latitude/longitude grid
+
+        built on first use and shared by every cube opened on the same store
+        """
+        latitude_name = self._coordinate_rename_map[Coordinate.LATITUDE]
+        longitude_name = self._coordinate_rename_map[Coordinate.LONGITUDE]
+        return IndexCacheSingleton.get(
+            self.dataset,
+            ("grid", latitude_name, longitude_name),
+            lambda dataset: build_grid_index(
+                dataset[latitude_name][...], dataset[longitude_name][...]
+            ),
+        )
+
+    @property
+    def time_index(self) -> TimeIndex:
+        """The decoded time coordinate of the store, searched with bisection
+
+        built on first use and shared by every cube opened on the same store
+        """
+        time_name = self._coordinate_rename_map[Coordinate.TIME]
+        return IndexCacheSingleton.get(
+            self.dataset,
+            ("time", time_name),
+            lambda dataset: build_time_index(
+                dataset[time_name][...], dict(dataset[time_name].attrs)
+            ),
         )
-        return int(np.argmin(np.abs(coordinate_values - value)))
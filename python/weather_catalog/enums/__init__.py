@@ -1,4 +1,6 @@
+from .aggregation import Aggregation  # noqa
 from .coordinate import Coordinate  # noqa
 from .frequency import Frequency  # noqa
+from .output_format import OutputFormat  # noqa
 from .resolution import Resolution  # noqa
 from .weather_variable import WeatherVariable  # noqa
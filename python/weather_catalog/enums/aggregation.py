@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class Aggregation(Enum):
+    MEAN = "mean"
+    MIN = "min"
+    MAX = "max"
+    SUM = "sum"
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class OutputFormat(Enum):
+    PANDAS = "pandas"
+    ARROW_TABLE = "arrow_table"
+    ARROW_RECORD_BATCH = "arrow_record_batch"
@@ -0,0 +1,36 @@
+from typing import Any
+
+from .instrumentation import Instrumentation, InstrumentationSingleton
+from .loguru_exporter import LoguruExporter
+from .span import NoOpSpan, Span
+from .span_exporter import SpanExporter
+
+__all__ = [
+    "Instrumentation",
+    "InstrumentationSingleton",
+    "LoguruExporter",
+    "NoOpSpan",
+    "OpenTelemetryExporter",
+    "PrometheusExporter",
+    "QueryProfiler",
+    "Span",
+    "SpanExporter",
+]
+
+
+def __getattr__(name: str) -> Any:
+    # exporters pulling in optional or heavier modules (http.server, cProfile,
+    # opentelemetry) are imported on first use
+    if name == "PrometheusExporter":
+        from .prometheus_exporter import PrometheusExporter
+
+        return PrometheusExporter
+    if name == "OpenTelemetryExporter":
+        from .opentelemetry_exporter import OpenTelemetryExporter
+
+        return OpenTelemetryExporter
+    if name == "QueryProfiler":
+        from .query_profiler import QueryProfiler
+
+        return QueryProfiler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,182 @@
+import contextvars
+import functools
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypeVar, Union
+
+from loguru import logger
+
+from .span import NO_OP_SPAN, NoOpSpan, Span, current_span
+from .span_exporter import SpanExporter
+
+if TYPE_CHECKING:
+    from .query_profiler import QueryProfiler
+
+ReturnType = TypeVar("ReturnType")
+
+INSTRUMENTATION_ENV = "WEATHER_CATALOG_INSTRUMENTATION"
+PROFILE_SAMPLE_RATE_ENV = "WEATHER_CATALOG_PROFILE_SAMPLE_RATE"
+PROFILE_DIR_ENV = "WEATHER_CATALOG_PROFILE_DIR"
+PROMETHEUS_PORT_ENV = "WEATHER_CATALOG_PROMETHEUS_PORT"
+DEFAULT_PROMETHEUS_PORT = 9464
+
+
+class Instrumentation:
+    """Collects per-stage timings and counters of the query pipeline
+
+    the pipeline opens a span around every stage (catalog selection, store
+    opening, coordinate search, chunk reads, output conversion, ...) and
+    counts chunks touched, bytes read and cache hits within them. Finished
+    root spans are handed to the exporters.
+
+    without exporters and profiler instrumentation is disabled: span returns
+    a shared no-op span and count returns immediately, so the pipeline pays
+    one attribute check per stage.
+
+    Args:
+        exporters (Optional[list[SpanExporter]]): Where finished root spans go
+        profiler (Optional[QueryProfiler]): Profiles a sample of root spans
+    """
+
+    def __init__(
+        self,
+        exporters: Optional[list[SpanExporter]] = None,
+        profiler: Optional["QueryProfiler"] = None,
+    ):
+        self._lock = threading.Lock()
+        self.configure(exporters, profiler)
+
+    def configure(
+        self,
+        exporters: Optional[list[SpanExporter]] = None,
+        profiler: Optional["QueryProfiler"] = None,
+    ) -> None:
+        """Replace the exporters and profiler, enabling or disabling instrumentation
+
+        Args:
+            exporters (Optional[list[SpanExporter]]): Where finished root spans go
+            profiler (Optional[QueryProfiler]): Profiles a sample of root spans
+        """
+        self.exporters = list(exporters or [])
+        self.profiler = profiler
+        self.enabled = bool(self.exporters) or profiler is not None
+
+    def add_exporter(self, exporter: SpanExporter) -> None:
+        self.configure(self.exporters + [exporter], self.profiler)
+
+    def span(self, name: str, **attributes: Any) -> Union[Span, NoOpSpan]:
+        """Open a span around a stage, to be used as a context manager
+
+        Args:
+            name (str): The stage, e.g. "catalog.select"
+            **attributes: Describe the stage, values should be str, int, float or bool
+
+        Returns:
+            Union[Span, NoOpSpan]: The span, a no-op span while disabled
+        """
+        if not self.enabled:
+            return NO_OP_SPAN
+        return Span(name, attributes, self)
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Add to a counter of the innermost open span
+
+        Args:
+            name (str): The counter, e.g. "chunks_touched"
+            value (float): How much to add
+        """
+        if not self.enabled:
+            return
+        span = current_span.get()
+        if span is None:
+            return
+        with self._lock:
+            span.counters[name] = span.counters.get(name, 0) + value
+
+    def bind(self, function: Callable[..., ReturnType]) -> Callable[..., ReturnType]:
+        """Make a function run within the current span when called on another thread
+
+        executors do not carry the open span over to their threads, so work
+        submitted from within a span would otherwise start new roots. Bind
+        once per submission, a bound function can not run twice at once.
+
+        Args:
+            function (Callable[..., ReturnType]): The function to submit
+
+        Returns:
+            Callable[..., ReturnType]: The function itself while disabled
+        """
+        if not self.enabled:
+            return function
+        return functools.partial(contextvars.copy_context().run, function)
+
+    def _start_profile(self, span: Span) -> Any:
+        if self.profiler is None:
+            return None
+        return self.profiler.start(span)
+
+    def _finish(self, span: Span) -> None:
+        if span._profile is not None and self.profiler is not None:
+            self.profiler.stop(span, span._profile)
+            span._profile = None
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning(
+                    f"Exporter {type(exporter).__name__} failed "
+                    f"on span {span.name}: {e}"
+                )
+
+    @classmethod
+    def from_environment(cls) -> "Instrumentation":
+        """Create an instrumentation configured by environment variables
+
+        $WEATHER_CATALOG_INSTRUMENTATION lists exporters separated by commas
+        ("loguru", "opentelemetry", "prometheus"), the Prometheus metrics are
+        served on $WEATHER_CATALOG_PROMETHEUS_PORT (9464 by default).
+        $WEATHER_CATALOG_PROFILE_SAMPLE_RATE profiles that share of root spans,
+        saving slow ones into $WEATHER_CATALOG_PROFILE_DIR. Disabled if none
+        is set.
+        """
+        exporters: list[SpanExporter] = []
+        for exporter_name in os.environ.get(INSTRUMENTATION_ENV, "").split(","):
+            exporter_name = exporter_name.strip().lower()
+            if exporter_name == "loguru":
+                from .loguru_exporter import LoguruExporter
+
+                exporters.append(LoguruExporter())
+            elif exporter_name == "opentelemetry":
+                from .opentelemetry_exporter import OpenTelemetryExporter
+
+                exporters.append(OpenTelemetryExporter())
+            elif exporter_name == "prometheus":
+                exporters.append(_serve_prometheus())
+            elif exporter_name:
+                logger.warning(f"Ignoring unknown exporter {exporter_name!r}")
+
+        profiler = None
+        sample_rate = float(os.environ.get(PROFILE_SAMPLE_RATE_ENV, 0))
+        if sample_rate > 0:
+            from .query_profiler import QueryProfiler
+
+            profiler = QueryProfiler(
+                sample_rate=sample_rate, output_dir=os.environ.get(PROFILE_DIR_ENV)
+            )
+        return cls(exporters=exporters, profiler=profiler)
+
+
+def _serve_prometheus() -> SpanExporter:
+    from .prometheus_exporter import PrometheusExporter
+
+    exporter = PrometheusExporter()
+    port = int(os.environ.get(PROMETHEUS_PORT_ENV, DEFAULT_PROMETHEUS_PORT))
+    try:
+        exporter.start_http_server(port)
+    except OSError as e:
+        # e.g. QueryExecutor workers, the parent process holds the port
+        logger.warning(f"Not serving Prometheus metrics on port {port}: {e}")
+    return exporter
+
+
+InstrumentationSingleton = Instrumentation.from_environment()
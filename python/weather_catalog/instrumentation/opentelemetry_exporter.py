@@ -0,0 +1,60 @@
+from typing import Any, Optional
+
+from .span import Span
+from .span_exporter import SpanExporter
+
+COUNTER_ATTRIBUTE_PREFIX = "weather_catalog."
+
+
+class OpenTelemetryExporter(SpanExporter):
+    """Replays finished span trees as OpenTelemetry spans
+
+    spans keep their recorded start and end times and nesting, counters
+    become `weather_catalog.<counter>` attributes. Roots are parented to
+    the OpenTelemetry span active when they finish, if any, so pipeline
+    stages show up within the caller's trace.
+
+    opentelemetry-api is imported when the exporter is created, the SDK
+    (tracer provider, span processors, ...) is configured by the application.
+
+    Args:
+        tracer (Optional[Any]): The tracer to use, the global tracer
+            provider's "weather_catalog" tracer if None
+    """
+
+    def __init__(self, tracer: Optional[Any] = None):
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetryExporter requires opentelemetry-api, "
+                "install it with `pip install weather_catalog[opentelemetry]`"
+            ) from e
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("weather_catalog")
+
+    def export(self, span: Span) -> None:
+        self._export(span, context=None)
+
+    def _export(self, span: Span, context: Optional[Any]) -> None:
+        attributes = {
+            name: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for name, value in span.attributes.items()
+        }
+        for name, value in span.counters.items():
+            attributes[f"{COUNTER_ATTRIBUTE_PREFIX}{name}"] = value
+
+        otel_span = self.tracer.start_span(
+            span.name,
+            context=context,
+            attributes=attributes,
+            start_time=span.start_time_ns,
+        )
+        if "error" in span.attributes:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+
+        child_context = self._trace.set_span_in_context(otel_span)
+        for child in span.children:
+            self._export(child, child_context)
+        otel_span.end(end_time=span.end_time_ns)
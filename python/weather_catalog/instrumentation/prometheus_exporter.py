@@ -0,0 +1,154 @@
+import bisect
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from .span import Span
+from .span_exporter import SpanExporter
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class PrometheusExporter(SpanExporter):
+    """Aggregates spans into Prometheus metrics, rendered in the text format
+
+    every span (roots and nested stages) feeds a duration histogram labelled
+    by span name, every counter a `<namespace>_<counter>_total` counter
+    labelled by the span it was counted in. The metrics are served with
+    `start_http_server` or written for the node exporter's textfile collector
+    with `write_textfile`, no Prometheus client library is needed.
+
+    Args:
+        namespace (str): The prefix of the metric names
+        buckets (tuple[float, ...]): The upper bounds of the histogram buckets
+    """
+
+    def __init__(
+        self,
+        namespace: str = "weather_catalog",
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        # span name -> (bucket counts, sum of durations, count)
+        self._durations: dict[str, tuple[list[int], float, int]] = {}
+        # (counter, span name) -> total
+        self._counters: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            for _, stage in span.walk():
+                bucket_counts, total, count = self._durations.get(
+                    stage.name, ([0] * len(self.buckets), 0.0, 0)
+                )
+                bucket = bisect.bisect_left(self.buckets, stage.duration)
+                if bucket < len(bucket_counts):
+                    bucket_counts[bucket] += 1
+                self._durations[stage.name] = (
+                    bucket_counts,
+                    total + stage.duration,
+                    count + 1,
+                )
+                for counter, value in stage.counters.items():
+                    key = (counter, stage.name)
+                    self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format"""
+        duration_metric = f"{self.namespace}_span_duration_seconds"
+        lines = [
+            f"# HELP {duration_metric} Wall time of the query pipeline stages.",
+            f"# TYPE {duration_metric} histogram",
+        ]
+        with self._lock:
+            durations = {
+                name: (list(counts), total, count)
+                for name, (counts, total, count) in self._durations.items()
+            }
+            counters = dict(self._counters)
+
+        for name, (bucket_counts, total, count) in sorted(durations.items()):
+            label = f'span="{_escape(name)}"'
+            cumulative = 0
+            for upper_bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{duration_metric}_bucket{{{label},le="{upper_bound:g}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(f'{duration_metric}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{duration_metric}_sum{{{label}}} {total!r}")
+            lines.append(f"{duration_metric}_count{{{label}}} {count}")
+
+        counter_names = sorted({counter for counter, _ in counters})
+        for counter in counter_names:
+            metric = f"{self.namespace}_{_metric_name(counter)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (name, span_name), value in sorted(counters.items()):
+                if name == counter:
+                    lines.append(f'{metric}{{span="{_escape(span_name)}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically write the metrics for the node exporter's textfile collector
+
+        Args:
+            path (str): The .prom file to write
+        """
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as f:
+            f.write(self.render())
+        os.replace(temporary_path, path)
+
+    def start_http_server(self, port: int, address: str = "0.0.0.0") -> int:
+        """Serve the metrics on a background thread, for Prometheus to scrape
+
+        Args:
+            port (int): The port to listen on, 0 picks a free port
+            address (str): The address to bind
+
+        Returns:
+            int: The port listened on
+        """
+        exporter = self
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return None
+
+        self._server = ThreadingHTTPServer((address, port), _MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+    def stop_http_server(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            self._counters.clear()
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,115 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+from loguru import logger
+
+from .span import Span
+
+
+class CapturedProfile(NamedTuple):
+    span_name: str
+    duration: float
+    stats: pstats.Stats
+    path: Optional[str]
+
+
+class QueryProfiler:
+    """Runs a sample of root spans under cProfile, keeping the slow ones
+
+    profiling every query would slow all of them down, so only a random
+    share of root spans is profiled and only those taking longer than
+    min_duration_seconds are kept: in memory (see `profiles`) and, if
+    output_dir is set, as .prof files readable with pstats or snakeviz.
+    cProfile only sees the thread the root span runs on, work handed to
+    executors shows up as time spent waiting on it.
+
+    Args:
+        sample_rate (float): The share of root spans to profile, in [0, 1]
+        min_duration_seconds (float): Profiles of faster spans are dropped
+        output_dir (Optional[str]): Where kept profiles are written
+        span_names (Optional[set[str]]): Only profile root spans with these
+            names, e.g. {"query.resolve"}, every root span if None
+        max_profiles (int): How many kept profiles stay in memory
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.01,
+        min_duration_seconds: float = 1.0,
+        output_dir: Optional[str] = None,
+        span_names: Optional[set[str]] = None,
+        max_profiles: int = 16,
+    ):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be within [0, 1], got {sample_rate}")
+        self.sample_rate = sample_rate
+        self.min_duration_seconds = min_duration_seconds
+        self.output_dir = output_dir
+        self.span_names = span_names
+        self.profiles: deque[CapturedProfile] = deque(maxlen=max_profiles)
+        self._random = random.Random()
+        self._active = threading.local()
+
+    def start(self, span: Span) -> Optional[cProfile.Profile]:
+        """Start profiling a root span if it is sampled
+
+        Returns:
+            Optional[cProfile.Profile]: The running profile, None if not sampled
+        """
+        if self.span_names is not None and span.name not in self.span_names:
+            return None
+        if getattr(self._active, "profiling", False):
+            return None
+        if self._random.random() >= self.sample_rate:
+            return None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler is already running on this thread
+            return None
+        self._active.profiling = True
+        return profile
+
+    def stop(self, span: Span, profile: cProfile.Profile) -> None:
+        """Stop profiling a root span, keeping the profile if the span was slow"""
+        profile.disable()
+        self._active.profiling = False
+        if span.duration < self.min_duration_seconds:
+            return
+
+        stats = pstats.Stats(profile, stream=io.StringIO())
+        path = None
+        if self.output_dir is not None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f"{span.name}-{time.time_ns()}.prof")
+            stats.dump_stats(path)
+            span.attributes["profile_path"] = path
+        self.profiles.append(CapturedProfile(span.name, span.duration, stats, path))
+        logger.info(
+            f"Profiled slow {span.name} ({span.duration:.3f}s)"
+            + (f", saved to {path}" if path else "")
+        )
+
+    def summary(self, profile: CapturedProfile, limit: int = 20) -> str:
+        """The functions of a captured profile with the most cumulative time
+
+        Args:
+            profile (CapturedProfile): One of `profiles`
+            limit (int): How many functions to list
+
+        Returns:
+            str: The pstats listing
+        """
+        stream = io.StringIO()
+        profile.stats.stream = stream  # type: ignore
+        profile.stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
@@ -0,0 +1,131 @@
+import time
+from contextvars import ContextVar, Token
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+
+if TYPE_CHECKING:
+    from .instrumentation import Instrumentation
+
+# the innermost open span of the running thread / task
+current_span: ContextVar[Optional["Span"]] = ContextVar(
+    "weather_catalog_current_span", default=None
+)
+
+
+class Span:
+    """A timed stage of the query pipeline, with counters and nested stages
+
+    spans are context managers, entering one makes it the parent of every span
+    opened (in the same thread, or in a thread started through
+    Instrumentation.bind) until it is exited. A span without a parent is a
+    root, it is handed to the exporters once it is exited.
+
+    Args:
+        name (str): The stage, e.g. "catalog.select"
+        attributes (dict[str, Any]): Describes the stage, e.g. the catalog id
+        instrumentation (Instrumentation): Where the finished root is exported
+    """
+
+    __slots__ = (
+        "name",
+        "attributes",
+        "counters",
+        "children",
+        "parent",
+        "start_time_ns",
+        "end_time_ns",
+        "duration",
+        "_instrumentation",
+        "_start",
+        "_token",
+        "_profile",
+    )
+
+    def __init__(
+        self, name: str, attributes: dict[str, Any], instrumentation: "Instrumentation"
+    ):
+        self.name = name
+        self.attributes = attributes
+        self.counters: dict[str, float] = {}
+        self.children: list[Span] = []
+        self.parent: Optional[Span] = None
+        self.start_time_ns = 0
+        self.end_time_ns = 0
+        self.duration = 0.0
+        self._instrumentation = instrumentation
+        self._start = 0.0
+        self._token: Optional[Token] = None
+        self._profile: Any = None
+
+    def __enter__(self) -> "Span":
+        self.parent = current_span.get()
+        self._token = current_span.set(self)
+        if self.parent is None:
+            self._profile = self._instrumentation._start_profile(self)
+        self.start_time_ns = time.time_ns()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        self.duration = time.perf_counter() - self._start
+        self.end_time_ns = self.start_time_ns + int(self.duration * 1e9)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        if self._token is not None:
+            current_span.reset(self._token)
+            self._token = None
+
+        if self.parent is not None:
+            self.parent.children.append(self)
+        else:
+            self._instrumentation._finish(self)
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes to the span"""
+        self.attributes.update(attributes)
+
+    def walk(self, depth: int = 0) -> Iterator[tuple[int, "Span"]]:
+        """The span and all nested spans, depth first with their depth"""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def total_counters(self) -> dict[str, float]:
+        """The counters of the span summed with those of every nested span"""
+        totals: dict[str, float] = {}
+        for _, span in self.walk():
+            for name, value in span.counters.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "attributes": dict(self.attributes),
+            "duration_seconds": self.duration,
+            "counters": dict(self.counters),
+            "children": [child.to_dict() for child in self.children],
+        }
+
+    def __repr__(self) -> str:
+        return f"Span({self.name!r}, duration={self.duration:.6f})"
+
+
+class NoOpSpan:
+    """What Instrumentation.span returns while instrumentation is disabled
+
+    a single shared instance, entering and exiting it does nothing
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> "NoOpSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        return None
+
+    def set(self, **attributes: Any) -> None:
+        return None
+
+
+NO_OP_SPAN = NoOpSpan()
@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+
+from .span import Span
+
+
+class SpanExporter(ABC):
+    """Receives every finished root span, with its nested spans and counters"""
+
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        pass
@@ -1,2 +1,4 @@
 from .point_daterange_query import PointDateRangeQuery  # noqa
 from .query import Frequency, Query, WeatherVariable  # noqa
+from .query_batch import QueryBatch  # noqa
+from .region_daterange_query import RegionDateRangeQuery  # noqa
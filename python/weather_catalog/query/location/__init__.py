@@ -1,7 +1,11 @@
 from .abstract_location import AbstractLocation  # noqa
+from .bbox_location import BBoxLocation  # noqa
 from .point_location import PointLocation  # noqa
+from .polygon_location import PolygonLocation  # noqa
 
 __all__ = [
     "AbstractLocation",
+    "BBoxLocation",
     "PointLocation",
+    "PolygonLocation",
 ]
@@ -0,0 +1,31 @@
+import pydantic
+
+from .abstract_location import AbstractLocation
+
+
+class BBoxLocation(AbstractLocation):
+    """A latitude/longitude box, inclusive of its edges
+
+    min_longitude may be larger than max_longitude for boxes
+    crossing the antimeridian (e.g. 170 to -170)
+    """
+
+    min_latitude: float
+    max_latitude: float
+    min_longitude: float
+    max_longitude: float
+
+    @pydantic.model_validator(mode="after")
+    def _check_latitudes(self) -> "BBoxLocation":
+        if self.min_latitude > self.max_latitude:
+            raise ValueError("min_latitude must not be larger than max_latitude")
+        return self
+
+    def bounds(self) -> tuple[float, float, float, float]:
+        """The (min latitude, max latitude, min longitude, max longitude) of the box"""
+        return (
+            self.min_latitude,
+            self.max_latitude,
+            self.min_longitude,
+            self.max_longitude,
+        )
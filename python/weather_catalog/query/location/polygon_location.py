@@ -0,0 +1,30 @@
+import pydantic
+
+from .abstract_location import AbstractLocation
+
+
+class PolygonLocation(AbstractLocation):
+    """A polygon (e.g. a river basin) given by its (latitude, longitude) vertices
+
+    the polygon is closed implicitly, cells are inside by the even-odd rule.
+    Polygons crossing the antimeridian use continuous longitudes (e.g. 170 to 190).
+    """
+
+    vertices: list[tuple[float, float]]
+
+    @pydantic.field_validator("vertices")
+    @classmethod
+    def _check_vertices(
+        cls, vertices: list[tuple[float, float]]
+    ) -> list[tuple[float, float]]:
+        if len(vertices) > 1 and vertices[0] == vertices[-1]:
+            vertices = vertices[:-1]
+        if len(vertices) < 3:
+            raise ValueError("A polygon needs at least 3 distinct vertices")
+        return vertices
+
+    def bounds(self) -> tuple[float, float, float, float]:
+        """The (min latitude, max latitude, min longitude, max longitude) of the polygon"""
+        latitudes = [latitude for latitude, _ in self.vertices]
+        longitudes = [longitude for _, longitude in self.vertices]
+        return min(latitudes), max(latitudes), min(longitudes), max(longitudes)
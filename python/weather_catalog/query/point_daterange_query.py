@@ -12,5 +12,5 @@ class PointDateRangeQuery(Query):
     location: PointLocation
     weather_model_group: str
     weather_model_id: str
-    variable: WeatherVariable
+    variables: list[WeatherVariable]
     frequency: Frequency
@@ -1,7 +1,10 @@
 import datetime
+from typing import Any
+
+import pydantic
 
 from weather_catalog.basemodel import BaseModel
-from weather_catalog.enums import Frequency, Resolution, WeatherVariable
+from weather_catalog.enums import Aggregation, Frequency, Resolution, WeatherVariable
 
 from .location.abstract_location import AbstractLocation
 
@@ -14,4 +17,31 @@ class Query(BaseModel):
     weather_model_group: str
     weather_model_id: str
     resolution: Resolution
-    variable: WeatherVariable
+    variables: list[WeatherVariable]
+    aggregation: Aggregation = Aggregation.MEAN
+
+    @pydantic.model_validator(mode="before")
+    @classmethod
+    def _accept_single_variable(cls, data: Any) -> Any:
+        # queries used to take a single `variable`, keep accepting it
+        if isinstance(data, dict) and "variable" in data:
+            data = dict(data)
+            variable = data.pop("variable")
+            if "variables" in data:
+                raise ValueError("Give either variable or variables, not both")
+            data["variables"] = [variable]
+        return data
+
+    @pydantic.field_validator("variables")
+    @classmethod
+    def _check_variables(
+        cls, variables: list[WeatherVariable]
+    ) -> list[WeatherVariable]:
+        if not variables:
+            raise ValueError("A query needs at least one variable")
+        return list(dict.fromkeys(variables))
+
+    @property
+    def variable(self) -> WeatherVariable:
+        """The first queried variable, for code written for single variable queries"""
+        return self.variables[0]
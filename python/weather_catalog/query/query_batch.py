@@ -0,0 +1,533 @@
+import warnings
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, NamedTuple, Optional, Sequence, Union
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from weather_catalog.enums import Aggregation, Frequency, Resolution, WeatherVariable
+
+from .location.point_location import PointLocation
+from .point_daterange_query import PointDateRangeQuery
+
+_FREQUENCIES = list(Frequency)
+_AGGREGATIONS = list(Aggregation)
+
+VariableInput = Union[WeatherVariable, str, Sequence[Union[WeatherVariable, str]]]
+
+
+class QueryGroup(NamedTuple):
+    """Queries of a batch sharing a time range, variables and resampling"""
+
+    start_date: datetime
+    end_date: datetime
+    variables: list[WeatherVariable]
+    frequency: Frequency
+    aggregation: Aggregation
+    positions: np.ndarray
+
+
+class QueryBatch:
+    """Many point queries on one weather model, held as numpy columns
+
+    bulk jobs (e.g. 100k station windows) spend most of their time validating
+    and allocating PointDateRangeQuery objects, a batch validates its columns
+    once with vectorized checks instead. QueryResolver.resolve_many takes a
+    batch directly, `query`/`from_queries` convert from and to single queries.
+
+    every column but the weather model and resolution may be given as one
+    value shared by the whole batch. Every query holds an index into the
+    distinct variable lists of the batch, so a query may hold several
+    variables and keeps their order. Dates are stored as naive UTC
+    datetime64[ns], queries are converted back to the timezone the dates
+    were given in (UTC if they mix several).
+
+    Args:
+        latitudes (Sequence[float]): The latitude of every query
+        longitudes (Sequence[float]): The longitude of every query
+        start_dates (Any): The start date of every query, anything pandas
+            converts to datetimes
+        end_dates (Any): The end date of every query
+        variables (Union[VariableInput, Sequence[VariableInput]]): A variable
+            or list of variables shared by every query, or an array (numpy,
+            pandas) or list of lists holding the variable(s) of every query
+        weather_model_group (str): The weather model group of the batch
+        weather_model_id (str): The weather model id of the batch
+        resolution (Resolution): The resolution of the batch
+        frequency (Any): The frequency of every query, or one for all
+        aggregation (Any): How every query is resampled, or one for all
+    """
+
+    def __init__(
+        self,
+        latitudes: Sequence[float],
+        longitudes: Sequence[float],
+        start_dates: Any,
+        end_dates: Any,
+        variables: Union[VariableInput, Sequence[VariableInput]],
+        weather_model_group: str,
+        weather_model_id: str,
+        resolution: Union[Resolution, str],
+        frequency: Any = Frequency.HOURLY,
+        aggregation: Any = Aggregation.MEAN,
+    ):
+        self.latitudes = np.asarray(latitudes, dtype=np.float64).ravel()
+        size = self.latitudes.size
+        self.longitudes = _broadcast(
+            np.asarray(longitudes, dtype=np.float64).ravel(), size, "longitudes"
+        )
+        start_dates, start_timezone = _to_datetime64(start_dates)
+        end_dates, end_timezone = _to_datetime64(end_dates)
+        self.start_dates = _broadcast(start_dates, size, "start_dates")
+        self.end_dates = _broadcast(end_dates, size, "end_dates")
+        self.timezone = _shared_timezone(start_timezone, end_timezone)
+        variable_codes, self.variable_lists = _encode_variables(variables)
+        self.variable_codes = _broadcast(variable_codes, size, "variables")
+        self.frequency_codes = _broadcast(
+            _encode_enum(frequency, Frequency, _FREQUENCIES), size, "frequency"
+        )
+        self.aggregation_codes = _broadcast(
+            _encode_enum(aggregation, Aggregation, _AGGREGATIONS), size, "aggregation"
+        )
+        self.weather_model_group = str(weather_model_group)
+        self.weather_model_id = str(weather_model_id)
+        self.resolution = Resolution(resolution)
+        self._validate()
+
+    def _validate(self) -> None:
+        _check(
+            np.isfinite(self.latitudes)
+            & (self.latitudes >= -90.0)
+            & (self.latitudes <= 90.0),
+            self.latitudes,
+            "latitudes must be finite and within [-90, 90]",
+        )
+        _check(
+            np.isfinite(self.longitudes), self.longitudes, "longitudes must be finite"
+        )
+        _check(~np.isnat(self.start_dates), self.start_dates, "start_dates are missing")
+        _check(~np.isnat(self.end_dates), self.end_dates, "end_dates are missing")
+        _check(
+            self.start_dates <= self.end_dates,
+            self.end_dates,
+            "end_dates must not be before start_dates",
+        )
+
+    @classmethod
+    def _from_columns(cls, **columns: Any) -> "QueryBatch":
+        # columns taken from a validated batch, skipping conversion and validation
+        batch = cls.__new__(cls)
+        for name, value in columns.items():
+            setattr(batch, name, value)
+        return batch
+
+    @classmethod
+    def from_queries(cls, queries: Sequence[PointDateRangeQuery]) -> "QueryBatch":
+        """Collect already validated queries into a batch, without validating again
+
+        Args:
+            queries (Sequence[PointDateRangeQuery]): Queries on the same weather
+                model and resolution
+
+        Returns:
+            QueryBatch: One row per query, in order
+        """
+        if not queries:
+            raise ValueError(
+                "A QueryBatch needs at least one query to take its model from"
+            )
+        models = {
+            (q.weather_model_group, q.weather_model_id, q.resolution) for q in queries
+        }
+        if len(models) > 1:
+            raise ValueError(
+                "All queries in a batch must target the same weather model "
+                f"and resolution, got {models}"
+            )
+
+        variable_codes: dict[tuple[WeatherVariable, ...], int] = {}
+        variable_lists: list[tuple[WeatherVariable, ...]] = []
+        frequency_codes = {
+            frequency: code for code, frequency in enumerate(_FREQUENCIES)
+        }
+        aggregation_codes = {
+            aggregation: code for code, aggregation in enumerate(_AGGREGATIONS)
+        }
+        codes = np.empty(len(queries), dtype=np.uint32)
+        for position, query in enumerate(queries):
+            key = tuple(query.variables)
+            code = variable_codes.get(key)
+            if code is None:
+                code = variable_codes[key] = len(variable_lists)
+                variable_lists.append(_variable_list(key))
+            codes[position] = code
+
+        start_dates, start_timezone = _to_datetime64([q.start_date for q in queries])
+        end_dates, end_timezone = _to_datetime64([q.end_date for q in queries])
+        return cls._from_columns(
+            latitudes=np.array(
+                [q.location.latitude for q in queries], dtype=np.float64
+            ),
+            longitudes=np.array(
+                [q.location.longitude for q in queries], dtype=np.float64
+            ),
+            start_dates=start_dates,
+            end_dates=end_dates,
+            timezone=_shared_timezone(start_timezone, end_timezone),
+            variable_codes=codes,
+            variable_lists=variable_lists,
+            frequency_codes=np.array(
+                [frequency_codes[q.frequency] for q in queries], dtype=np.uint8
+            ),
+            aggregation_codes=np.array(
+                [aggregation_codes[q.aggregation] for q in queries], dtype=np.uint8
+            ),
+            weather_model_group=queries[0].weather_model_group,
+            weather_model_id=queries[0].weather_model_id,
+            resolution=queries[0].resolution,
+        )
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: pd.DataFrame,
+        weather_model_group: str,
+        weather_model_id: str,
+        resolution: Union[Resolution, str],
+        **shared: Any,
+    ) -> "QueryBatch":
+        """Build a batch from the columns of a dataframe
+
+        Args:
+            frame (pd.DataFrame): With "latitude", "longitude", "start_date",
+                "end_date" and optionally "variable", "frequency" and
+                "aggregation" columns
+            weather_model_group (str): The weather model group of the batch
+            weather_model_id (str): The weather model id of the batch
+            resolution (Union[Resolution, str]): The resolution of the batch
+            **shared: Values for the batch wide columns missing from the frame,
+                e.g. variables=[WeatherVariable.TEMPERATURE]
+
+        Returns:
+            QueryBatch: One row per row of the frame
+        """
+        columns = {
+            "latitudes": frame["latitude"].to_numpy(),
+            "longitudes": frame["longitude"].to_numpy(),
+            "start_dates": frame["start_date"],
+            "end_dates": frame["end_date"],
+        }
+        for column, argument in (
+            ("variable", "variables"),
+            ("frequency", "frequency"),
+            ("aggregation", "aggregation"),
+        ):
+            if column in frame:
+                columns[argument] = frame[column].to_numpy()
+        return cls(
+            **{**shared, **columns},
+            weather_model_group=weather_model_group,
+            weather_model_id=weather_model_id,
+            resolution=resolution,
+        )
+
+    def __len__(self) -> int:
+        return self.latitudes.size
+
+    def variables(self, position: int) -> list[WeatherVariable]:
+        """The variables of a query, in the order they were given"""
+        return list(self.variable_lists[self.variable_codes[position]])
+
+    def query(self, position: int) -> PointDateRangeQuery:
+        """Convert one row into a PointDateRangeQuery, without validating it again
+
+        Args:
+            position (int): The row
+
+        Returns:
+            PointDateRangeQuery: The query of that row
+        """
+        return PointDateRangeQuery.model_construct(
+            start_date=_to_datetime(self.start_dates[position], self.timezone),
+            end_date=_to_datetime(self.end_dates[position], self.timezone),
+            frequency=_FREQUENCIES[self.frequency_codes[position]],
+            location=PointLocation.model_construct(
+                latitude=float(self.latitudes[position]),
+                longitude=float(self.longitudes[position]),
+            ),
+            weather_model_group=self.weather_model_group,
+            weather_model_id=self.weather_model_id,
+            resolution=self.resolution,
+            variables=self.variables(position),
+            aggregation=_AGGREGATIONS[self.aggregation_codes[position]],
+        )
+
+    def to_queries(self) -> list[PointDateRangeQuery]:
+        return [self.query(position) for position in range(len(self))]
+
+    def take(self, positions: Any) -> "QueryBatch":
+        """The batch of some rows, without validating them again
+
+        Args:
+            positions (Any): Row positions or a boolean mask
+
+        Returns:
+            QueryBatch: The selected rows
+        """
+        return self._from_columns(
+            latitudes=self.latitudes[positions],
+            longitudes=self.longitudes[positions],
+            start_dates=self.start_dates[positions],
+            end_dates=self.end_dates[positions],
+            timezone=self.timezone,
+            variable_codes=self.variable_codes[positions],
+            variable_lists=self.variable_lists,
+            frequency_codes=self.frequency_codes[positions],
+            aggregation_codes=self.aggregation_codes[positions],
+            weather_model_group=self.weather_model_group,
+            weather_model_id=self.weather_model_id,
+            resolution=self.resolution,
+        )
+
+    def groups(self) -> list[QueryGroup]:
+        """Split the batch into queries sharing a time range, variables and resampling
+
+        Returns:
+            list[QueryGroup]: The groups, with the positions of their rows
+        """
+        if len(self) == 0:
+            return []
+        starts = self.start_dates.view(np.int64)
+        ends = self.end_dates.view(np.int64)
+        kinds = (
+            self.variable_codes.astype(np.int64) << 16
+            | self.frequency_codes.astype(np.int64) << 8
+            | self.aggregation_codes.astype(np.int64)
+        )
+        # a stable sort keeps the rows of every group in order
+        order = np.lexsort((kinds, ends, starts))
+        first_of_group = np.zeros(order.size, dtype=bool)
+        first_of_group[0] = True
+        for key in (starts, ends, kinds):
+            sorted_key = key[order]
+            first_of_group[1:] |= sorted_key[1:] != sorted_key[:-1]
+        group_starts = np.flatnonzero(first_of_group)
+
+        groups = []
+        for positions in np.split(order, group_starts[1:]):
+            first = positions[0]
+            groups.append(
+                QueryGroup(
+                    start_date=pd.Timestamp(self.start_dates[first]).to_pydatetime(),
+                    end_date=pd.Timestamp(self.end_dates[first]).to_pydatetime(),
+                    variables=self.variables(first),
+                    frequency=_FREQUENCIES[self.frequency_codes[first]],
+                    aggregation=_AGGREGATIONS[self.aggregation_codes[first]],
+                    positions=positions,
+                )
+            )
+        return groups
+
+    def to_dict(self) -> dict[str, Any]:
+        """The batch as JSON serializable columns, e.g. to pass it through XCom"""
+        return {
+            "latitudes": self.latitudes.tolist(),
+            "longitudes": self.longitudes.tolist(),
+            "start_dates": self.start_dates.view(np.int64).tolist(),
+            "end_dates": self.end_dates.view(np.int64).tolist(),
+            "timezone": _timezone_key(self.timezone),
+            "variable_codes": self.variable_codes.tolist(),
+            "variable_lists": [
+                [variable.value for variable in variables]
+                for variables in self.variable_lists
+            ],
+            "frequencies": [_FREQUENCIES[c].value for c in self.frequency_codes],
+            "aggregations": [_AGGREGATIONS[c].value for c in self.aggregation_codes],
+            "weather_model_group": self.weather_model_group,
+            "weather_model_id": self.weather_model_id,
+            "resolution": self.resolution.value,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "QueryBatch":
+        """Restore a batch written by to_dict, without validating it again"""
+        return cls._from_columns(
+            latitudes=np.asarray(data["latitudes"], dtype=np.float64),
+            longitudes=np.asarray(data["longitudes"], dtype=np.float64),
+            start_dates=np.asarray(data["start_dates"], dtype=np.int64).view(
+                "datetime64[ns]"
+            ),
+            end_dates=np.asarray(data["end_dates"], dtype=np.int64).view(
+                "datetime64[ns]"
+            ),
+            timezone=_timezone_from_key(data.get("timezone")),
+            variable_codes=np.asarray(data["variable_codes"], dtype=np.uint32),
+            variable_lists=[
+                tuple(WeatherVariable(variable) for variable in variables)
+                for variables in data["variable_lists"]
+            ],
+            frequency_codes=_encode_enum(data["frequencies"], Frequency, _FREQUENCIES),
+            aggregation_codes=_encode_enum(
+                data["aggregations"], Aggregation, _AGGREGATIONS
+            ),
+            weather_model_group=data["weather_model_group"],
+            weather_model_id=data["weather_model_id"],
+            resolution=Resolution(data["resolution"]),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"QueryBatch({len(self)} queries on "
+            f"{self.weather_model_group}/{self.weather_model_id})"
+        )
+
+
+def _broadcast(values: np.ndarray, size: int, name: str) -> np.ndarray:
+    if values.ndim == 0 or (values.size == 1 and size != 1):
+        return np.full(size, values.reshape(-1)[0], dtype=values.dtype)
+    if values.size != size:
+        raise ValueError(
+            f"{name} must hold one value per query or one for all, "
+            f"got {values.size} values for {size} queries"
+        )
+    return values.ravel()
+
+
+def _to_datetime64(values: Any) -> tuple[np.ndarray, Optional[tzinfo]]:
+    """Convert dates into naive UTC datetime64[ns], the convention of the stores
+
+    Returns:
+        tuple[np.ndarray, Optional[tzinfo]]: The dates and the timezone they
+            were given in, UTC if they mix several, None if they are naive
+    """
+    if isinstance(values, (str, datetime, np.datetime64, pd.Timestamp)):
+        values = [values]
+    with warnings.catch_warnings():
+        # pandas warns about, or refuses, dates in several timezones
+        warnings.simplefilter("error", FutureWarning)
+        try:
+            dates = pd.DatetimeIndex(pd.to_datetime(values))
+        except (FutureWarning, TypeError, ValueError):
+            dates = pd.DatetimeIndex(pd.to_datetime(values, utc=True))
+    if dates.tz is None:
+        # naive dates are taken as UTC already
+        return dates.to_numpy(dtype="datetime64[ns]"), None
+    return (
+        dates.tz_convert("UTC").tz_localize(None).to_numpy(dtype="datetime64[ns]"),
+        dates.tz,
+    )
+
+
+def _to_datetime(value: np.datetime64, zone: Optional[tzinfo]) -> datetime:
+    date = pd.Timestamp(value)
+    if zone is not None:
+        date = date.tz_localize("UTC").tz_convert(zone)
+    return date.to_pydatetime()
+
+
+def _shared_timezone(*zones: Optional[tzinfo]) -> Optional[tzinfo]:
+    if all(zone == zones[0] for zone in zones):
+        return zones[0]
+    return timezone.utc
+
+
+def _timezone_key(zone: Optional[tzinfo]) -> Optional[Union[str, float]]:
+    """A JSON serializable timezone, its IANA name or its UTC offset in seconds"""
+    if zone is None:
+        return None
+    name = getattr(zone, "key", None) or getattr(zone, "zone", None)
+    if name is not None:
+        return name
+    return zone.utcoffset(None).total_seconds()  # type: ignore
+
+
+def _timezone_from_key(key: Optional[Union[str, float]]) -> Optional[tzinfo]:
+    if key is None:
+        return None
+    if isinstance(key, str):
+        return ZoneInfo(key)
+    return timezone(timedelta(seconds=key))
+
+
+def _variable_list(
+    variables: Sequence[Union[WeatherVariable, str]]
+) -> tuple[WeatherVariable, ...]:
+    variable_list = tuple(
+        dict.fromkeys(WeatherVariable(variable) for variable in variables)
+    )
+    if not variable_list:
+        raise ValueError("A query needs at least one variable")
+    return variable_list
+
+
+def _encode_variables(
+    variables: Union[VariableInput, Sequence[VariableInput]]
+) -> tuple[np.ndarray, list[tuple[WeatherVariable, ...]]]:
+    """The index of every query into the distinct variable lists, and the lists"""
+    # a variable or a list of variables is shared by every query, per query
+    # variables come as an array (numpy, pandas) or as a list of lists
+    if isinstance(variables, (WeatherVariable, str)):
+        variables = [variables]
+    if isinstance(variables, (pd.Series, pd.Index)):
+        variables = variables.to_numpy()
+    if not isinstance(variables, np.ndarray):
+        if all(isinstance(entry, (WeatherVariable, str)) for entry in variables):
+            return np.zeros(1, dtype=np.uint32), [_variable_list(variables)]
+        variables = np.array(
+            [
+                tuple(entry) if isinstance(entry, (list, tuple)) else entry
+                for entry in variables
+            ]
+            + [None],
+            dtype=object,
+        )[:-1]
+    keys = variables.ravel()
+    if keys.dtype == object:
+        keys = np.array(
+            [
+                tuple(entry) if isinstance(entry, (list, tuple, np.ndarray)) else entry
+                for entry in keys
+            ]
+            + [None],
+            dtype=object,
+        )[:-1]
+
+    # distinct entries are converted once, however many queries share them
+    codes, uniques = pd.factorize(keys)
+    if (codes < 0).any():
+        raise ValueError("variables are missing")
+    # entries naming the same variables (e.g. as enum and as string) share a list
+    list_codes: dict[tuple[WeatherVariable, ...], int] = {}
+    unique_codes = np.empty(len(uniques), dtype=np.uint32)
+    for code, entry in enumerate(uniques.tolist()):
+        try:
+            variable_list = _variable_list(
+                entry if isinstance(entry, tuple) else [entry]
+            )
+        except ValueError as e:
+            raise ValueError(f"Invalid variables {entry!r}: {e}") from e
+        unique_codes[code] = list_codes.setdefault(variable_list, len(list_codes))
+    return unique_codes[codes], list(list_codes)
+
+
+def _encode_enum(values: Any, enum: type, members: list) -> np.ndarray:
+    if isinstance(values, (str, enum)):
+        values = [values]
+    codes, uniques = pd.factorize(pd.Series(np.asarray(values, dtype=object).ravel()))
+    if (codes < 0).any():
+        raise ValueError(f"{enum.__name__} values are missing")
+    unique_codes = np.array(
+        [members.index(enum(value)) for value in uniques], dtype=np.uint8
+    )
+    return unique_codes[codes]
+
+
+def _check(valid: np.ndarray, values: np.ndarray, message: str) -> None:
+    if valid.all():
+        return
+    invalid = np.flatnonzero(~valid)
+    raise ValueError(
+        f"{message}: {invalid.size} invalid queries, "
+        f"e.g. at position {invalid[0]}: {values[invalid[0]]}"
+    )
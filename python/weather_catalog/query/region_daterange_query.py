@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional, Union
+
+from weather_catalog.enums import Aggregation, Frequency, WeatherVariable
+
+from .location.bbox_location import BBoxLocation
+from .location.polygon_location import PolygonLocation
+from .query import Query
+
+
+class RegionDateRangeQuery(Query):
+    """A query over every grid cell within a box or polygon
+
+    returns the cells within the region, or a single series per variable
+    when a spatial_aggregation is given (MEAN is weighted by cell area)
+    """
+
+    start_date: datetime
+    end_date: datetime
+    location: Union[BBoxLocation, PolygonLocation]
+    weather_model_group: str
+    weather_model_id: str
+    variables: list[WeatherVariable]
+    frequency: Frequency
+    spatial_aggregation: Optional[Aggregation] = None
@@ -1 +1,2 @@
+from .query_executor import QueryExecutor  # noqa
 from .query_resolver import QueryResolver  # noqa
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import Optional
+
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("WEATHER_CATALOG_MAX_CONCURRENCY", 64))
+
+_NO_CATALOG = "_unknown_catalog"
+
+
+class ConcurrencyLimiter:
+    """Bounds how many async requests run against each catalog at once
+
+    every catalog gets one asyncio.Semaphore per event loop, shared by
+    AbstractCatalog.aget_data and QueryResolver.aresolve, so a single loop
+    can keep hundreds of queries in flight while each backend only sees
+    as many concurrent requests as it is configured for.
+
+    Args:
+        default_max_concurrency (int): The limit of catalogs that did not
+            register one
+    """
+
+    def __init__(self, default_max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.default_max_concurrency = default_max_concurrency
+        self._max_concurrency: dict[str, int] = {}
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def limit(
+        self, catalog_id: Optional[str], max_concurrency: Optional[int] = None
+    ) -> asyncio.Semaphore:
+        """The semaphore of a catalog on the running event loop
+
+        Args:
+            catalog_id (Optional[str]): The catalog requests are made to
+            max_concurrency (Optional[int]): Register the catalog's limit,
+                applied to the semaphores created from now on. The limit
+                registered earlier (or the default) if None
+
+        Returns:
+            asyncio.Semaphore: To hold (`async with`) while a request runs
+        """
+        catalog_id = catalog_id or _NO_CATALOG
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if max_concurrency is not None:
+                self._max_concurrency[catalog_id] = max_concurrency
+            semaphores = self._semaphores.setdefault(loop, {})
+            semaphore = semaphores.get(catalog_id)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(
+                    self._max_concurrency.get(
+                        catalog_id, self.default_max_concurrency
+                    )
+                )
+                semaphores[catalog_id] = semaphore
+            return semaphore
+
+
+ConcurrencyLimiterSingleton = ConcurrencyLimiter()
@@ -0,0 +1,291 @@
+import math
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional, Sequence, Union
+
+from loguru import logger
+
+from weather_catalog.data.arrow_output import DataOutput, convert_record_batch
+from weather_catalog.enums import OutputFormat
+from weather_catalog.instrumentation import InstrumentationSingleton
+from weather_catalog.query import Query, QueryBatch
+
+from .query_resolver import QueryResolver
+
+if TYPE_CHECKING:
+    from weather_catalog.catalog.catalog_selector import CatalogSelectorClass
+
+CatalogSelectorFactory = Callable[[], "CatalogSelectorClass"]
+
+
+class QueryFuture:
+    """The pending result of a query submitted to a QueryExecutor
+
+    the worker sends the result back as an Arrow IPC stream, it is converted
+    into the requested output format on the first call to `result`, in the
+    calling thread.
+    """
+
+    def __init__(self, future: Future, output_format: OutputFormat):
+        self.future = future
+        self.output_format = output_format
+        self._result: Optional[DataOutput] = None
+        self._lock = threading.Lock()
+
+    def result(self, timeout: Optional[float] = None) -> DataOutput:
+        """Wait for the query to be resolved
+
+        Args:
+            timeout (Optional[float]): Seconds to wait, forever if None
+
+        Returns:
+            DataOutput: The resolved data in the requested output format
+        """
+        payload = self.future.result(timeout)
+        with self._lock:
+            if self._result is None:
+                self._result = _read_result(payload, self.output_format)
+            return self._result
+
+    def exception(self, timeout: Optional[float] = None) -> Optional[BaseException]:
+        return self.future.exception(timeout)
+
+    def cancel(self) -> bool:
+        """Cancel the query if no worker has started resolving it"""
+        return self.future.cancel()
+
+    def cancelled(self) -> bool:
+        return self.future.cancelled()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+
+class QueryExecutor:
+    """Resolves queries in worker processes, each store served by the same worker
+
+    every worker is a process of its own, queries are sharded by weather
+    model and spatial tile: the queries of a store are spread over
+    workers_per_store workers (all of them by default), and those within
+    the same tile always land on the same worker, where the opened store,
+    its coordinate index and decoded chunks stay warm from one query to the
+    next. With workers_per_store=1 every store is served by a single worker,
+    which keeps more stores warm when many are queried at once.
+
+    queries are resolved independently: a failing query fails its own
+    future only, results are returned in submission order. Workers select
+    the catalog themselves, the parent process never opens a store.
+
+    Args:
+        max_workers (int): The number of worker processes
+        workers_per_store (Optional[int]): Over how many workers the queries
+            of one store are spread, max_workers if None
+        tile_degrees (float): The size of the spatial tiles spreading the
+            queries of a store, in degrees
+        catalog_selector_factory (Optional[CatalogSelectorFactory]): A picklable
+            function called once per worker that builds the catalog selector
+            it resolves queries with, get_catalog_selector if None
+        mp_context (Optional[Any]): The multiprocessing context workers are
+            started with, "spawn" if None: forking a process holding open
+            stores and thread pools is not safe
+    """
+
+    def __init__(
+        self,
+        max_workers: int = os.cpu_count() or 1,
+        workers_per_store: Optional[int] = None,
+        tile_degrees: float = 5.0,
+        catalog_selector_factory: Optional[CatalogSelectorFactory] = None,
+        mp_context: Optional[Any] = None,
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        if workers_per_store is None:
+            workers_per_store = max_workers
+        self.workers_per_store = max(1, min(workers_per_store, max_workers))
+        self.tile_degrees = tile_degrees
+        self.catalog_selector_factory = catalog_selector_factory
+        self.mp_context = mp_context or multiprocessing.get_context("spawn")
+
+        self._workers: list[Optional[ProcessPoolExecutor]] = [None] * max_workers
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def shard(self, query: Query) -> int:
+        """The worker a query is sent to
+
+        Args:
+            query (Query): The query to place
+
+        Returns:
+            int: The index of the worker, the same for every query of a store
+                within a tile (of a store, with workers_per_store=1)
+        """
+        store = f"{query.weather_model_group}/{query.weather_model_id}"
+        worker = zlib.crc32(store.encode())
+        if self.workers_per_store > 1:
+            latitude, longitude = _location_centre(query)
+            tile = (
+                f"{math.floor(latitude / self.tile_degrees)}/"
+                f"{math.floor(longitude / self.tile_degrees)}"
+            )
+            worker += zlib.crc32(tile.encode()) % self.workers_per_store
+        return worker % self.max_workers
+
+    def submit(
+        self, query: Query, output_format: OutputFormat = OutputFormat.PANDAS
+    ) -> QueryFuture:
+        """Send a query to its worker
+
+        Args:
+            query (Query): The query to resolve
+            output_format (OutputFormat): The format `result` returns
+
+        Returns:
+            QueryFuture: The pending result
+        """
+        shard = self.shard(query)
+        InstrumentationSingleton.count("executor_queries")
+        try:
+            future = self._worker(shard).submit(_resolve, query)
+        except BrokenProcessPool:
+            # a worker that died fails the queries it held, later ones go to
+            # a fresh process
+            future = self._worker(shard, restart=True).submit(_resolve, query)
+        return QueryFuture(future, output_format)
+
+    def map(
+        self,
+        queries: Union[Sequence[Query], QueryBatch],
+        output_format: OutputFormat = OutputFormat.PANDAS,
+        return_exceptions: bool = False,
+    ) -> Iterator[Union[DataOutput, BaseException]]:
+        """Resolve queries concurrently, yielding results in input order
+
+        every query is submitted up front, queries that have not started are
+        cancelled if the iterator is closed early or a query fails
+
+        Args:
+            queries (Union[Sequence[Query], QueryBatch]): The queries to resolve
+            output_format (OutputFormat): The format of the results
+            return_exceptions (bool): Yield the exception of a failed query in
+                its place instead of raising it
+
+        Returns:
+            Iterator[Union[DataOutput, BaseException]]: One result per query
+        """
+        if isinstance(queries, QueryBatch):
+            queries = [queries.query(i) for i in range(len(queries))]
+        futures = [self.submit(query, output_format) for query in queries]
+        return self._results(futures, return_exceptions)
+
+    def _results(
+        self, futures: list[QueryFuture], return_exceptions: bool
+    ) -> Iterator[Union[DataOutput, BaseException]]:
+        try:
+            for future in futures:
+                if not return_exceptions:
+                    yield future.result()
+                    continue
+                try:
+                    result: Union[DataOutput, BaseException] = future.result()
+                except Exception as e:
+                    result = e
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """Stop the workers
+
+        Args:
+            wait (bool): Wait for the submitted queries to be resolved
+            cancel_futures (bool): Cancel the queries no worker has started
+        """
+        with self._lock:
+            self._shutdown = True
+            workers, self._workers = self._workers, [None] * self.max_workers
+        for worker in workers:
+            if worker is not None:
+                worker.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def __enter__(self) -> "QueryExecutor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown(wait=True, cancel_futures=exc_info[0] is not None)
+
+    def _worker(self, shard: int, restart: bool = False) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit queries after shutdown")
+            worker = self._workers[shard]
+            if worker is not None and restart:
+                logger.warning(f"Query executor worker {shard} died, restarting it")
+                InstrumentationSingleton.count("executor_worker_restarts")
+                worker.shutdown(wait=False, cancel_futures=True)
+                worker = None
+            if worker is None:
+                worker = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=self.mp_context,
+                    initializer=_initialize_worker,
+                    initargs=(self.catalog_selector_factory,),
+                )
+                self._workers[shard] = worker
+            return worker
+
+
+# state of a worker process, set by _initialize_worker
+_catalog_selector: Optional["CatalogSelectorClass"] = None
+_query_resolver = QueryResolver()
+
+
+def _initialize_worker(
+    catalog_selector_factory: Optional[CatalogSelectorFactory],
+) -> None:
+    global _catalog_selector
+    if catalog_selector_factory is None:
+        from weather_catalog.catalog.catalog_selector import get_catalog_selector
+
+        catalog_selector_factory = get_catalog_selector
+    _catalog_selector = catalog_selector_factory()
+
+
+def _resolve(query: Query) -> bytes:
+    """Resolve a query in a worker, as an Arrow IPC stream
+
+    the record batch is built over the values read, the stream is written
+    from its buffers without going through pandas or pickle
+    """
+    import pyarrow as pa
+
+    assert _catalog_selector is not None, "the worker was not initialized"
+    data = _catalog_selector.select_catalog(query).get_data(query)
+    batch = _query_resolver.resolve(query, data, OutputFormat.ARROW_RECORD_BATCH)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def _read_result(payload: bytes, output_format: OutputFormat) -> DataOutput:
+    import pyarrow as pa
+
+    batch = pa.ipc.open_stream(payload).read_next_batch()
+    return convert_record_batch(batch, output_format)
+
+
+def _location_centre(query: Query) -> tuple[float, float]:
+    location: Any = query.location
+    if hasattr(location, "bounds"):
+        min_latitude, max_latitude, min_longitude, max_longitude = location.bounds()
+        return (min_latitude + max_latitude) / 2, (min_longitude + max_longitude) / 2
+    return location.latitude, location.longitude
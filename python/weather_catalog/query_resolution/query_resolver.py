@@ -1,7 +1,21 @@
+import asyncio
+from typing import Iterator, Optional, Sequence, Union
+
 import pandas as pd
 
 from weather_catalog.data import DataCube
-from weather_catalog.query import PointDateRangeQuery, Query
+from weather_catalog.data.arrow_output import DataOutput
+from weather_catalog.enums import OutputFormat
+from weather_catalog.instrumentation import InstrumentationSingleton
+from weather_catalog.query import (
+    PointDateRangeQuery,
+    Query,
+    QueryBatch,
+    RegionDateRangeQuery,
+)
+
+from .concurrency_limiter import ConcurrencyLimiterSingleton
+from .result_cache import ResultCache
 
 
 class QueryResolver:
@@ -10,18 +24,165 @@ class QueryResolver:
     in its most basic form, this smartly extracts information from the query
     (e.g. latitude, longitude, etc.) and then passes that information to the
     data cube's get_data method to extract the relevant data
+
+    Args:
+        result_cache (Optional[ResultCache]): Cache of resolved results
+            (e.g. ResultCacheSingleton), results are not cached if None
     """
 
-    def resolve(self, query: Query, data: DataCube) -> pd.DataFrame:
+    def __init__(self, result_cache: Optional[ResultCache] = None):
+        self.result_cache = result_cache
+
+    def resolve(
+        self,
+        query: Query,
+        data: DataCube,
+        output_format: OutputFormat = OutputFormat.PANDAS,
+    ) -> DataOutput:
+        """Resolve a query against a data cube
+
+        Args:
+            query (Query): The query to resolve
+            data (DataCube): The data cube to resolve it against
+            output_format (OutputFormat): Return a pandas dataframe (default),
+                a pyarrow Table or a pyarrow RecordBatch. Only pandas results
+                go through the result cache, Arrow results are read zero-copy
+
+        Returns:
+            DataOutput: The resolved data in the requested output format
+        """
 
         # if not isinstance(query, PointDateRangeQuery):
         #     raise ValueError(f"Query type {type(query)} not supported, current MVP only supports PointDateRangeQuery")
 
-        return self._resolve_point_daterange_query(query, data)  # type: ignore
+        with InstrumentationSingleton.span(
+            "query.resolve",
+            query_type=type(query).__name__,
+            output_format=output_format.value,
+        ):
+            if (
+                self.result_cache is None
+                or output_format != OutputFormat.PANDAS
+                or not self.result_cache.caches(data)
+            ):
+                return self._resolve_query(query, data, output_format)
+
+            key = self.result_cache.key(query, data)
+            cached = self.result_cache.get(key, query, data)
+            if cached is not None:
+                InstrumentationSingleton.count("result_cache_hits")
+                return cached
+            InstrumentationSingleton.count("result_cache_misses")
+
+            resolved = self._resolve_query(query, data, output_format)
+            self.result_cache.put(key, query, data, resolved)
+            return resolved
+
+    async def aresolve(
+        self,
+        query: Query,
+        data: DataCube,
+        output_format: OutputFormat = OutputFormat.PANDAS,
+    ) -> DataOutput:
+        """Resolve a query against a data cube without blocking the event loop
+
+        the chunks the query reads are fetched first without holding a thread
+        (see DataCube.aprefetch), decoding and the read itself then run in a
+        thread. Queries on the same catalog are bounded by its limit in the
+        ConcurrencyLimiterSingleton.
+
+        Args:
+            query (Query): The query to resolve
+            data (DataCube): The data cube to resolve it against
+            output_format (OutputFormat): As in `resolve`
+
+        Returns:
+            DataOutput: The resolved data in the requested output format
+        """
+        async with ConcurrencyLimiterSingleton.limit(data.catalog_id):
+            with InstrumentationSingleton.span(
+                "query.aresolve",
+                query_type=type(query).__name__,
+                output_format=output_format.value,
+            ):
+                if (
+                    self.result_cache is None
+                    or output_format != OutputFormat.PANDAS
+                    or not self.result_cache.caches(data)
+                ):
+                    await self._aprefetch(query, data)
+                    return await asyncio.to_thread(
+                        self._resolve_query, query, data, output_format
+                    )
+
+                key = self.result_cache.key(query, data)
+                cached = await asyncio.to_thread(
+                    self.result_cache.get, key, query, data
+                )
+                if cached is not None:
+                    InstrumentationSingleton.count("result_cache_hits")
+                    return cached
+                InstrumentationSingleton.count("result_cache_misses")
+
+                await self._aprefetch(query, data)
+                resolved = await asyncio.to_thread(
+                    self._resolve_query, query, data, output_format
+                )
+                await asyncio.to_thread(
+                    self.result_cache.put, key, query, data, resolved
+                )
+                return resolved
+
+    async def _aprefetch(self, query: Query, data: DataCube) -> None:
+        if isinstance(query, RegionDateRangeQuery):
+            await data.aprefetch(
+                query.start_date,
+                query.end_date,
+                query.variables,
+                location=query.location,
+            )
+            return
+        point_query: PointDateRangeQuery = query  # type: ignore
+        await data.aprefetch(
+            point_query.start_date,
+            point_query.end_date,
+            point_query.variables,
+            latitude=point_query.location.latitude,
+            longitude=point_query.location.longitude,
+        )
+
+    def _resolve_query(
+        self, query: Query, data: DataCube, output_format: OutputFormat
+    ) -> DataOutput:
+        if isinstance(query, RegionDateRangeQuery):
+            return self._resolve_region_daterange_query(query, data, output_format)
+        return self._resolve_point_daterange_query(
+            query, data, output_format  # type: ignore
+        )
+
+    def _resolve_region_daterange_query(
+        self,
+        query: RegionDateRangeQuery,
+        data: DataCube,
+        output_format: OutputFormat = OutputFormat.PANDAS,
+    ) -> DataOutput:
+        return data.get_region_data(
+            location=query.location,
+            start_date=query.start_date,
+            end_date=query.end_date,
+            variables=query.variables,
+            spatial_aggregation=query.spatial_aggregation,
+            output_format=output_format,
+            frequency=query.frequency,
+            aggregation=query.aggregation,
+        )
 
     def _resolve_point_daterange_query(
-        self, query: PointDateRangeQuery, data: DataCube
-    ) -> pd.DataFrame:
+        self,
+        query: PointDateRangeQuery,
+        data: DataCube,
+        output_format: OutputFormat = OutputFormat.PANDAS,
+    ) -> DataOutput:
 
         # TODO: add middleman handling converting the lat/lon and time inputs into indicies for the data cube
 
@@ -30,5 +191,102 @@ class QueryResolver:
             longitude=query.location.longitude,
             start_date=query.start_date,
             end_date=query.end_date,
-            variables=[query.variable],
+            variables=query.variables,
+            output_format=output_format,
+            frequency=query.frequency,
+            aggregation=query.aggregation,
         )
+
+    def iter_resolve(
+        self,
+        query: Query,
+        data: DataCube,
+        batch_chunks: int = 1,
+        read_ahead: bool = True,
+        output_format: OutputFormat = OutputFormat.PANDAS,
+    ) -> Iterator[DataOutput]:
+        """Resolve a query as a stream of bounded batches
+
+        meant for long time ranges that should not be held in memory at once,
+        results are not cached. Only point queries can be streamed.
+
+        Args:
+            query (Query): The point query to resolve
+            data (DataCube): The data cube to resolve it against
+            batch_chunks (int): How many storage time chunks go into one batch
+            read_ahead (bool): Read the next batch while the current one is consumed
+            output_format (OutputFormat): Stream pandas dataframes (default),
+                pyarrow Tables or pyarrow RecordBatches
+
+        Returns:
+            Iterator[DataOutput]: Consecutive batches of the result, resampled
+                to the query's frequency
+        """
+        if not isinstance(query, PointDateRangeQuery):
+            raise ValueError(
+                f"Only point queries can be streamed, got a {type(query).__name__}, "
+                "resolve it with `resolve` instead"
+            )
+        return data.iter_data(
+            latitude=query.location.latitude,
+            longitude=query.location.longitude,
+            start_date=query.start_date,
+            end_date=query.end_date,
+            variables=query.variables,
+            batch_chunks=batch_chunks,
+            read_ahead=read_ahead,
+            output_format=output_format,
+            frequency=query.frequency,
+            aggregation=query.aggregation,
+        )
+
+    def resolve_many(
+        self,
+        queries: Union[Sequence[PointDateRangeQuery], QueryBatch],
+        data: DataCube,
+    ) -> pd.DataFrame:
+        """Resolve a batch of point queries against the same data cube
+
+        queries sharing a time range, variables and resampling are resolved
+        together with one vectorized DataCube.get_data_batch call, so the cost
+        scales with the number of chunks touched rather than the number of points.
+
+        Args:
+            queries (Union[Sequence[PointDateRangeQuery], QueryBatch]): The
+                queries to resolve, all targeting the same weather model.
+                A QueryBatch is used as is, without building or validating
+                a query object per row
+            data (DataCube): The data cube of that weather model
+
+        Returns:
+            pd.DataFrame: A long format dataframe, the "point_id" column holds
+                the position of the originating query in `queries`
+        """
+        if not isinstance(queries, QueryBatch):
+            if not queries:
+                return pd.DataFrame(columns=["point_id"])
+            queries = QueryBatch.from_queries(queries)
+        query_groups = queries.groups()
+
+        with InstrumentationSingleton.span(
+            "query.resolve_many", queries=len(queries), groups=len(query_groups)
+        ):
+            frames = [
+                data.get_data_batch(
+                    latitudes=queries.latitudes[group.positions],
+                    longitudes=queries.longitudes[group.positions],
+                    start_date=group.start_date,
+                    end_date=group.end_date,
+                    variables=group.variables,
+                    point_ids=group.positions,
+                    frequency=group.frequency,
+                    aggregation=group.aggregation,
+                )
+                for group in query_groups
+            ]
+
+            if not frames:
+                return pd.DataFrame(columns=["point_id"])
+            if len(frames) == 1:
+                return frames[0]
+            return pd.concat(frames).sort_values("point_id", kind="stable")
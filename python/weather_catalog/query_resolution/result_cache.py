@@ -0,0 +1,353 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import pandas as pd
+from loguru import logger
+
+from weather_catalog.basemodel import BaseModel
+from weather_catalog.data import DataCube
+from weather_catalog.query import Query
+
+_NO_CATALOG = "_unknown_catalog"
+
+# share of max_disk_bytes the disk tier is brought down to once it is over
+_DISK_LOW_WATERMARK = 0.9
+
+
+class ResultCacheStats(BaseModel):
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    memory_entries: int = 0
+    memory_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / requests if requests else 0.0
+
+
+class _MemoryEntry(NamedTuple):
+    frame: pd.DataFrame
+    nbytes: int
+    created_at: float
+    catalog_id: str
+    model_path: str
+
+
+class ResultCache:
+    """Two tier cache of resolved query results
+
+    results are keyed by a canonical hash of the query together with the
+    catalog and store version of the data cube it was resolved against, so a
+    rewritten store never serves stale results. The first tier is an in memory
+    LRU, the optional second tier a size-bounded directory of Parquet files laid
+    out as <disk_path>/<catalog id>/<model group>/<model id>/<key>.parquet.
+
+    results of data cubes without a store version are only cached when their
+    catalog has a TTL, nothing would tell when they become stale otherwise.
+    The size of the disk tier is counted as results are written, the
+    directory is only scanned when that count goes over max_disk_bytes.
+
+    Args:
+        max_memory_entries (int): How many results the memory tier holds
+        max_memory_bytes (int): How many bytes of results the memory tier holds
+        disk_path (Optional[str]): Where to keep the Parquet tier, disabled if None
+        max_disk_bytes (int): How many bytes the Parquet tier may use
+        default_ttl_seconds (Optional[float]): How long results stay valid,
+            forever if None
+        ttl_by_catalog (Optional[dict[str, float]]): Per catalog overrides of the TTL
+    """
+
+    def __init__(
+        self,
+        max_memory_entries: int = 256,
+        max_memory_bytes: int = 256 * 1024 * 1024,
+        disk_path: Optional[str] = None,
+        max_disk_bytes: int = 4 * 1024 * 1024 * 1024,
+        default_ttl_seconds: Optional[float] = None,
+        ttl_by_catalog: Optional[dict[str, float]] = None,
+    ):
+        self.max_memory_entries = max_memory_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_path = disk_path
+        self.max_disk_bytes = max_disk_bytes
+        self.default_ttl_seconds = default_ttl_seconds
+        self.ttl_by_catalog = ttl_by_catalog or {}
+
+        self._memory: OrderedDict[str, _MemoryEntry] = OrderedDict()
+        self._memory_bytes = 0
+        # bytes written to the disk tier, None until it has been scanned
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    def caches(self, data: DataCube) -> bool:
+        """Whether results resolved on a data cube can be cached
+
+        Args:
+            data (DataCube): The data cube queries are resolved against
+
+        Returns:
+            bool: True if the cube has a store version or its catalog a TTL
+        """
+        return (
+            data.store_version is not None
+            or self._ttl(data.catalog_id or _NO_CATALOG) is not None
+        )
+
+    def key(self, query: Query, data: DataCube) -> str:
+        """Canonical hash of a query and the version of the data it is resolved on
+
+        Args:
+            query (Query): The query
+            data (DataCube): The data cube the query is resolved against
+
+        Returns:
+            str: A hex digest identifying the result
+        """
+        payload = {
+            "query_type": type(query).__name__,
+            "query": query.model_dump(mode="json"),
+            "catalog_id": data.catalog_id,
+            "store_version": data.store_version,
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+        ).hexdigest()
+
+    def get(self, key: str, query: Query, data: DataCube) -> Optional[pd.DataFrame]:
+        """Look a result up, in memory first and then on disk
+
+        Args:
+            key (str): The key from `key`
+            query (Query): The query the key was built from
+            data (DataCube): The data cube the key was built from
+
+        Returns:
+            Optional[pd.DataFrame]: A copy of the cached result, None on a miss
+        """
+        catalog_id = data.catalog_id or _NO_CATALOG
+        ttl = self._ttl(catalog_id)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if ttl is None or time.time() - entry.created_at < ttl:
+                    self._memory.move_to_end(key)
+                    self._memory_hits += 1
+                    return entry.frame.copy()
+                self._drop_memory_entry(key)
+
+        frame = self._read_disk(key, catalog_id, query, ttl)
+        with self._lock:
+            if frame is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+        self._put_memory(key, frame, catalog_id, self._model_path(query))
+        return frame.copy()
+
+    def put(self, key: str, query: Query, data: DataCube, frame: pd.DataFrame) -> None:
+        """Store a result in both tiers
+
+        Args:
+            key (str): The key from `key`
+            query (Query): The resolved query
+            data (DataCube): The data cube the query was resolved against
+            frame (pd.DataFrame): The result
+        """
+        catalog_id = data.catalog_id or _NO_CATALOG
+        frame = frame.copy()
+        self._put_memory(key, frame, catalog_id, self._model_path(query))
+        self._write_disk(key, catalog_id, query, frame)
+
+    def invalidate(
+        self,
+        catalog_id: Optional[str] = None,
+        weather_model_group: Optional[str] = None,
+        weather_model_id: Optional[str] = None,
+    ) -> None:
+        """Drop cached results, e.g. after a store has been written to
+
+        Args:
+            catalog_id (Optional[str]): Only drop results of this catalog
+            weather_model_group (Optional[str]): Only drop results of this model group
+            weather_model_id (Optional[str]): Only drop results of this model,
+                requires weather_model_group
+        """
+        model_prefix = "/".join(
+            part for part in (weather_model_group, weather_model_id) if part is not None
+        )
+        with self._lock:
+            for key, entry in list(self._memory.items()):
+                if catalog_id is not None and entry.catalog_id != catalog_id:
+                    continue
+                if model_prefix and not (
+                    entry.model_path == model_prefix
+                    or entry.model_path.startswith(f"{model_prefix}/")
+                ):
+                    continue
+                self._drop_memory_entry(key)
+
+        if self.disk_path is None:
+            return
+        if catalog_id is None:
+            target = self.disk_path
+        else:
+            target = os.path.join(self.disk_path, catalog_id, *model_prefix.split("/"))
+        shutil.rmtree(target, ignore_errors=True)
+        with self._lock:
+            self._disk_bytes = None
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def stats(self) -> ResultCacheStats:
+        with self._lock:
+            return ResultCacheStats(
+                memory_hits=self._memory_hits,
+                disk_hits=self._disk_hits,
+                misses=self._misses,
+                memory_entries=len(self._memory),
+                memory_bytes=self._memory_bytes,
+            )
+
+    def _ttl(self, catalog_id: str) -> Optional[float]:
+        return self.ttl_by_catalog.get(catalog_id, self.default_ttl_seconds)
+
+    @staticmethod
+    def _model_path(query: Query) -> str:
+        return f"{query.weather_model_group}/{query.weather_model_id}"
+
+    def _put_memory(
+        self, key: str, frame: pd.DataFrame, catalog_id: str, model_path: str
+    ) -> None:
+        nbytes = int(frame.memory_usage(deep=True).sum())
+        if nbytes > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._drop_memory_entry(key)
+            self._memory[key] = _MemoryEntry(
+                frame=frame,
+                nbytes=nbytes,
+                created_at=time.time(),
+                catalog_id=catalog_id,
+                model_path=model_path,
+            )
+            self._memory_bytes += nbytes
+            while self._memory and (
+                len(self._memory) > self.max_memory_entries
+                or self._memory_bytes > self.max_memory_bytes
+            ):
+                self._drop_memory_entry(next(iter(self._memory)))
+
+    def _drop_memory_entry(self, key: str) -> None:
+        entry = self._memory.pop(key)
+        self._memory_bytes -= entry.nbytes
+
+    def _disk_file(self, key: str, catalog_id: str, query: Query) -> str:
+        return os.path.join(
+            self.disk_path,  # type: ignore
+            catalog_id,
+            query.weather_model_group,
+            query.weather_model_id,
+            f"{key}.parquet",
+        )
+
+    def _read_disk(
+        self, key: str, catalog_id: str, query: Query, ttl: Optional[float]
+    ) -> Optional[pd.DataFrame]:
+        if self.disk_path is None:
+            return None
+        path = self._disk_file(key, catalog_id, query)
+        try:
+            if ttl is not None and time.time() - os.path.getmtime(path) >= ttl:
+                os.remove(path)
+                return None
+            frame = pd.read_parquet(path)
+            # touch the file so the disk tier evicts least recently used results
+            os.utime(path)
+            return frame
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cached result {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _write_disk(
+        self, key: str, catalog_id: str, query: Query, frame: pd.DataFrame
+    ) -> None:
+        if self.disk_path is None:
+            return
+        path = self._disk_file(key, catalog_id, query)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            frame.to_parquet(temporary_path)
+            written_bytes = os.path.getsize(temporary_path)
+            os.replace(temporary_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write cached result {path}: {e}")
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+
+        with self._lock:
+            if self._disk_bytes is not None:
+                # a rewritten result is counted twice until the next scan
+                self._disk_bytes += written_bytes
+            over_budget = (
+                self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+            )
+        if over_budget:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        # other processes may share the directory, so it is scanned rather
+        # than trusting the count of this one
+        files = []
+        total_bytes = 0
+        for directory, _, file_names in os.walk(self.disk_path):  # type: ignore
+            for file_name in file_names:
+                if not file_name.endswith(".parquet"):
+                    continue
+                path = os.path.join(directory, file_name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total_bytes += stat.st_size
+
+        if total_bytes > self.max_disk_bytes:
+            target_bytes = self.max_disk_bytes * _DISK_LOW_WATERMARK
+            for _, size, path in sorted(files):
+                if total_bytes <= target_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total_bytes -= size
+
+        with self._lock:
+            self._disk_bytes = total_bytes
+
+
+ResultCacheSingleton = ResultCache(
+    disk_path=os.environ.get("WEATHER_CATALOG_RESULT_CACHE_DIR")
+)
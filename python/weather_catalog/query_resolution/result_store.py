@@ -0,0 +1,240 @@
+import hashlib
+import os
+import tempfile
+import time
+import uuid
+from typing import Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+from loguru import logger
+
+from weather_catalog.basemodel import BaseModel
+
+RESULT_FILE_SUFFIX = ".arrow"
+TEMPORARY_FILE_SUFFIX = ".tmp"
+
+
+class ResultReference(BaseModel):
+    """A small, serializable handle to a result written to a ResultStore
+
+    passed between tasks (e.g. through Airflow XCom) instead of the result itself
+    """
+
+    path: str
+    columns: dict[str, str]
+    num_rows: int
+    size_bytes: int
+    checksum: str
+
+
+class ResultStore:
+    """Writes resolved results as Arrow IPC files and hands out references
+
+    results are written uncompressed in the Arrow IPC file format so readers
+    can memory map them: reading a result maps the file instead of
+    deserializing it, and the page cache is shared between processes.
+    Files are content addressed by their SHA-256 checksum.
+
+    results are only kept for downstream tasks: writes prune the directory
+    (at most once per prune_interval_seconds), dropping results older than
+    max_age_seconds, then the oldest ones while over max_bytes.
+
+    Args:
+        base_path (str): The directory results are written to
+        max_age_seconds (Optional[float]): How long results are kept, no
+            limit if None
+        max_bytes (Optional[int]): How many bytes the results may use, no
+            limit if None
+        prune_interval_seconds (float): The minimum time between two prunes
+            triggered by writes
+    """
+
+    def __init__(
+        self,
+        base_path: str,
+        max_age_seconds: Optional[float] = 24 * 60 * 60,
+        max_bytes: Optional[int] = 4 * 1024 * 1024 * 1024,
+        prune_interval_seconds: float = 60.0,
+    ):
+        self.base_path = base_path
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.prune_interval_seconds = prune_interval_seconds
+        self._pruned_at: Optional[float] = None
+
+    def write(self, frame: pd.DataFrame) -> ResultReference:
+        """Write a result and return a reference to it
+
+        Args:
+            frame (pd.DataFrame): The resolved result
+
+        Returns:
+            ResultReference: The reference to pass on to downstream readers
+        """
+        table = pa.Table.from_pandas(frame, preserve_index=True)
+        return self.write_table(table)
+
+    def write_table(self, table: pa.Table) -> ResultReference:
+        """Write an Arrow table and return a reference to it
+
+        Args:
+            table (pa.Table): The resolved result
+
+        Returns:
+            ResultReference: The reference to pass on to downstream readers
+        """
+        os.makedirs(self.base_path, exist_ok=True)
+        temporary_path = os.path.join(
+            self.base_path, f".{uuid.uuid4().hex}{TEMPORARY_FILE_SUFFIX}"
+        )
+        with pa.OSFile(temporary_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        checksum = _file_checksum(temporary_path)
+        path = os.path.join(self.base_path, f"{checksum}{RESULT_FILE_SUFFIX}")
+        os.replace(temporary_path, path)
+
+        if (
+            self._pruned_at is None
+            or time.monotonic() - self._pruned_at >= self.prune_interval_seconds
+        ):
+            self.prune(keep=path)
+
+        return ResultReference(
+            path=path,
+            columns={field.name: str(field.type) for field in table.schema},
+            num_rows=table.num_rows,
+            size_bytes=os.path.getsize(path),
+            checksum=checksum,
+        )
+
+
+    def prune(self, keep: Optional[str] = None) -> int:
+        """Remove the results past max_age_seconds, then the oldest while over max_bytes
+
+        temporary files left behind by interrupted writes are removed once
+        they are older than max_age_seconds
+
+        Args:
+            keep (Optional[str]): The path of a result never removed, e.g. the
+                one just written
+
+        Returns:
+            int: The number of removed files
+        """
+        self._pruned_at = time.monotonic()
+        files = []
+        try:
+            with os.scandir(self.base_path) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(
+                        (RESULT_FILE_SUFFIX, TEMPORARY_FILE_SUFFIX)
+                    ):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return 0
+
+        now = time.time()
+        removed, results = 0, []
+        for modified_at, size, path in sorted(files):
+            expired = (
+                self.max_age_seconds is not None
+                and now - modified_at >= self.max_age_seconds
+            )
+            if expired and path != keep:
+                removed += _remove(path)
+            elif path.endswith(RESULT_FILE_SUFFIX):
+                results.append((size, path))
+
+        if self.max_bytes is not None:
+            total_bytes = sum(size for size, _ in results)
+            for size, path in results:
+                if total_bytes <= self.max_bytes:
+                    break
+                if path != keep:
+                    removed += _remove(path)
+                    total_bytes -= size
+
+        if removed:
+            logger.debug(f"Pruned {removed} results from {self.base_path}")
+        return removed
+
+
+def read_result_table(
+    reference: Union[ResultReference, dict], verify_checksum: bool = False
+) -> pa.Table:
+    """Memory map a result written by a ResultStore
+
+    the returned table is backed by the mapped file, no data is copied
+
+    Args:
+        reference (Union[ResultReference, dict]): The reference returned by
+            ResultStore.write, or its dumped form as received through XCom
+        verify_checksum (bool): Hash the file and compare it to the reference
+
+    Returns:
+        pa.Table: The result
+    """
+    if isinstance(reference, dict):
+        reference = ResultReference(**reference)
+    if verify_checksum and _file_checksum(reference.path) != reference.checksum:
+        raise ValueError(f"Checksum mismatch for result {reference.path}")
+
+    source = pa.memory_map(reference.path, "r")
+    table = pa.ipc.open_file(source).read_all()
+    if table.num_rows != reference.num_rows:
+        raise ValueError(
+            f"Result {reference.path} has {table.num_rows} rows, "
+            f"the reference expects {reference.num_rows}"
+        )
+    return table
+
+
+def read_result(
+    reference: Union[ResultReference, dict], verify_checksum: bool = False
+) -> pd.DataFrame:
+    """Read a result written by a ResultStore as a pandas dataframe
+
+    Args:
+        reference (Union[ResultReference, dict]): The reference returned by
+            ResultStore.write, or its dumped form as received through XCom
+        verify_checksum (bool): Hash the file and compare it to the reference
+
+    Returns:
+        pd.DataFrame: The result
+    """
+    return read_result_table(reference, verify_checksum).to_pandas()
+
+
+def _file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _remove(path: str) -> bool:
+    # results are shared between processes, another one may have pruned it
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _default_base_path() -> str:
+    return os.environ.get(
+        "WEATHER_CATALOG_RESULT_STORE",
+        os.path.join(tempfile.gettempdir(), "weather_catalog_results"),
+    )
+
+
+ResultStoreSingleton = ResultStore(base_path=_default_base_path())
@@ -0,0 +1,170 @@
+import socket
+import uuid
+from datetime import datetime
+from typing import Any, Callable
+
+import numpy as np
+import pytest
+import zarr
+from zarr.hierarchy import Group
+
+from weather_catalog.data.zarray_data_cube import ZarrayDataCube
+from weather_catalog.enums import Frequency, Resolution, WeatherVariable
+from weather_catalog.query import PointDateRangeQuery, RegionDateRangeQuery
+
+VARIABLE_RENAME_MAP = {
+    WeatherVariable.TEMPERATURE: "t2m",
+    WeatherVariable.WIND_U: "u10m",
+    WeatherVariable.WIND_V: "v10m",
+}
+
+N_TIMES, N_LATITUDES, N_LONGITUDES = 240, 50, 80
+
+
+def store_values(name: str, times: np.ndarray, ny: int, nx: int) -> np.ndarray:
+    """Values encoding their own (time, y, x) position, offset per variable"""
+    offset = list(VARIABLE_RENAME_MAP.values()).index(name) * 0.5
+    return (
+        times[:, None, None] * 10000.0
+        + np.arange(ny)[None, :, None] * 100.0
+        + np.arange(nx)[None, None, :]
+        + offset
+    ).astype("float32")
+
+
+def write_store(
+    store: Any,
+    n_times: int = N_TIMES,
+    first_time: int = 0,
+    chunks: tuple[int, int, int] = (48, 10, 16),
+    consolidated: bool = True,
+) -> Group:
+    """Write an hourly store starting 2020-01-01 over a 60N-20N, 130W-60W grid"""
+    group = zarr.open_group(store, mode="w")
+    group.array("latitude", np.linspace(60, 20, N_LATITUDES)).attrs[
+        "_ARRAY_DIMENSIONS"
+    ] = ["latitude"]
+    group.array("longitude", np.linspace(-130, -60, N_LONGITUDES)).attrs[
+        "_ARRAY_DIMENSIONS"
+    ] = ["longitude"]
+    times = np.arange(first_time, first_time + n_times, dtype="int64")
+    time = group.array("time", times)
+    time.attrs.update(
+        {
+            "units": "hours since 2020-01-01 00:00:00",
+            "calendar": "standard",
+            "_ARRAY_DIMENSIONS": ["time"],
+        }
+    )
+    for name in VARIABLE_RENAME_MAP.values():
+        array = group.array(
+            name, store_values(name, times, N_LATITUDES, N_LONGITUDES), chunks=chunks
+        )
+        array.attrs["_ARRAY_DIMENSIONS"] = ["time", "latitude", "longitude"]
+    if consolidated:
+        zarr.consolidate_metadata(store)
+    return group
+
+
+@pytest.fixture
+def zarr_store(tmp_path) -> Callable[..., str]:
+    """Write a store under tmp_path, returns its path"""
+
+    def make(relative_path: str = "gfs/model.zarr", **kwargs: Any) -> str:
+        path = str(tmp_path / relative_path)
+        write_store(path, **kwargs)
+        return path
+
+    return make
+
+
+@pytest.fixture
+def cube(zarr_store) -> ZarrayDataCube:
+    return ZarrayDataCube(
+        dataset=zarr.open_group(zarr_store(), mode="r"),
+        variable_rename_map=VARIABLE_RENAME_MAP,
+    )
+
+
+def point_query(
+    latitude: float = 41.3,
+    longitude: float = -100.2,
+    start_date: datetime = datetime(2020, 1, 2),
+    end_date: datetime = datetime(2020, 1, 6),
+    variables: tuple[WeatherVariable, ...] = (WeatherVariable.TEMPERATURE,),
+    frequency: Frequency = Frequency.HOURLY,
+    weather_model_group: str = "gfs",
+    weather_model_id: str = "model",
+    **kwargs: Any,
+) -> PointDateRangeQuery:
+    return PointDateRangeQuery(
+        start_date=start_date,
+        end_date=end_date,
+        location={"latitude": latitude, "longitude": longitude},
+        weather_model_group=weather_model_group,
+        weather_model_id=weather_model_id,
+        resolution=Resolution._25km,
+        variables=list(variables),
+        frequency=frequency,
+        **kwargs,
+    )
+
+
+def region_query(
+    start_date: datetime = datetime(2020, 1, 2),
+    end_date: datetime = datetime(2020, 1, 4),
+    variables: tuple[WeatherVariable, ...] = (WeatherVariable.TEMPERATURE,),
+    frequency: Frequency = Frequency.HOURLY,
+    weather_model_group: str = "gfs",
+    weather_model_id: str = "model",
+    **kwargs: Any,
+) -> RegionDateRangeQuery:
+    return RegionDateRangeQuery(
+        start_date=start_date,
+        end_date=end_date,
+        location={
+            "min_latitude": 30,
+            "max_latitude": 40,
+            "min_longitude": -100,
+            "max_longitude": -90,
+        },
+        weather_model_group=weather_model_group,
+        weather_model_id=weather_model_id,
+        resolution=Resolution._25km,
+        variables=list(variables),
+        frequency=frequency,
+        **kwargs,
+    )
+
+
+@pytest.fixture(scope="session")
+def s3_endpoint() -> str:
+    """A moto server standing in for S3, shared by the session"""
+    moto_server = pytest.importorskip("moto.server")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+    server.start()
+    yield f"http://127.0.0.1:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def s3_filesystem(s3_endpoint, monkeypatch) -> Any:
+    """An s3fs filesystem on the moto server"""
+    s3fs = pytest.importorskip("s3fs")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    return s3fs.S3FileSystem(
+        endpoint_url=s3_endpoint, skip_instance_cache=True, use_listings_cache=False
+    )
+
+
+@pytest.fixture
+def s3_bucket(s3_filesystem) -> str:
+    """An empty bucket per test"""
+    bucket = f"test-{uuid.uuid4().hex[:12]}"
+    s3_filesystem.mkdir(bucket)
+    return bucket
@@ -0,0 +1,115 @@
+from datetime import datetime
+
+import pytest
+import zarr
+
+from weather_catalog.catalog.catalog_coverage import CatalogCoverage
+from weather_catalog.catalog.catalog_selector import CatalogSelectorClass
+from weather_catalog.catalog.local_catalog.local_catalog import LocalCatalog
+from weather_catalog.enums import Frequency
+
+from .conftest import point_query, write_store
+
+
+class OtherLocalCatalog(LocalCatalog):
+    catalog_id: str = "other_local"
+
+
+@pytest.fixture
+def catalogs(tmp_path):
+    write_store(str(tmp_path / "first/gfs/model.zarr"), n_times=48)
+    hourly = write_store(str(tmp_path / "second/gfs/model.zarr"))
+    hourly.attrs["frequency"] = Frequency.HOURLY.value
+    zarr.consolidate_metadata(hourly.store)
+    write_store(str(tmp_path / "second/ecmwf/ifs.zarr"))
+    return [
+        LocalCatalog(base_path=str(tmp_path / "first")),
+        OtherLocalCatalog(base_path=str(tmp_path / "second")),
+    ]
+
+
+def model_coverage(catalog: LocalCatalog) -> CatalogCoverage:
+    [coverage] = [c for c in catalog.coverage() if c.weather_model_id == "model"]
+    return coverage
+
+
+def test_selects_the_first_catalog_covering_the_query(catalogs):
+    selector = CatalogSelectorClass(catalogs)
+
+    early = point_query(start_date=datetime(2020, 1, 1), end_date=datetime(2020, 1, 2))
+    late = point_query(start_date=datetime(2020, 1, 5), end_date=datetime(2020, 1, 6))
+
+    assert selector.select_catalog(early).catalog_id == "local"
+    assert selector.select_catalog(late).catalog_id == "other_local"
+    assert selector.select_catalog(
+        point_query(weather_model_group="ecmwf", weather_model_id="ifs")
+    ).catalog_id == "other_local"
+
+
+def test_queries_overlapping_the_store_dates_are_covered(catalogs):
+    selector = CatalogSelectorClass(catalogs)
+
+    overlapping = point_query(end_date=datetime(2020, 1, 4))
+
+    assert selector.select_catalog(overlapping).catalog_id == "local"
+
+
+@pytest.mark.parametrize("frequency", [Frequency.DAILY, Frequency.MONTHLY])
+def test_coarser_queries_are_served_by_hourly_stores(catalogs, frequency):
+    selector = CatalogSelectorClass(catalogs[1:])
+    query = point_query(frequency=frequency)
+
+    coverage = model_coverage(catalogs[1])
+
+    assert coverage.frequency == Frequency.HOURLY
+    assert coverage.covers(query)
+    assert selector.select_catalog(query).catalog_id == "other_local"
+
+
+def test_finer_queries_are_not_covered(catalogs):
+    coverage = model_coverage(catalogs[1])
+
+    assert not coverage.model_copy(update={"frequency": Frequency.DAILY}).covers(
+        point_query(frequency=Frequency.HOURLY)
+    )
+
+
+def test_no_catalog_covering_the_query_raises(catalogs):
+    selector = CatalogSelectorClass(catalogs)
+
+    with pytest.raises(ValueError):
+        selector.select_catalog(point_query(weather_model_id="missing"))
+    with pytest.raises(ValueError):
+        selector.select_catalog(
+            point_query(start_date=datetime(2021, 1, 1), end_date=datetime(2021, 1, 2))
+        )
+
+
+def test_manifest_replaces_scanning_the_stores(catalogs, tmp_path, monkeypatch):
+    manifest_path = CatalogSelectorClass(catalogs).write_manifest(
+        str(tmp_path / "manifest.json")
+    )
+
+    def fail(self):
+        raise AssertionError("coverage scanned despite the manifest")
+
+    monkeypatch.setattr(LocalCatalog, "coverage", fail)
+    selector = CatalogSelectorClass(catalogs, manifest_path=manifest_path)
+
+    late = point_query(start_date=datetime(2020, 1, 5), end_date=datetime(2020, 1, 6))
+    assert selector.select_catalog(late).catalog_id == "other_local"
+
+
+def test_can_source_answers_are_cached(catalogs, monkeypatch):
+    selector = CatalogSelectorClass(catalogs)
+    calls = []
+    monkeypatch.setattr(
+        LocalCatalog, "can_source", lambda self, query: calls.append(query) or True
+    )
+
+    for _ in range(3):
+        selector.can_source(catalogs[0], point_query())
+    selector.invalidate()
+    selector.can_source(catalogs[0], point_query())
+
+    assert len(calls) == 2
@@ -0,0 +1,46 @@
+import gc
+
+import numpy as np
+import zarr
+
+from weather_catalog.data.chunk_cache import ChunkCacheSingleton
+from weather_catalog.data.store_key import store_key
+
+
+def read_constant_store(value: float) -> np.ndarray:
+    group = zarr.open_group(zarr.storage.MemoryStore(), mode="w")
+    group.full("values", value, shape=(8, 8), chunks=(4, 4), dtype="float32")
+    return ChunkCacheSingleton.read(group["values"], (slice(None), slice(None)))
+
+
+def test_repeated_reads_are_served_from_the_cache():
+    group = zarr.open_group(zarr.storage.MemoryStore(), mode="w")
+    array = group.array("values", np.arange(64.0).reshape(8, 8), chunks=(4, 4))
+    first = ChunkCacheSingleton.read(array, (slice(None), slice(2, 6)))
+    hits = ChunkCacheSingleton.stats().hits
+
+    second = ChunkCacheSingleton.read(array, (slice(None), slice(2, 6)))
+
+    np.testing.assert_array_equal(first, array[:, 2:6])
+    np.testing.assert_array_equal(second, first)
+    assert ChunkCacheSingleton.stats().hits == hits + 4
+
+
+def test_collected_stores_do_not_share_their_cached_chunks():
+    for value in range(50):
+        values = read_constant_store(float(value))
+        gc.collect()
+
+        np.testing.assert_array_equal(values, np.full((8, 8), value))
+
+
+def test_stores_without_a_location_have_distinct_keys():
+    first = zarr.open_group(zarr.storage.MemoryStore(), mode="w")
+    first_key = store_key(first)
+    del first
+    gc.collect()
+
+    second = zarr.open_group(zarr.storage.MemoryStore(), mode="w")
+
+    assert store_key(second) != first_key
+    assert store_key(second) == store_key(second)
@@ -0,0 +1,177 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from weather_catalog.data.zarray_data_cube import ZarrayDataCube
+from weather_catalog.enums import Aggregation, Frequency, OutputFormat, WeatherVariable
+from weather_catalog.query.location import BBoxLocation, PolygonLocation
+
+from .conftest import (
+    N_LATITUDES,
+    N_LONGITUDES,
+    VARIABLE_RENAME_MAP,
+    store_values,
+    write_store,
+)
+
+LATITUDES = np.linspace(60, 20, N_LATITUDES)
+LONGITUDES = np.linspace(-130, -60, N_LONGITUDES)
+START, END = datetime(2020, 1, 2), datetime(2020, 1, 6)
+VARIABLES = [WeatherVariable.TEMPERATURE, WeatherVariable.WIND_U]
+SHAPE = (N_LATITUDES, N_LONGITUDES)
+
+
+def expected_point(y: int, x: int, start: int = 24, stop: int = 121) -> pd.DataFrame:
+    times = np.arange(start, stop)
+    frame = pd.DataFrame(
+        {
+            "temperature": store_values("t2m", times, *SHAPE)[:, y, x],
+            "wind_u": store_values("u10m", times, *SHAPE)[:, y, x],
+        },
+        index=pd.DatetimeIndex(
+            pd.Timestamp("2020-01-01") + pd.to_timedelta(times, unit="h"), name="time"
+        ),
+    )
+    return frame
+
+
+def test_get_data_reads_the_nearest_point_over_the_time_range(cube):
+    latitude, longitude = LATITUDES[12] + 0.1, LONGITUDES[30] - 0.1
+
+    frame = cube.get_data(latitude, longitude, START, END, VARIABLES)
+
+    pd.testing.assert_frame_equal(frame, expected_point(12, 30), check_freq=False)
+
+
+def test_get_data_outside_the_store_times_is_empty(cube):
+    frame = cube.get_data(
+        40, -100, datetime(2021, 1, 1), datetime(2021, 1, 2), VARIABLES
+    )
+
+    assert frame.empty
+
+
+@pytest.mark.parametrize(
+    "output_format", [OutputFormat.ARROW_TABLE, OutputFormat.ARROW_RECORD_BATCH]
+)
+def test_arrow_outputs_hold_the_pandas_values(cube, output_format):
+    expected = cube.get_data(40, -100, START, END, VARIABLES)
+
+    output = cube.get_data(40, -100, START, END, VARIABLES, output_format=output_format)
+
+    pd.testing.assert_frame_equal(output.to_pandas().set_index("time"), expected)
+
+
+def test_get_data_batch_matches_single_point_reads(cube):
+    latitudes, longitudes = [41.3, 55.0, 22.0], [-100.2, -70.0, -129.0]
+
+    batch = cube.get_data_batch(latitudes, longitudes, START, END, VARIABLES)
+
+    for point_id, (latitude, longitude) in enumerate(zip(latitudes, longitudes)):
+        single = cube.get_data(latitude, longitude, START, END, VARIABLES)
+        rows = batch[batch["point_id"] == point_id].drop(columns="point_id")
+        pd.testing.assert_frame_equal(rows, single)
+
+
+@pytest.mark.parametrize("frequency", [Frequency.DAILY, Frequency.MONTHLY])
+@pytest.mark.parametrize("aggregation", [Aggregation.MEAN, Aggregation.MAX])
+def test_resampling_matches_pandas(cube, frequency, aggregation):
+    hourly = cube.get_data(40, -100, START, END, VARIABLES)
+    rule = {Frequency.DAILY: "D", Frequency.MONTHLY: "MS"}[frequency]
+
+    resampled = cube.get_data(
+        40, -100, START, END, VARIABLES, frequency=frequency, aggregation=aggregation
+    )
+
+    expected = getattr(hourly.resample(rule), aggregation.value)()
+    pd.testing.assert_frame_equal(
+        resampled, expected, check_freq=False, check_dtype=False
+    )
+
+
+def test_iter_data_batches_concatenate_to_get_data(cube):
+    expected = cube.get_data(40, -100, START, END, VARIABLES)
+
+    batches = list(cube.iter_data(40, -100, START, END, VARIABLES))
+
+    assert len(batches) > 1
+    pd.testing.assert_frame_equal(pd.concat(batches), expected)
+
+
+@pytest.mark.parametrize("frequency", [Frequency.DAILY, Frequency.MONTHLY])
+@pytest.mark.parametrize("batch_chunks", [1, 2])
+def test_iter_data_batches_hold_whole_periods(tmp_path, frequency, batch_chunks):
+    # 30 hour chunks, so chunk boundaries fall within days
+    cube = ZarrayDataCube(
+        dataset=write_store(str(tmp_path / "model.zarr"), chunks=(30, 10, 16)),
+        variable_rename_map=VARIABLE_RENAME_MAP,
+    )
+    start, end = datetime(2020, 1, 1, 7), datetime(2020, 1, 10, 17)
+    expected = cube.get_data(
+        40,
+        -100,
+        start,
+        end,
+        VARIABLES,
+        frequency=frequency,
+        aggregation=Aggregation.MAX,
+    )
+
+    batches = list(
+        cube.iter_data(
+            40,
+            -100,
+            start,
+            end,
+            VARIABLES,
+            batch_chunks=batch_chunks,
+            frequency=frequency,
+            aggregation=Aggregation.MAX,
+        )
+    )
+
+    streamed = pd.concat(batches)
+    assert streamed.index.is_unique
+    pd.testing.assert_frame_equal(streamed, expected)
+
+
+def test_region_data_returns_every_cell_of_the_box(cube):
+    box = BBoxLocation(
+        min_latitude=30, max_latitude=40, min_longitude=-100, max_longitude=-90
+    )
+
+    frame = cube.get_region_data(box, START, END, VARIABLES)
+
+    inside_latitudes = ((LATITUDES >= 30) & (LATITUDES <= 40)).sum()
+    inside_longitudes = ((LONGITUDES >= -100) & (LONGITUDES <= -90)).sum()
+    assert len(frame) == 97 * inside_latitudes * inside_longitudes
+    assert frame["latitude"].between(30, 40).all()
+    assert frame["longitude"].between(-100, -90).all()
+
+
+def test_region_data_aggregates_the_cells(cube):
+    box = BBoxLocation(
+        min_latitude=30, max_latitude=40, min_longitude=-100, max_longitude=-90
+    )
+    cells = cube.get_region_data(box, START, END, VARIABLES)
+
+    maximum = cube.get_region_data(
+        box, START, END, VARIABLES, spatial_aggregation=Aggregation.MAX
+    )
+
+    expected = cells.groupby(level="time")[["temperature", "wind_u"]].max()
+    pd.testing.assert_frame_equal(maximum, expected, check_dtype=False)
+
+
+def test_polygon_region_is_a_subset_of_its_bounding_box(cube):
+    triangle = PolygonLocation(vertices=[(30, -100), (40, -100), (30, -90)])
+    box = BBoxLocation(
+        min_latitude=30, max_latitude=40, min_longitude=-100, max_longitude=-90
+    )
+
+    in_triangle = cube.get_region_data(triangle, START, START, VARIABLES)
+    in_box = cube.get_region_data(box, START, START, VARIABLES)
+
+    assert 0 < len(in_triangle) < len(in_box)
@@ -0,0 +1,58 @@
+import socket
+import urllib.request
+
+from weather_catalog.instrumentation import (
+    Instrumentation,
+    LoguruExporter,
+    PrometheusExporter,
+)
+
+
+def test_environment_configures_the_exporters(monkeypatch):
+    monkeypatch.setenv("WEATHER_CATALOG_INSTRUMENTATION", "loguru, Prometheus")
+    monkeypatch.setenv("WEATHER_CATALOG_PROMETHEUS_PORT", "0")
+
+    instrumentation = Instrumentation.from_environment()
+
+    loguru, prometheus = instrumentation.exporters
+    assert isinstance(loguru, LoguruExporter)
+    assert isinstance(prometheus, PrometheusExporter)
+    prometheus.stop_http_server()
+
+
+def test_prometheus_metrics_are_served_from_the_environment(monkeypatch):
+    monkeypatch.setenv("WEATHER_CATALOG_INSTRUMENTATION", "prometheus")
+    monkeypatch.setenv("WEATHER_CATALOG_PROMETHEUS_PORT", "0")
+    instrumentation = Instrumentation.from_environment()
+    [prometheus] = instrumentation.exporters
+
+    with instrumentation.span("query.resolve"):
+        instrumentation.count("chunks_touched", 3)
+
+    port = prometheus._server.server_address[1]
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+        metrics = response.read().decode()
+    prometheus.stop_http_server()
+    assert metrics == prometheus.render()
+    assert "chunks_touched_total" in metrics
+
+
+def test_prometheus_port_in_use_keeps_the_exporter(monkeypatch):
+    with socket.socket() as taken:
+        taken.bind(("0.0.0.0", 0))
+        taken.listen()
+        monkeypatch.setenv("WEATHER_CATALOG_INSTRUMENTATION", "prometheus")
+        monkeypatch.setenv(
+            "WEATHER_CATALOG_PROMETHEUS_PORT", str(taken.getsockname()[1])
+        )
+
+        [prometheus] = Instrumentation.from_environment().exporters
+
+    assert isinstance(prometheus, PrometheusExporter)
+    assert prometheus._server is None
+
+
+def test_unknown_exporters_are_ignored(monkeypatch):
+    monkeypatch.setenv("WEATHER_CATALOG_INSTRUMENTATION", "statsd")
+
+    assert not Instrumentation.from_environment().enabled
@@ -0,0 +1,197 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import zarr
+
+from weather_catalog.catalog.local_catalog.local_catalog import LocalCatalog
+from weather_catalog.catalog.local_catalog.store_handle_pool import (
+    StoreHandlePoolSingleton,
+)
+from weather_catalog.data.memmap_data_cube import MemmapDataCube
+from weather_catalog.data.memmap_store import write_memmap_store
+from weather_catalog.data.rechunk import rechunk_store
+from weather_catalog.data.store_key import store_key
+from weather_catalog.data.zarr_store_writer import ZarrStoreWriter, ZarrWriteOptions
+from weather_catalog.data.zarray_data_cube import ZarrayDataCube
+from weather_catalog.query_resolution import QueryResolver
+
+from .conftest import VARIABLE_RENAME_MAP, point_query, region_query, write_store
+
+
+@pytest.fixture(autouse=True)
+def revalidate_every_time(monkeypatch):
+    monkeypatch.setattr(StoreHandlePoolSingleton, "revalidate_after_seconds", 0.0)
+
+
+def test_get_data_opens_the_store_of_the_query(tmp_path, zarr_store):
+    zarr_store()
+    catalog = LocalCatalog(base_path=str(tmp_path))
+
+    cube = catalog.get_data(point_query())
+
+    assert isinstance(cube, ZarrayDataCube)
+    assert cube.catalog_id == "local"
+    assert cube.store_version is not None
+    assert catalog.can_source(point_query())
+    assert not catalog.can_source(point_query(weather_model_id="missing"))
+
+
+def test_opening_a_store_does_not_write_into_it(tmp_path, zarr_store):
+    path = zarr_store(consolidated=False)
+
+    LocalCatalog(base_path=str(tmp_path)).get_data(point_query())
+
+    assert not os.path.exists(os.path.join(path, ".zmetadata"))
+
+
+@pytest.mark.parametrize("consolidated", [True, False])
+def test_writes_by_other_tools_are_seen(tmp_path, zarr_store, consolidated):
+    path = zarr_store(n_times=48, consolidated=consolidated)
+    catalog = LocalCatalog(base_path=str(tmp_path))
+    assert catalog.get_data(point_query()).time_index.times.size == 48
+
+    group = zarr.open_group(path)
+    for name in ["time"] + list(VARIABLE_RENAME_MAP.values()):
+        values = np.arange(48, 72) if name == "time" else group[name][-24:]
+        group[name].append(values, axis=0)
+    os.utime(os.path.join(path, "time", ".zarray"), ns=(2**62, 2**62))
+
+    assert catalog.get_data(point_query()).time_index.times.size == 72
+
+
+def test_warm_queries_make_no_filesystem_calls(tmp_path, zarr_store, monkeypatch):
+    rechunk_store(zarr_store())
+    monkeypatch.setattr(StoreHandlePoolSingleton, "revalidate_after_seconds", 60.0)
+    catalog = LocalCatalog(base_path=str(tmp_path))
+    cold = catalog.get_data(point_query())
+
+    def fail(*args, **kwargs):
+        raise AssertionError("filesystem call on a warm query")
+
+    for name in ("stat", "listdir", "scandir"):
+        monkeypatch.setattr(os, name, fail)
+    warm = catalog.get_data(point_query())
+
+    assert warm.dataset is cold.dataset
+    assert warm.store_version == cold.store_version
+
+
+def test_upload_data_writes_then_appends(tmp_path):
+    catalog = LocalCatalog(base_path=str(tmp_path / "catalog"))
+    first = write_store(str(tmp_path / "first.zarr"), n_times=48)
+    second = write_store(str(tmp_path / "second.zarr"), n_times=24, first_time=48)
+
+    catalog.upload_data(ZarrayDataCube(dataset=first), point_query())
+    catalog.upload_data(ZarrayDataCube(dataset=second), point_query())
+
+    cube = catalog.get_data(point_query())
+    assert cube.time_index.times.size == 72
+    expected = write_store(str(tmp_path / "expected.zarr"), n_times=72)
+    np.testing.assert_array_equal(cube.dataset["t2m"][...], expected["t2m"][...])
+
+
+def test_reads_during_an_append_see_the_previous_times(tmp_path, monkeypatch):
+    catalog = LocalCatalog(base_path=str(tmp_path / "catalog"))
+    first = write_store(str(tmp_path / "first.zarr"), n_times=48)
+    second = write_store(str(tmp_path / "second.zarr"), n_times=24, first_time=48)
+    catalog.upload_data(ZarrayDataCube(dataset=first), point_query())
+    before = QueryResolver().resolve(point_query(), catalog.get_data(point_query()))
+    during = []
+    run = ZarrStoreWriter._run
+
+    def run_then_read(self, tasks):
+        # the variables hold the new times, the time coordinate does not yet
+        run(self, tasks)
+        cube = catalog.get_data(point_query())
+        during.append(QueryResolver().resolve(point_query(), cube))
+
+    monkeypatch.setattr(ZarrStoreWriter, "_run", run_then_read)
+    catalog.upload_data(ZarrayDataCube(dataset=second), point_query())
+
+    [resolved] = during
+    pd.testing.assert_frame_equal(resolved, before)
+    assert catalog.get_data(point_query()).time_index.times.size == 72
+
+
+def test_uploads_can_write_uncompressed_chunks(tmp_path):
+    source = write_store(str(tmp_path / "source.zarr"))
+    catalog = LocalCatalog(base_path=str(tmp_path / "catalog"))
+
+    catalog.upload_data(ZarrayDataCube(dataset=source), point_query())
+    catalog.uploader.write_options = ZarrWriteOptions(compressor=None)
+    catalog.upload_data(
+        ZarrayDataCube(dataset=source), point_query(weather_model_id="raw")
+    )
+
+    kept = zarr.open_group(str(tmp_path / "catalog/gfs/model.zarr"), mode="r")
+    raw = zarr.open_group(str(tmp_path / "catalog/gfs/raw.zarr"), mode="r")
+    assert kept["t2m"].compressor == source["t2m"].compressor is not None
+    assert raw["t2m"].compressor is None
+    np.testing.assert_array_equal(raw["t2m"][...], source["t2m"][...])
+
+
+def test_queries_are_routed_to_the_copy_reading_the_fewest_chunks(tmp_path, zarr_store):
+    path = zarr_store()
+    copy_path = rechunk_store(path)
+    catalog = LocalCatalog(base_path=str(tmp_path))
+    long_query = point_query(end_date=point_query().start_date.replace(day=9))
+    short_query = point_query(end_date=point_query().start_date)
+
+    long_cube = catalog.get_data(long_query)
+    short_cube = catalog.get_data(short_query)
+
+    assert store_key(long_cube.dataset).startswith(f"DirectoryStore:{copy_path}")
+    assert store_key(short_cube.dataset).startswith(f"DirectoryStore:{path}")
+    pd.testing.assert_frame_equal(
+        QueryResolver().resolve(long_query, long_cube),
+        QueryResolver().resolve(long_query, short_cube),
+    )
+
+
+def test_append_extends_the_layout_copies(tmp_path, zarr_store):
+    path = zarr_store(n_times=48)
+    rechunk_store(path)
+    write_memmap_store(path)
+    catalog = LocalCatalog(base_path=str(tmp_path))
+    new_times = write_store(str(tmp_path / "new.zarr"), n_times=24, first_time=48)
+
+    catalog.uploader.append_data(path, ZarrayDataCube(dataset=new_times))
+
+    for memory_map in (True, False):
+        cube = LocalCatalog(base_path=str(tmp_path), memory_map=memory_map).get_data(
+            point_query()
+        )
+        assert cube.time_index.times.size == 72
+
+
+def test_memmap_copies_are_served_through_numpy_memmap(tmp_path, zarr_store):
+    path = zarr_store()
+    write_memmap_store(path, dimension_order=["latitude", "longitude", "time"])
+    query = point_query()
+
+    mapped = LocalCatalog(base_path=str(tmp_path)).get_data(query)
+    chunked = LocalCatalog(base_path=str(tmp_path), memory_map=False).get_data(query)
+
+    assert isinstance(mapped, MemmapDataCube)
+    assert not isinstance(chunked, MemmapDataCube)
+    pd.testing.assert_frame_equal(
+        QueryResolver().resolve(query, mapped), QueryResolver().resolve(query, chunked)
+    )
+    pd.testing.assert_frame_equal(
+        QueryResolver().resolve(region_query(), mapped),
+        QueryResolver().resolve(region_query(), chunked),
+    )
+
+
+def test_coverage_describes_every_store(tmp_path, zarr_store):
+    zarr_store("gfs/model.zarr")
+    zarr_store("ecmwf/ifs.zarr")
+
+    coverage = LocalCatalog(base_path=str(tmp_path)).coverage()
+
+    assert {(c.weather_model_group, c.weather_model_id) for c in coverage} == {
+        ("gfs", "model"),
+        ("ecmwf", "ifs"),
+    }
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from weather_catalog.enums import Aggregation, Frequency, Resolution, WeatherVariable
+from weather_catalog.query import QueryBatch
+from weather_catalog.query_resolution import QueryResolver
+
+from .conftest import point_query
+
+
+def make_batch(**kwargs) -> QueryBatch:
+    columns = dict(
+        latitudes=[41.3, 55.0, 22.0],
+        longitudes=[-100.2, -70.0, -129.0],
+        start_dates="2020-01-02",
+        end_dates=["2020-01-06", "2020-01-06", "2020-01-09"],
+        variables=WeatherVariable.TEMPERATURE,
+        weather_model_group="gfs",
+        weather_model_id="model",
+        resolution=Resolution._25km,
+    )
+    return QueryBatch(**{**columns, **kwargs})
+
+
+def test_shared_columns_are_broadcast():
+    batch = make_batch()
+
+    assert len(batch) == 3
+    assert batch.query(2) == point_query(
+        latitude=22.0, longitude=-129.0, end_date=datetime(2020, 1, 9)
+    )
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(latitudes=[41.3, 95.0, 22.0]),
+        dict(longitudes=[-100.2, np.nan, -129.0]),
+        dict(end_dates="2020-01-01"),
+        dict(longitudes=[-100.2, -70.0]),
+        dict(variables=[]),
+        dict(frequency="weekly"),
+    ],
+)
+def test_invalid_columns_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        make_batch(**kwargs)
+
+
+def test_from_queries_round_trips():
+    queries = [
+        point_query(),
+        point_query(latitude=55.0, frequency=Frequency.DAILY),
+        point_query(aggregation=Aggregation.MAX),
+    ]
+
+    assert QueryBatch.from_queries(queries).to_queries() == queries
+
+
+def test_from_queries_rejects_mixed_weather_models():
+    with pytest.raises(ValueError):
+        QueryBatch.from_queries([point_query(), point_query(weather_model_id="other")])
+
+
+def test_from_frame_reads_per_query_variables():
+    frame = pd.DataFrame(
+        {
+            "latitude": [41.3, 55.0],
+            "longitude": [-100.2, -70.0],
+            "start_date": pd.to_datetime(["2020-01-02", "2020-01-03"]),
+            "end_date": pd.to_datetime(["2020-01-06", "2020-01-06"]),
+            "variable": ["temperature", "wind_u"],
+        }
+    )
+
+    batch = QueryBatch.from_frame(frame, "gfs", "model", Resolution._25km)
+
+    assert batch.variables(0) == [WeatherVariable.TEMPERATURE]
+    assert batch.variables(1) == [WeatherVariable.WIND_U]
+
+
+def test_dict_round_trip_keeps_every_column():
+    batch = make_batch(frequency=["hourly", "daily", "monthly"])
+
+    restored = QueryBatch.from_dict(batch.to_dict())
+
+    assert restored.to_queries() == batch.to_queries()
+
+
+def test_groups_split_by_time_range_and_resampling():
+    batch = make_batch(aggregation=["mean", "mean", "max"])
+
+    groups = batch.groups()
+
+    assert sorted(group.positions.tolist() for group in groups) == [[0, 1], [2]]
+    assert batch.take(groups[0].positions).to_queries() == [
+        batch.query(0),
+        batch.query(1),
+    ]
+
+
+def test_variables_keep_the_order_they_were_given_in():
+    order = [WeatherVariable.WIND_V, WeatherVariable.TEMPERATURE]
+    queries = [point_query(variables=order), point_query(variables=order[::-1])]
+
+    batch = QueryBatch.from_queries(queries)
+    per_query = make_batch(variables=[order, order[::-1], ["wind_v", "temperature"]])
+
+    assert [batch.variables(position) for position in range(2)] == [
+        order,
+        order[::-1],
+    ]
+    assert per_query.variables(2) == order
+    assert len(per_query.variable_lists) == 2
+    assert QueryBatch.from_dict(batch.to_dict()).to_queries() == queries
+
+
+def test_variable_order_reaches_the_resolved_columns(cube):
+    order = [WeatherVariable.WIND_V, WeatherVariable.TEMPERATURE]
+    batch = make_batch(variables=order)
+
+    resolved = QueryResolver().resolve_many(batch, cube)
+
+    columns = [column for column in resolved.columns if column != "point_id"]
+    assert columns == ["wind_v", "temperature"]
+
+
+@pytest.mark.parametrize(
+    "zone", [ZoneInfo("Europe/Paris"), timezone(timedelta(hours=-5))]
+)
+def test_queries_keep_their_timezone(zone):
+    start = datetime(2020, 1, 2, tzinfo=zone)
+    queries = [
+        point_query(start_date=start, end_date=start + timedelta(days=days))
+        for days in (1, 3)
+    ]
+
+    for batch in (
+        QueryBatch.from_queries(queries),
+        QueryBatch.from_dict(QueryBatch.from_queries(queries).to_dict()),
+        make_batch(start_dates=start, end_dates=start + timedelta(days=2)),
+    ):
+        query = batch.query(0)
+        assert query.start_date == start
+        assert query.start_date.utcoffset() == start.utcoffset()
+        assert batch.start_dates[0] == np.datetime64(
+            start.astimezone(timezone.utc).replace(tzinfo=None)
+        )
+
+
+def test_dates_in_several_timezones_come_back_in_utc():
+    paris = datetime(2020, 1, 2, tzinfo=ZoneInfo("Europe/Paris"))
+
+    batch = make_batch(
+        start_dates=[paris, paris.astimezone(timezone.utc), paris],
+        end_dates=paris + timedelta(days=1),
+    )
+
+    assert batch.query(1).start_date == paris
+    assert batch.query(1).start_date.utcoffset() == timedelta(0)
@@ -0,0 +1,117 @@
+from functools import partial
+
+import pandas as pd
+import pytest
+
+from weather_catalog.catalog.catalog_selector import CatalogSelectorClass
+from weather_catalog.catalog.local_catalog.local_catalog import LocalCatalog
+from weather_catalog.enums import OutputFormat
+from weather_catalog.query import QueryBatch
+from weather_catalog.query_resolution import QueryExecutor, QueryResolver
+
+from .conftest import point_query, region_query, write_store
+
+
+def local_selector(base_path: str) -> CatalogSelectorClass:
+    return CatalogSelectorClass([LocalCatalog(base_path=base_path)])
+
+
+@pytest.fixture(scope="module")
+def base_path(tmp_path_factory):
+    base_path = tmp_path_factory.mktemp("executor")
+    write_store(str(base_path / "gfs/a.zarr"))
+    write_store(str(base_path / "gfs/b.zarr"))
+    return str(base_path)
+
+
+@pytest.fixture(scope="module")
+def executor(base_path):
+    with QueryExecutor(
+        max_workers=2, catalog_selector_factory=partial(local_selector, base_path)
+    ) as executor:
+        yield executor
+
+
+def resolve_locally(base_path, query):
+    catalog = local_selector(base_path).select_catalog(query)
+    return QueryResolver().resolve(query, catalog.get_data(query))
+
+
+def test_map_returns_the_results_in_submission_order(base_path, executor):
+    queries = [
+        point_query(weather_model_id="a", latitude=41.0),
+        point_query(weather_model_id="b", latitude=30.0, longitude=-90.0),
+        region_query(weather_model_id="a"),
+        point_query(weather_model_id="a", latitude=50.0, longitude=-70.0),
+    ]
+
+    for query, resolved in zip(queries, executor.map(queries)):
+        pd.testing.assert_frame_equal(
+            resolved, resolve_locally(base_path, query), check_freq=False
+        )
+
+
+def test_a_failing_query_fails_its_own_future(base_path, executor):
+    queries = [
+        point_query(weather_model_id="missing"),
+        point_query(weather_model_id="a"),
+    ]
+
+    failed, resolved = executor.map(queries, return_exceptions=True)
+
+    assert isinstance(failed, ValueError)
+    pd.testing.assert_frame_equal(
+        resolved, resolve_locally(base_path, queries[1]), check_freq=False
+    )
+    with pytest.raises(ValueError):
+        list(executor.map(queries))
+
+
+def test_submit_converts_to_the_requested_output(executor):
+    table = executor.submit(
+        point_query(weather_model_id="a"), OutputFormat.ARROW_TABLE
+    ).result()
+
+    assert table.num_rows == 97
+
+
+def test_map_accepts_a_query_batch(base_path, executor):
+    queries = [
+        point_query(weather_model_id="a", latitude=latitude)
+        for latitude in (25.0, 45.0)
+    ]
+
+    resolved = list(executor.map(QueryBatch.from_queries(queries)))
+
+    for query, frame in zip(queries, resolved):
+        pd.testing.assert_frame_equal(
+            frame, resolve_locally(base_path, query), check_freq=False
+        )
+
+
+def test_a_store_is_spread_over_every_worker_by_default():
+    executor = QueryExecutor(max_workers=4)
+    queries = [
+        point_query(latitude=latitude, longitude=longitude)
+        for latitude in range(20, 60, 5)
+        for longitude in range(-130, -60, 5)
+    ]
+
+    shards = {executor.shard(query) for query in queries}
+
+    assert shards == {0, 1, 2, 3}
+    assert executor.shard(point_query(latitude=41.0)) == executor.shard(
+        point_query(latitude=42.0)
+    )
+    executor.shutdown()
+
+
+def test_a_store_can_be_kept_on_one_worker():
+    executor = QueryExecutor(max_workers=4, workers_per_store=1)
+
+    shards = {
+        executor.shard(point_query(latitude=latitude)) for latitude in range(20, 60, 3)
+    }
+
+    assert len(shards) == 1
+    executor.shutdown()
@@ -0,0 +1,222 @@
+import asyncio
+import os
+
+import pandas as pd
+import pytest
+
+from weather_catalog.enums import Aggregation, Frequency, OutputFormat, WeatherVariable
+from weather_catalog.query import QueryBatch
+from weather_catalog.query_resolution import QueryResolver
+from weather_catalog.query_resolution.result_cache import ResultCache
+
+from .conftest import point_query, region_query
+
+VARIABLES = (WeatherVariable.TEMPERATURE, WeatherVariable.WIND_V)
+
+
+def test_resolve_point_query(cube):
+    query = point_query(variables=VARIABLES)
+
+    resolved = QueryResolver().resolve(query, cube)
+
+    expected = cube.get_data(
+        query.location.latitude,
+        query.location.longitude,
+        query.start_date,
+        query.end_date,
+        query.variables,
+    )
+    pd.testing.assert_frame_equal(resolved, expected)
+
+
+def test_resolve_resamples_to_the_query_frequency(cube):
+    query = point_query(frequency=Frequency.DAILY, aggregation=Aggregation.MIN)
+
+    resolved = QueryResolver().resolve(query, cube)
+
+    hourly = QueryResolver().resolve(point_query(), cube)
+    expected = hourly.resample("D").min()
+    pd.testing.assert_frame_equal(
+        resolved, expected, check_freq=False, check_dtype=False
+    )
+
+
+def test_resolve_region_query(cube):
+    query = region_query(spatial_aggregation=Aggregation.MEAN)
+
+    resolved = QueryResolver().resolve(query, cube)
+
+    assert list(resolved.columns) == ["temperature"]
+    assert len(resolved) == 49
+
+
+def test_resolve_many_keeps_the_position_of_every_query(cube):
+    queries = [
+        point_query(latitude=41.3, longitude=-100.2),
+        point_query(latitude=55.0, longitude=-70.0, variables=VARIABLES),
+        point_query(latitude=22.0, longitude=-129.0, frequency=Frequency.DAILY),
+    ]
+
+    resolved = QueryResolver().resolve_many(queries, cube)
+
+    for point_id, query in enumerate(queries):
+        single = QueryResolver().resolve(query, cube)
+        rows = resolved[resolved["point_id"] == point_id]
+        pd.testing.assert_frame_equal(
+            rows[list(single.columns)], single, check_dtype=False
+        )
+
+
+def test_resolve_many_accepts_a_query_batch(cube):
+    queries = [point_query(latitude=latitude) for latitude in (25.0, 35.0, 45.0)]
+
+    from_batch = QueryResolver().resolve_many(QueryBatch.from_queries(queries), cube)
+
+    expected = QueryResolver().resolve_many(queries, cube)
+    pd.testing.assert_frame_equal(from_batch, expected)
+
+
+def test_result_cache_serves_repeated_queries(cube, tmp_path):
+    cache = ResultCache(disk_path=str(tmp_path / "results"))
+    cube.catalog_id, cube.store_version = "local", "1"
+    resolver = QueryResolver(result_cache=cache)
+    query = point_query()
+
+    first = resolver.resolve(query, cube)
+    second = resolver.resolve(query, cube)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert cache.stats().misses == 1
+    assert cache.stats().memory_hits == 1
+
+
+def test_result_cache_disk_tier_survives_a_new_cache(cube, tmp_path):
+    cube.catalog_id, cube.store_version = "local", "1"
+    query = point_query()
+    first = QueryResolver(ResultCache(disk_path=str(tmp_path))).resolve(query, cube)
+
+    cache = ResultCache(disk_path=str(tmp_path))
+    second = QueryResolver(cache).resolve(query, cube)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert cache.stats().disk_hits == 1
+
+
+def test_result_cache_misses_after_the_store_version_changes(cube):
+    cache = ResultCache()
+    cube.catalog_id, cube.store_version = "local", "1"
+    resolver = QueryResolver(result_cache=cache)
+    resolver.resolve(point_query(), cube)
+
+    cube.store_version = "2"
+    resolver.resolve(point_query(), cube)
+
+    assert cache.stats().misses == 2
+
+
+def test_result_cache_invalidate_drops_the_results_of_a_model(cube, tmp_path):
+    cache = ResultCache(disk_path=str(tmp_path))
+    cube.catalog_id, cube.store_version = "local", "1"
+    resolver = QueryResolver(result_cache=cache)
+    resolver.resolve(point_query(), cube)
+
+    cache.invalidate(catalog_id="local", weather_model_group="gfs")
+    resolver.resolve(point_query(), cube)
+
+    assert cache.stats().misses == 2
+
+
+def test_iter_resolve_streams_the_resolved_rows(cube):
+    query = point_query()
+
+    batches = list(QueryResolver().iter_resolve(query, cube))
+
+    pd.testing.assert_frame_equal(
+        pd.concat(batches), QueryResolver().resolve(query, cube)
+    )
+
+
+@pytest.mark.parametrize(
+    "output_format", [OutputFormat.ARROW_TABLE, OutputFormat.ARROW_RECORD_BATCH]
+)
+def test_iter_resolve_streams_the_requested_output_format(cube, output_format):
+    query = point_query()
+
+    batches = list(
+        QueryResolver().iter_resolve(query, cube, output_format=output_format)
+    )
+
+    streamed = pd.concat(batch.to_pandas().set_index("time") for batch in batches)
+    pd.testing.assert_frame_equal(streamed, QueryResolver().resolve(query, cube))
+
+
+def test_iter_resolve_resamples_to_the_query_frequency(cube):
+    query = point_query(frequency=Frequency.DAILY, aggregation=Aggregation.SUM)
+
+    batches = list(QueryResolver().iter_resolve(query, cube))
+
+    assert len(batches) > 1
+    pd.testing.assert_frame_equal(
+        pd.concat(batches), QueryResolver().resolve(query, cube)
+    )
+
+
+def test_iter_resolve_rejects_region_queries(cube):
+    with pytest.raises(ValueError, match="point queries"):
+        QueryResolver().iter_resolve(region_query(), cube)
+
+
+@pytest.mark.parametrize(
+    "output_format", [OutputFormat.PANDAS, OutputFormat.ARROW_TABLE]
+)
+def test_aresolve_matches_resolve(cube, output_format):
+    query = point_query(variables=VARIABLES)
+
+    resolved = asyncio.run(QueryResolver().aresolve(query, cube, output_format))
+
+    expected = QueryResolver().resolve(query, cube, output_format)
+    assert resolved.equals(expected)
+
+
+def test_results_of_unversioned_cubes_are_only_cached_with_a_ttl(cube):
+    cube.catalog_id = "s3"
+    resolver = QueryResolver(ResultCache(ttl_by_catalog={"other": 60.0}))
+    for _ in range(2):
+        resolver.resolve(point_query(), cube)
+    assert resolver.result_cache.stats().memory_entries == 0
+
+    resolver = QueryResolver(ResultCache(ttl_by_catalog={"s3": 60.0}))
+    for _ in range(2):
+        resolver.resolve(point_query(), cube)
+    assert resolver.result_cache.stats().memory_hits == 1
+
+
+def test_result_cache_disk_tier_stays_within_its_budget(cube, tmp_path):
+    cube.catalog_id, cube.store_version = "local", "1"
+    cache = ResultCache(disk_path=str(tmp_path), max_memory_entries=0)
+    resolver = QueryResolver(cache)
+    resolver.resolve(point_query(), cube)
+    file_bytes = sum(path.stat().st_size for path in tmp_path.rglob("*.parquet"))
+    cache.max_disk_bytes = 3 * file_bytes
+
+    for latitude in range(25, 55, 3):
+        resolver.resolve(point_query(latitude=latitude), cube)
+
+    files = list(tmp_path.rglob("*.parquet"))
+    assert 0 < len(files) <= 3
+    assert sum(path.stat().st_size for path in files) <= cache.max_disk_bytes
+
+
+def test_result_cache_disk_tier_is_scanned_once_under_budget(
+    cube, tmp_path, monkeypatch
+):
+    cube.catalog_id, cube.store_version = "local", "1"
+    resolver = QueryResolver(ResultCache(disk_path=str(tmp_path)))
+    scans = []
+    walk = os.walk
+    monkeypatch.setattr(os, "walk", lambda path: scans.append(path) or walk(path))
+
+    for latitude in range(25, 55, 3):
+        resolver.resolve(point_query(latitude=latitude), cube)
+
+    assert len(scans) == 1
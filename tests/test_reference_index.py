@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from weather_catalog.catalog.local_catalog.local_catalog import LocalCatalog
+from weather_catalog.data.reference_index import (
+    build_reference_index,
+    open_reference_store,
+    read_reference_index,
+    write_reference_index,
+)
+from weather_catalog.query_resolution import QueryResolver
+
+from .conftest import (
+    N_LATITUDES,
+    N_LONGITUDES,
+    point_query,
+    store_values,
+    write_store,
+)
+
+h5py = pytest.importorskip("h5py")
+
+FILTERS = {
+    "t2m": dict(compression="gzip", compression_opts=4, shuffle=True),
+    "u10m": dict(fletcher32=True),
+    "v10m": {},
+}
+
+
+def write_netcdf(path: str, first_time: int, n_times: int) -> None:
+    """An HDF5 file laid out as netCDF4 writes it, one chunked filter per variable"""
+    with h5py.File(path, "w") as f:
+        coordinates = {
+            "latitude": np.linspace(60, 20, N_LATITUDES),
+            "longitude": np.linspace(-130, -60, N_LONGITUDES),
+            "time": np.arange(first_time, first_time + n_times, dtype="int64"),
+        }
+        for name, values in coordinates.items():
+            f.create_dataset(name, data=values).make_scale(name)
+        f["time"].attrs["units"] = "hours since 2020-01-01 00:00:00"
+        f["time"].attrs["calendar"] = "standard"
+
+        times = coordinates["time"]
+        for name, filters in FILTERS.items():
+            dataset = f.create_dataset(
+                name,
+                data=store_values(name, times, N_LATITUDES, N_LONGITUDES),
+                chunks=(24, 10, 16),
+                fillvalue=np.nan,
+                **filters,
+            )
+            for axis, scale in enumerate(["time", "latitude", "longitude"]):
+                dataset.dims[axis].attach_scale(f[scale])
+
+
+@pytest.fixture
+def netcdf_files(tmp_path):
+    paths = [str(tmp_path / "b.nc"), str(tmp_path / "a.nc")]
+    write_netcdf(paths[0], 48, 48)
+    write_netcdf(paths[1], 0, 48)
+    return paths
+
+
+@pytest.mark.parametrize("suffix", ["json", "parquet"])
+def test_reference_index_round_trips(netcdf_files, tmp_path, suffix):
+    index = build_reference_index(netcdf_files)
+    path = str(tmp_path / f"archive.refs.{suffix}")
+
+    write_reference_index(index, path)
+
+    assert read_reference_index(path) == index
+
+
+def test_reference_store_reads_the_netcdf_values(netcdf_files, tmp_path):
+    path = str(tmp_path / "archive.refs.parquet")
+    write_reference_index(build_reference_index(netcdf_files), path)
+
+    group = open_reference_store(path)
+
+    expected = write_store(str(tmp_path / "expected.zarr"), n_times=96)
+    for name in ["time", "latitude", "longitude"] + list(FILTERS):
+        np.testing.assert_array_equal(group[name][...], expected[name][...])
+
+
+def test_local_catalog_serves_reference_indexes(netcdf_files, tmp_path):
+    (tmp_path / "catalog/gfs").mkdir(parents=True)
+    write_reference_index(
+        build_reference_index(netcdf_files),
+        str(tmp_path / "catalog/gfs/model.refs.json"),
+    )
+    write_store(str(tmp_path / "zarr/gfs/model.zarr"), n_times=96)
+    query = point_query(end_date=pd.Timestamp("2020-01-04 23:00").to_pydatetime())
+
+    from_netcdf = LocalCatalog(base_path=str(tmp_path / "catalog"))
+    from_zarr = LocalCatalog(base_path=str(tmp_path / "zarr"))
+
+    assert from_netcdf.coverage()[0].weather_model_id == "model"
+    pd.testing.assert_frame_equal(
+        QueryResolver().resolve(query, from_netcdf.get_data(query)),
+        QueryResolver().resolve(query, from_zarr.get_data(query)),
+    )
@@ -0,0 +1,66 @@
+import os
+import time
+
+import pandas as pd
+
+from weather_catalog.query_resolution.result_store import ResultStore, read_result
+
+from .conftest import point_query
+
+
+def result(latitude: float = 41.3) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"temperature": [1.0, 2.0, latitude]},
+        index=pd.date_range(point_query().start_date, periods=3, freq="h", name="time"),
+    )
+
+
+def age(path: str, seconds: float) -> None:
+    modified_at = time.time() - seconds
+    os.utime(path, (modified_at, modified_at))
+
+
+def test_results_are_read_back_through_their_reference(tmp_path):
+    reference = ResultStore(str(tmp_path)).write(result())
+
+    restored = read_result(reference.model_dump(mode="json"), verify_checksum=True)
+
+    pd.testing.assert_frame_equal(restored, result(), check_freq=False)
+    assert reference.num_rows == 3
+
+
+def test_writes_prune_results_past_their_age(tmp_path):
+    store = ResultStore(str(tmp_path), max_age_seconds=3600, prune_interval_seconds=0)
+    old = store.write(result(10.0))
+    age(old.path, 7200)
+
+    new = store.write(result(20.0))
+
+    assert not os.path.exists(old.path)
+    assert os.path.exists(new.path)
+
+
+def test_writes_prune_the_oldest_results_over_the_byte_budget(tmp_path):
+    store = ResultStore(str(tmp_path), max_bytes=None, prune_interval_seconds=0)
+    references = [store.write(result(latitude)) for latitude in range(5)]
+    for seconds, reference in zip(range(50, 0, -10), references):
+        age(reference.path, seconds)
+    store.max_bytes = 2 * references[0].size_bytes
+
+    latest = store.write(result(99.0))
+
+    remaining = sorted(os.listdir(tmp_path))
+    assert remaining == sorted(
+        os.path.basename(reference.path) for reference in (references[-1], latest)
+    )
+
+
+def test_prune_keeps_results_between_interval_writes(tmp_path):
+    store = ResultStore(str(tmp_path), max_age_seconds=3600)
+    old = store.write(result(10.0))
+    age(old.path, 7200)
+
+    store.write(result(20.0))
+
+    assert os.path.exists(old.path)
+    assert store.prune() == 1
@@ -0,0 +1,122 @@
+import asyncio
+
+import pandas as pd
+import pytest
+import zarr
+
+from weather_catalog.catalog.s3.s3_catalog import S3Catalog
+from weather_catalog.catalog.s3.s3_downloader import S3Downloader
+from weather_catalog.catalog.s3.s3_uploader import S3Uploader
+from weather_catalog.data import ZarrayDataCube
+from weather_catalog.data.chunk_cache import ChunkCacheSingleton
+from weather_catalog.query_resolution import QueryResolver
+
+from .conftest import VARIABLE_RENAME_MAP, point_query, region_query, write_store
+
+
+class MotoDownloader(S3Downloader):
+    def _convert_query_to_relative_path(self, query) -> str:
+        return (
+            f"{self.bucket_base_path}/{query.weather_model_group}/"
+            f"{query.weather_model_id}.zarr"
+        )
+
+    def read_in_data(self, dataset) -> ZarrayDataCube:
+        return ZarrayDataCube(
+            dataset=dataset,
+            variable_rename_map=VARIABLE_RENAME_MAP,
+            read_policy=self.read_policy,
+        )
+
+
+class MotoUploader(S3Uploader):
+    def _convert_query_to_relative_path(self, query) -> str:
+        return ""
+
+    def write_data(self, file_path, data) -> None:
+        pass
+
+
+class MotoCatalog(S3Catalog):
+    catalog_id: str = "moto"
+    _downloader_class = MotoDownloader
+    _uploader_class = MotoUploader
+
+
+@pytest.fixture
+def s3_catalog(s3_filesystem, s3_bucket, tmp_path):
+    source = write_store(str(tmp_path / "source.zarr"), chunks=(120, 25, 40))
+    mapper = s3_filesystem.get_mapper(f"{s3_bucket}/gfs/model.zarr")
+    zarr.copy_all(source, zarr.open_group(mapper, mode="w"))
+    zarr.consolidate_metadata(mapper)
+
+    catalog = MotoCatalog(bucket_base_path=s3_bucket, max_concurrency=8)
+    catalog.downloader.filesystem = s3_filesystem
+    ChunkCacheSingleton.clear()
+    yield catalog
+    ChunkCacheSingleton.clear()
+
+
+@pytest.fixture
+def local_cube(tmp_path):
+    return ZarrayDataCube(
+        dataset=write_store(str(tmp_path / "local.zarr")),
+        variable_rename_map=VARIABLE_RENAME_MAP,
+    )
+
+
+QUERIES = [
+    point_query(),
+    point_query(latitude=55.0, longitude=-70.0, end_date=pd.Timestamp("2020-01-09")),
+    region_query(),
+]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_s3_reads_match_local_reads(s3_catalog, local_cube, query):
+    cube = s3_catalog.get_data(query)
+
+    resolved = QueryResolver().resolve(query, cube)
+
+    assert cube.catalog_id == "moto"
+    pd.testing.assert_frame_equal(resolved, QueryResolver().resolve(query, local_cube))
+
+
+def test_async_s3_reads_match_sync_reads(s3_catalog):
+    queries = [
+        point_query(latitude=latitude, longitude=longitude)
+        for latitude in (25.0, 40.0, 55.0)
+        for longitude in (-120.0, -95.0, -70.0)
+    ] + [region_query()]
+    expected = [QueryResolver().resolve(q, s3_catalog.get_data(q)) for q in queries]
+    ChunkCacheSingleton.clear()
+
+    async def resolve(query):
+        return await QueryResolver().aresolve(query, await s3_catalog.aget_data(query))
+
+    async def resolve_all():
+        return await asyncio.gather(*(resolve(query) for query in queries))
+
+    for resolved, single in zip(asyncio.run(resolve_all()), expected):
+        pd.testing.assert_frame_equal(resolved, single)
+
+
+def test_missing_s3_store_cannot_be_sourced(s3_catalog):
+    assert s3_catalog.can_source(point_query())
+    assert not s3_catalog.can_source(point_query(weather_model_id="missing"))
+
+
+def test_s3_cubes_are_versioned_by_their_consolidated_metadata(
+    s3_catalog, s3_filesystem, s3_bucket
+):
+    first = s3_catalog.get_data(point_query())
+    assert first.store_version is not None
+    assert asyncio.run(s3_catalog.aget_data(point_query())).store_version == (
+        first.store_version
+    )
+
+    mapper = s3_filesystem.get_mapper(f"{s3_bucket}/gfs/model.zarr")
+    zarr.open_group(mapper).attrs["history"] = "rewritten"
+    zarr.consolidate_metadata(mapper)
+
+    assert s3_catalog.get_data(point_query()).store_version != first.store_version